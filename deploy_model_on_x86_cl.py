@@ -26,6 +26,15 @@ from tvm.relay.op.contrib import clml
 from tvm import autotvm
 import onnx
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "object_det_model"))
+from artifact_cache import build_cached, copy_artifacts
+from log_tools import merge_logs, print_stats
+from task_budget import count_task_occurrences, plan_budget, print_plan
+from precision import convert_precision, load_calibration_set, precision_cache_key
+from rpc_farm import RPCFarm
+from tuning_telemetry import autotvm_early_stop
+from cost_model import load_autotvm_history, make_warm_xgb_tuner, update_history
+
 # Configuration
 calculation_dtype = "float16"
 acc_dtype = "float32"
@@ -56,17 +65,25 @@ input_name = "input"
 shape_dict = {input_name: (4, 3, 640, 640)}
 mod, params = relay.frontend.from_onnx(onnx_model, shape_dict)
 
-# Apply mixed precision transformations
-from tvm.driver.tvmc.transform import apply_graph_transforms
-# mod = apply_graph_transforms(
-#     mod,
-#     {
-#         "mixed_precision": True,
-#         "mixed_precision_ops": ["nn.conv2d", "nn.dense"],
-#         "mixed_precision_calculation_type": calculation_dtype,
-#         "mixed_precision_acc_type": acc_dtype,
-#     },
-# )
+# Precision mode: "fp32", "fp16" (mixed precision with calculation_dtype/acc_dtype)
+# or "int8" (relay quantization calibrated on the samples in calibration_dir)
+precision = "fp32"
+calibration_dir = "/workspace/gallopwave/tvm/calibration/"
+calibration_files = []
+if precision != "fp32":
+    calibration_set = None
+    if precision == "int8":
+        calibration_set, calibration_files = load_calibration_set(
+            calibration_dir, input_name, shape_dict[input_name], "float32"
+        )
+    mod, params = convert_precision(
+        mod,
+        params,
+        precision,
+        calibration_set=calibration_set,
+        calculation_dtype=calculation_dtype,
+        acc_dtype=acc_dtype,
+    )
 
 # Prepare TVM target
 if local_demo:
@@ -89,10 +106,10 @@ if is_tuning:
     )
     tmp_log_file = tune_log + ".tmp"
 
-    measure_option = autotvm.measure_option(
-        builder=autotvm.LocalBuilder(build_func="default", timeout=15),  # 修改點2: 使用 LocalBuilder 而不是 ndk.create_shared
-        runner=autotvm.LocalRunner(number=10, repeat=1, timeout=4, min_repeat_ms=150)  # 修改點3: 使用 LocalRunner 進行本地調優
-    )
+    # Set to True to measure on a local tracker plus num_rpc_servers pinned RPC
+    # servers in parallel, instead of one LocalRunner
+    use_rpc_farm = False
+    num_rpc_servers = 4
 
     # measure_option = autotvm.measure_option(
     #     builder=autotvm.LocalBuilder(build_func=ndk.create_shared, timeout=15),
@@ -104,53 +121,99 @@ if is_tuning:
     #         timeout=600,
     #     ),
     # )
-    n_trial = 1024
-    early_stopping = False
-
-    from tvm.autotvm.tuner import XGBTuner
-
-    for i, tsk in enumerate(reversed(tasks[:3])):
-        print("Task:", tsk)
-        prefix = "[Task %2d/%2d] " % (i + 1, len(tasks))
-
-        tuner_obj = XGBTuner(tsk, loss_type="reg")
-
-        tsk_trial = min(n_trial, len(tsk.config_space))
-        tuner_obj.tune(
-            n_trial=tsk_trial,
-            early_stopping=early_stopping,
-            measure_option=measure_option,
-            callbacks=[
-                autotvm.callback.progress_bar(tsk_trial, prefix=prefix),
-                autotvm.callback.log_to_file(tmp_log_file),
-            ],
+    # The global budget is split across tasks by FLOPs times occurrence count;
+    # tasks below min_share are skipped and low-impact tasks stop early
+    total_trials = 3072
+    dry_run = False
+
+    # Every measured config of earlier sessions (and of similar models, e.g. the
+    # g2208 history) pre-trains the tuners, so search starts from a learned model
+    cost_model_history = tune_log + ".history"
+    transfer_logs = ["/workspace/gallopwave/tvm/example/g2208_*.json.history"]
+    history = load_autotvm_history([cost_model_history] + transfer_logs)
+    print(f"Cost model history: {len(history)} records")
+
+    plan = plan_budget(tasks, count_task_occurrences(mod, tasks, target, target_host), total_trials)
+    print_plan(plan)
+    if dry_run:
+        sys.exit(0)
+
+    # The farm starts only after a dry run has exited, and is always stopped again
+    # so the tracker does not keep its port for the next run
+    rpc_farm = None
+    if use_rpc_farm:
+        rpc_farm = RPCFarm(num_rpc_servers, key="x86_local").start()
+        measure_option = rpc_farm.autotvm_measure_option(number=10, repeat=1, timeout=4, min_repeat_ms=150)
+    else:
+        measure_option = autotvm.measure_option(
+            builder=autotvm.LocalBuilder(build_func="default", timeout=15),  # 修改點2: 使用 LocalBuilder 而不是 ndk.create_shared
+            runner=autotvm.LocalRunner(number=10, repeat=1, timeout=4, min_repeat_ms=150)  # 修改點3: 使用 LocalRunner 進行本地調優
         )
-    autotvm.record.pick_best(tmp_log_file, tune_log)
+
+    try:
+        tuned = [entry for entry in plan if entry["trials"] > 0]
+        for i, entry in enumerate(tuned):
+            tsk = entry["task"]
+            print("Task:", tsk)
+            prefix = "[Task %2d/%2d] " % (i + 1, len(tuned))
+
+            tuner_obj = make_warm_xgb_tuner(tsk, history, loss_type="reg", feature_type="curve")
+
+            tsk_trial = entry["trials"]
+            tuner_obj.tune(
+                n_trial=tsk_trial,
+                early_stopping=entry["early_stopping"],
+                measure_option=measure_option,
+                callbacks=[
+                    autotvm.callback.progress_bar(tsk_trial, prefix=prefix),
+                    autotvm.callback.log_to_file(tmp_log_file),
+                    autotvm_early_stop(window=200, min_gain=0.01),
+                ],
+            )
+    finally:
+        if rpc_farm is not None:
+            rpc_farm.stop()
+
+    # Keep the best record per workload from this run and from earlier runs
+    # (pick_best would overwrite the records of earlier runs)
+    log_inputs = [tmp_log_file] + ([tune_log] if os.path.exists(tune_log) else [])
+    print_stats(merge_logs(log_inputs, tune_log, top_k=1))
+    # The history keeps every config, for pre-training the next session
+    update_history([tmp_log_file], cost_model_history)
 
 # Compilation
+# Artifacts are cached by model, shape, target, pass config and tuning log hash,
+# so rerunning without changes skips relay.build entirely
+model_dir = "/workspace/gallopwave/tvm/example/"
+if not os.path.exists(model_dir):
+    os.makedirs(model_dir)
+
 print("Compiling the model...")
 if os.path.exists(tune_log):
     print(f"Using tuning log: {tune_log}")
-    with autotvm.apply_history_best(tune_log):
-        with tvm.transform.PassContext(opt_level=3):
-            lib = relay.build(mod, target=target, params=params)
 else:
     print("No tuning log found. Compiling without tuning...")
-    with tvm.transform.PassContext(opt_level=3):
-        lib = relay.build(mod, target=target, params=params)
-print("Compilation done...")
+lib, artifact_paths, cache_hit = build_cached(
+    onnx_model_path,
+    shape_dict,
+    {},
+    target=target,
+    opt_level=3,
+    tuning_log=tune_log if os.path.exists(tune_log) else None,
+    cache_dir=os.path.join(model_dir, "cache"),
+    relay_module=(mod, params),
+    extra=precision_cache_key(
+        precision, calibration_files, calculation_dtype=calculation_dtype, acc_dtype=acc_dtype
+    ),
+)
+print("Compilation done..." if not cache_hit else "Loaded from artifact cache...")
 
 # Save the compiled model
-model_dir = "/workspace/gallopwave/tvm/example/"
-if not os.path.exists(model_dir):
-    os.makedirs(model_dir)
-
-lib.export_library(os.path.join(model_dir, "compiled_model_x86.so"))
-with open(os.path.join(model_dir, "compiled_model_x86.json"), "w") as f:
-    f.write(lib.get_graph_json())
-param_bytes = tvm.runtime.save_param_dict(lib.get_params())
-with open(os.path.join(model_dir, "compiled_model_x86.params"), "wb") as f:
-    f.write(param_bytes)
+copy_artifacts(
+    artifact_paths,
+    os.path.join(model_dir, "compiled_model_x86.so"),
+    os.path.join(model_dir, "compiled_model_x86.json"),
+    os.path.join(model_dir, "compiled_model_x86.params"),
+)
 
 print(f"Model artifacts saved to {model_dir}")
-
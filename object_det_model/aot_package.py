@@ -0,0 +1,238 @@
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def build_aot(onnx_path, shape_dict, dtype_dict, out_path, target="llvm", opt_level=3, tuning_log=None):
+    """
+    Compile an ONNX model with the AOT executor into a single shared library.
+
+    The parameters are linked into the library as constant data
+    ("link-params"), so there is no graph JSON to parse and no params file to
+    read: the dynamic loader maps them from the read-only section of the .so
+    and pages them in on first use.
+
+    Parameters:
+        onnx_path (str): Path to the ONNX model.
+        shape_dict (dict): Input name to shape.
+        dtype_dict (dict): Input name to dtype.
+        out_path (str): Path of the exported shared library.
+        target (str): Compilation target.
+        opt_level (int): PassContext optimization level.
+        tuning_log (str): AutoTVM or auto-scheduler log to apply, or None.
+
+    Returns:
+        str: out_path.
+    """
+    import onnx
+    import tvm
+    from tvm import relay, autotvm, auto_scheduler
+    from tvm.relay.backend import Executor, Runtime
+    from artifact_cache import detect_tuning_kind
+
+    mod, params = relay.frontend.from_onnx(onnx.load(onnx_path), shape=shape_dict, dtype=dtype_dict)
+    executor = Executor("aot", {"interface-api": "packed", "unpacked-api": False, "link-params": True})
+
+    config = {}
+    with contextlib.ExitStack() as stack:
+        if tuning_log:
+            if detect_tuning_kind(tuning_log) == "auto_scheduler":
+                stack.enter_context(auto_scheduler.ApplyHistoryBest(tuning_log))
+                config["relay.backend.use_auto_scheduler"] = True
+            else:
+                stack.enter_context(autotvm.apply_history_best(tuning_log))
+        stack.enter_context(tvm.transform.PassContext(opt_level=opt_level, config=config))
+        lib = relay.build(mod, target=target, params=params, executor=executor, runtime=Runtime("cpp"))
+
+    lib.export_library(out_path)
+    return out_path
+
+
+def load_aot(lib_path, dev):
+    """
+    Load a single-file AOT artifact written by build_aot.
+
+    Parameters:
+        lib_path (str): Path to the shared library.
+        dev (tvm.device): TVM device where the model will run.
+
+    Returns:
+        tvm.runtime.executor.AotModule: The loaded module, with the same
+            set_input/run/get_output interface as a GraphModule.
+    """
+    from tvm import runtime
+    from tvm.runtime.executor import AotModule
+
+    lib = runtime.load_module(lib_path)
+    return AotModule(lib["default"](dev))
+
+
+def first_inference(mode, paths, input_name, input_shape, input_dtype, device, spawn_time):
+    """
+    Load a model and run it once; the body of the cold-start child process.
+
+    Parameters:
+        mode (str): "graph" (lib + graph JSON + params) or "aot" (single file).
+        paths (list): Artifact paths, [lib, graph, params] or [lib].
+        input_name (str): The name of the input tensor.
+        input_shape (tuple): Input shape.
+        input_dtype (str): Input dtype.
+        device (str): Device to run on, see benchmark.get_tvm_device.
+        spawn_time (float): time.time() in the parent right before the child was spawned.
+
+    Returns:
+        dict: Milliseconds since spawn when tvm was imported, the model was
+            loaded, and the first inference finished.
+    """
+    import tvm
+    from benchmark import get_tvm_device
+
+    imported = time.time()
+    dev = get_tvm_device(device)
+    if mode == "aot":
+        module = load_aot(paths[0], dev)
+    else:
+        from performance import load_model
+
+        module = load_model(paths[0], paths[1], paths[2], dev)
+    loaded = time.time()
+
+    input_data = np.random.randint(0, 256, size=input_shape, dtype=input_dtype)
+    module.set_input(input_name, tvm.nd.array(input_data, device=dev))
+    module.run()
+    module.get_output(0).numpy()
+    done = time.time()
+    return {
+        "import_ms": (imported - spawn_time) * 1000,
+        "load_ms": (loaded - imported) * 1000,
+        "first_run_ms": (done - loaded) * 1000,
+        "time_to_first_inference_ms": (done - spawn_time) * 1000,
+    }
+
+
+def measure_cold_start(mode, paths, input_shape, device="llvm", repeats=5, drop_caches=False):
+    """
+    Measure time-to-first-inference in fresh processes.
+
+    Parameters:
+        mode (str): "graph" or "aot".
+        paths (list): Artifact paths, see first_inference.
+        input_shape (tuple): Input shape.
+        device (str): Device to run on.
+        repeats (int): Number of processes to start.
+        drop_caches (bool): Drop the page cache before every start (needs root),
+            otherwise the numbers are for a warm page cache.
+
+    Returns:
+        list: One timing dict per process, see first_inference.
+    """
+    runs = []
+    for _ in range(repeats):
+        if drop_caches:
+            subprocess.run(["sync"], check=True)
+            with open("/proc/sys/vm/drop_caches", "w") as f:
+                f.write("3\n")
+        spawn_time = time.time()
+        output = subprocess.run(
+            [
+                sys.executable, os.path.abspath(__file__), "child",
+                "--mode", mode,
+                "--paths", *paths,
+                "--shape", *map(str, input_shape),
+                "--device", device,
+                "--spawn-time", repr(spawn_time),
+            ],
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        ).stdout
+        # The child prints the timings as its last line
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export an AOT single-file artifact and benchmark cold start.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Compile the ONNX model with the AOT executor")
+    export_parser.add_argument("--onnx", default="g2210_b_4.onnx", help="ONNX model")
+    export_parser.add_argument("--target", default="llvm", help="Compilation target")
+    export_parser.add_argument("--tuning-log", default=None, help="Tuning log to apply")
+    export_parser.add_argument("--output", default="g2210_b_4_aot.so", help="Path of the shared library")
+
+    bench_parser = subparsers.add_parser("bench", help="Compare time-to-first-inference of both formats")
+    bench_parser.add_argument("--aot", default="g2210_b_4_aot.so", help="AOT artifact")
+    bench_parser.add_argument(
+        "--graph",
+        nargs=3,
+        default=["g2210_b_4_lib_after.so", "g2210_b_4_graph_after.json", "g2210_b_4_param_after.params"],
+        metavar=("LIB", "GRAPH", "PARAMS"),
+        help="Graph executor artifacts",
+    )
+    bench_parser.add_argument("--device", default="llvm", help="Device to run on")
+    bench_parser.add_argument("--repeats", type=int, default=5, help="Processes started per format")
+    bench_parser.add_argument("--drop-caches", action="store_true", help="Drop the page cache before each start")
+    bench_parser.add_argument("--json", default="g2210_b_4_cold_start.json", help="Path of the JSON report")
+
+    child_parser = subparsers.add_parser("child")
+    child_parser.add_argument("--mode", choices=["graph", "aot"], required=True)
+    child_parser.add_argument("--paths", nargs="+", required=True)
+    child_parser.add_argument("--shape", nargs="+", type=int, required=True)
+    child_parser.add_argument("--device", default="llvm")
+    child_parser.add_argument("--spawn-time", type=float, required=True)
+    args = parser.parse_args()
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)
+    input_dtype = "uint8"
+
+    if args.command == "child":
+        timings = first_inference(
+            args.mode, args.paths, input_name, tuple(args.shape), input_dtype, args.device, args.spawn_time
+        )
+        print(json.dumps(timings))
+        return
+
+    if args.command == "export":
+        build_aot(
+            args.onnx, {input_name: input_shape}, {input_name: input_dtype}, args.output,
+            target=args.target, tuning_log=args.tuning_log,
+        )
+        print(f"AOT artifact written to {args.output} ({os.path.getsize(args.output) / 2 ** 20:.1f} MB)")
+        return
+
+    from benchmark import write_json_report
+
+    report = {}
+    for mode, paths in (("graph", args.graph), ("aot", [args.aot])):
+        runs = measure_cold_start(mode, paths, input_shape, args.device, args.repeats, args.drop_caches)
+        report[mode] = {
+            "runs": runs,
+            "median": {key: float(np.median([run[key] for run in runs])) for key in runs[0]},
+            "artifact_bytes": sum(os.path.getsize(path) for path in paths),
+        }
+
+    print("| Format | Import (ms) | Load (ms) | First run (ms) | Time to first inference (ms) |")
+    for mode, entry in report.items():
+        median = entry["median"]
+        print("| %-6s | %11.1f | %9.1f | %14.1f | %28.1f |" % (
+            mode, median["import_ms"], median["load_ms"], median["first_run_ms"],
+            median["time_to_first_inference_ms"],
+        ))
+    write_json_report(
+        args.json, report,
+        metadata={"device": args.device, "repeats": args.repeats, "drop_caches": args.drop_caches},
+    )
+    print(f"JSON report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
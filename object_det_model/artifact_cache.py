@@ -0,0 +1,235 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import tvm
+from tvm import relay, runtime, autotvm, auto_scheduler
+
+LIB_NAME = "lib.so"
+GRAPH_NAME = "graph.json"
+PARAMS_NAME = "params.params"
+META_NAME = "meta.json"
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """
+    Compute the SHA-256 digest of a file.
+
+    Parameters:
+        path (str): Path to the file.
+        chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def detect_tuning_kind(tuning_log):
+    """
+    Guess whether a tuning log was written by AutoTVM or the auto-scheduler.
+
+    Parameters:
+        tuning_log (str): Path to the tuning log.
+
+    Returns:
+        str: "autotvm" or "auto_scheduler".
+    """
+    with open(tuning_log, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                # AutoTVM records have an "input" field, auto-scheduler records use "i"
+                return "autotvm" if "input" in json.loads(line) else "auto_scheduler"
+    return "autotvm"
+
+
+def make_cache_key(onnx_path, shape_dict, dtype_dict, target, target_host=None,
+                   opt_level=3, config=None, tuning_log=None, extra=None):
+    """
+    Build the content-addressed key of a compiled artifact.
+
+    Parameters:
+        onnx_path (str): Path to the ONNX model.
+        shape_dict (dict): Input name to shape.
+        dtype_dict (dict): Input name to dtype.
+        target (str or tvm.target.Target): Compilation target.
+        target_host (str or tvm.target.Target): Host target, or None.
+        opt_level (int): PassContext optimization level.
+        config (dict): PassContext config.
+        tuning_log (str): Path to the tuning log applied during the build, or None.
+        extra (dict): Any other build option that changes the output.
+
+    Returns:
+        tuple: (hex key, dict of the fields that went into the key).
+    """
+    fields = {
+        "onnx_sha256": hash_file(onnx_path),
+        "shape": {name: list(shape) for name, shape in sorted(shape_dict.items())},
+        "dtype": dict(sorted((dtype_dict or {}).items())),
+        "target": str(target),
+        "target_host": str(target_host) if target_host is not None else None,
+        "opt_level": opt_level,
+        "config": config or {},
+        "tuning_log_sha256": hash_file(tuning_log) if tuning_log else None,
+        "extra": extra or {},
+        "tvm_version": tvm.__version__,
+    }
+    blob = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest(), fields
+
+
+def artifact_paths(artifact_dir):
+    """
+    Return the paths of the files stored in one cache entry.
+
+    Parameters:
+        artifact_dir (str): Directory of the cache entry.
+
+    Returns:
+        dict: Paths keyed by "lib", "graph", "params" and "meta".
+    """
+    return {
+        "lib": os.path.join(artifact_dir, LIB_NAME),
+        "graph": os.path.join(artifact_dir, GRAPH_NAME),
+        "params": os.path.join(artifact_dir, PARAMS_NAME),
+        "meta": os.path.join(artifact_dir, META_NAME),
+    }
+
+
+def export_artifacts(lib, artifact_dir, meta=None, export_kwargs=None):
+    """
+    Export a relay.build result as .so/.json/.params into a directory.
+
+    Parameters:
+        lib (GraphExecutorFactoryModule): Result of relay.build.
+        artifact_dir (str): Output directory, created if needed.
+        meta (dict): Extra information written to meta.json.
+        export_kwargs (dict): Extra arguments for export_library, e.g. a cross compiler.
+
+    Returns:
+        dict: Paths of the written files, see artifact_paths.
+    """
+    os.makedirs(artifact_dir, exist_ok=True)
+    paths = artifact_paths(artifact_dir)
+    lib.export_library(paths["lib"], **(export_kwargs or {}))
+    with open(paths["graph"], "w") as f:
+        f.write(lib.get_graph_json())
+    with open(paths["params"], "wb") as f:
+        f.write(runtime.save_param_dict(lib.get_params()))
+    with open(paths["meta"], "w") as f:
+        json.dump(meta or {}, f, indent=2, default=str)
+    return paths
+
+
+def copy_artifacts(paths, lib_path, graph_json_path, params_path):
+    """
+    Copy a cache entry to the file names expected by other scripts.
+
+    Parameters:
+        paths (dict): Paths of the cache entry, see artifact_paths.
+        lib_path (str): Destination of the shared library.
+        graph_json_path (str): Destination of the graph JSON.
+        params_path (str): Destination of the parameters.
+    """
+    shutil.copyfile(paths["lib"], lib_path)
+    shutil.copyfile(paths["graph"], graph_json_path)
+    shutil.copyfile(paths["params"], params_path)
+
+
+def build_cached(onnx_path, shape_dict, dtype_dict, target, target_host=None,
+                 opt_level=3, config=None, tuning_log=None, cache_dir="tvm_cache",
+                 relay_module=None, extra=None, export_kwargs=None, transform=None,
+                 disabled_pass=None, load=True):
+    """
+    Build an ONNX model with relay.build, or load it from the artifact cache.
+
+    On a cache hit the exported library is loaded directly and neither the
+    ONNX conversion nor the compilation runs. On a miss the model is
+    converted, compiled with the tuning log applied (if any), exported
+    into cache_dir/<key>/ and loaded from there, so both cases return the
+    same kind of module.
+
+    Parameters:
+        onnx_path (str): Path to the ONNX model.
+        shape_dict (dict): Input name to shape.
+        dtype_dict (dict): Input name to dtype.
+        target (str or tvm.target.Target): Compilation target.
+        target_host (str or tvm.target.Target): Host target, or None.
+        opt_level (int): PassContext optimization level.
+        config (dict): PassContext config.
+        tuning_log (str): AutoTVM or auto-scheduler log to apply, or None.
+        cache_dir (str): Root directory of the cache.
+        relay_module (tuple): Already converted (mod, params), to skip a second conversion on a miss.
+        extra (dict): Any other build option that changes the output, included in the key.
+        export_kwargs (dict): Extra arguments for export_library.
+        transform (callable): Applied as transform(mod, params) -> (mod, params) before building;
+            describe it in extra so that it is part of the key.
+        disabled_pass (list): Names of Relay passes to disable during the build.
+        load (bool): Load the exported library; pass False for artifacts this
+            host cannot load, e.g. cross-compiled ones.
+
+    Returns:
+        tuple: (loaded module with a "default" factory or None, dict of artifact paths, bool cache hit).
+    """
+    config = dict(config or {})
+    disabled_pass = sorted(disabled_pass or [])
+    if disabled_pass:
+        extra = dict(extra or {}, disabled_pass=disabled_pass)
+    key, fields = make_cache_key(
+        onnx_path, shape_dict, dtype_dict, target, target_host,
+        opt_level, config, tuning_log, extra
+    )
+    artifact_dir = os.path.join(cache_dir, key)
+    paths = artifact_paths(artifact_dir)
+
+    if os.path.exists(paths["meta"]):
+        print(f"Artifact cache hit: {artifact_dir}")
+        return runtime.load_module(paths["lib"]) if load else None, paths, True
+
+    print(f"Artifact cache miss, compiling into {artifact_dir}")
+    if relay_module is None:
+        import onnx
+
+        mod, params = relay.frontend.from_onnx(
+            onnx.load(onnx_path), shape=shape_dict, dtype=dtype_dict
+        )
+    else:
+        mod, params = relay_module
+    if transform is not None:
+        mod, params = transform(mod, params)
+
+    with contextlib.ExitStack() as stack:
+        if tuning_log:
+            if detect_tuning_kind(tuning_log) == "auto_scheduler":
+                stack.enter_context(auto_scheduler.ApplyHistoryBest(tuning_log))
+                config.setdefault("relay.backend.use_auto_scheduler", True)
+            else:
+                stack.enter_context(autotvm.apply_history_best(tuning_log))
+        stack.enter_context(tvm.transform.PassContext(
+            opt_level=opt_level, config=config, disabled_pass=disabled_pass
+        ))
+        lib = relay.build(mod, target=target, target_host=target_host, params=params)
+
+    # Export into a scratch directory first so that an interrupted export never
+    # leaves a half-written entry behind that would later count as a hit
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=key[:16] + ".", dir=cache_dir)
+    try:
+        export_artifacts(lib, tmp_dir, meta=fields, export_kwargs=export_kwargs)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    try:
+        os.rename(tmp_dir, artifact_dir)
+    except OSError:
+        # Another process finished the same entry first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return runtime.load_module(paths["lib"]) if load else None, paths, False
@@ -0,0 +1,382 @@
+import argparse
+import asyncio
+import collections
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from batching_server import GraphModuleBackend
+
+
+class OnnxRuntimeBackend:
+    """
+    Run full inputs on an onnxruntime session.
+
+    Parameters:
+        session (onnxruntime.InferenceSession): The ONNX runtime session.
+        input_name (str): The name of the input tensor in the ONNX model.
+    """
+
+    def __init__(self, session, input_name):
+        self.session = session
+        self.input_name = input_name
+
+    def __call__(self, input_data):
+        """
+        Run one inference.
+
+        Parameters:
+            input_data (numpy.ndarray): Model input.
+
+        Returns:
+            list: One numpy array per model output.
+        """
+        return self.session.run(None, {self.input_name: input_data})
+
+
+class AsyncModel:
+    """
+    Awaitable inference on one model, served by one worker thread per executor.
+
+    Blocking module.run() calls happen only on the worker threads, so the
+    event loop keeps serving I/O while inferences run. All workers take
+    requests from one shared queue, so a free executor picks up the next
+    request. At most max_pending requests are queued or running; further
+    infer() calls wait for a slot, which propagates backpressure to the
+    callers. Cancelling an infer() call before a worker picks the request up
+    makes the worker skip it; once running, its result is dropped. Either
+    way the slot is only freed when a worker is done with the request, so
+    cancelled requests still in the queue count towards max_pending.
+
+    Parameters:
+        name (str): Model name used in metrics.
+        backends (list): One callable per executor, each taking the model input and
+            returning a list of outputs, e.g. GraphModuleBackend or OnnxRuntimeBackend.
+        max_pending (int): Maximum number of queued plus running requests.
+        metrics_window (int): Number of recent requests kept for latency percentiles.
+    """
+
+    def __init__(self, name, backends, max_pending=16, metrics_window=1000):
+        self.name = name
+        self.max_pending = max_pending
+        self.requests = queue.Queue()
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "max_depth": 0}
+        self.depth = 0
+        self.queue_wait_ms = collections.deque(maxlen=metrics_window)
+        self.latency_ms = collections.deque(maxlen=metrics_window)
+        self._lock = threading.Lock()
+        self._slots = None
+        self._closed = False
+        self._threads = []
+        for i, backend in enumerate(backends):
+            thread = threading.Thread(target=self._serve, args=(backend,), name=f"AsyncModel-{name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    @classmethod
+    def from_exported(cls, name, lib_path, graph_json_path, params_path, dev,
+                      input_name, input_shape, input_dtype, num_executors=1, **kwargs):
+        """
+        Serve an exported TVM model with executors that share one parameter copy.
+
+        Parameters:
+            name (str): Model name.
+            lib_path (str): Path to the compiled shared library (.so file).
+            graph_json_path (str): Path to the graph JSON file.
+            params_path (str): Path to the parameters file.
+            dev (tvm.device): TVM device where the model runs.
+            input_name (str): The name of the input tensor.
+            input_shape (tuple): Input shape.
+            input_dtype (str): Input dtype.
+            num_executors (int): Number of executors and worker threads.
+            **kwargs: max_pending and metrics_window, see AsyncModel.
+
+        Returns:
+            AsyncModel: The started model.
+        """
+        from performance import load_executors
+
+        executors = load_executors(lib_path, graph_json_path, params_path, dev, num_executors)
+        backends = [GraphModuleBackend(module, input_name, input_shape, input_dtype, dev) for module in executors]
+        return cls(name, backends, **kwargs)
+
+    @classmethod
+    def from_onnx(cls, name, onnx_path, input_name, device="cpu", num_sessions=1, **kwargs):
+        """
+        Serve an ONNX model with onnxruntime.
+
+        Parameters:
+            name (str): Model name.
+            onnx_path (str): Path to the ONNX model file.
+            input_name (str): The name of the input tensor in the ONNX model.
+            device (str): Device to run on, e.g. "cuda" or "cpu".
+            num_sessions (int): Number of sessions and worker threads.
+            **kwargs: max_pending and metrics_window, see AsyncModel.
+
+        Returns:
+            AsyncModel: The started model.
+        """
+        from onnx_performance import load_onnx_model
+
+        backends = [OnnxRuntimeBackend(load_onnx_model(onnx_path, device), input_name) for _ in range(num_sessions)]
+        return cls(name, backends, **kwargs)
+
+    async def infer(self, input_data, timeout=None):
+        """
+        Run inference without blocking the event loop.
+
+        Parameters:
+            input_data (numpy.ndarray): Model input.
+            timeout (float): Seconds to wait for a slot and the result, or None.
+
+        Returns:
+            list: One numpy array per model output.
+        """
+        if timeout is not None:
+            return await asyncio.wait_for(self.infer(input_data), timeout)
+        if self._closed:
+            raise RuntimeError(f"Model {self.name!r} is closed")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        await self._slots.acquire()
+        # The worker frees the slot once it is done with the request, even a cancelled one
+        release_slot = functools.partial(asyncio.get_running_loop().call_soon_threadsafe, self._slots.release)
+        future = Future()
+        with self._lock:
+            self.depth += 1
+            self.counters["submitted"] += 1
+            self.counters["max_depth"] = max(self.counters["max_depth"], self.depth)
+        self.requests.put((input_data, future, time.perf_counter(), release_slot))
+        try:
+            # Cancelling the wrapper cancels the concurrent future as well
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            with self._lock:
+                self.counters["cancelled"] += 1
+            raise
+
+    def _serve(self, backend):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                break
+            input_data, future, enqueued, release_slot = item
+            if not future.set_running_or_notify_cancel():
+                with self._lock:
+                    self.depth -= 1
+                self._release(release_slot)
+                continue
+            started = time.perf_counter()
+            try:
+                outputs, error = backend(input_data), None
+            except Exception as err:  # pylint: disable=broad-except
+                outputs, error = None, err
+            finished = time.perf_counter()
+            # Account before resolving, so the slot a waiting caller gets is already free
+            with self._lock:
+                self.depth -= 1
+                if error is None:
+                    self.counters["completed"] += 1
+                    self.queue_wait_ms.append((started - enqueued) * 1000)
+                    self.latency_ms.append((finished - enqueued) * 1000)
+                else:
+                    self.counters["failed"] += 1
+            self._release(release_slot)
+            if error is None:
+                future.set_result(outputs)
+            else:
+                future.set_exception(error)
+
+    @staticmethod
+    def _release(release_slot):
+        try:
+            release_slot()
+        except RuntimeError:
+            # The event loop is already closed; nobody waits for the slot
+            pass
+
+    def metrics(self):
+        """
+        Snapshot of queue depth, counters and recent latencies.
+
+        Returns:
+            dict: Current depth, counters, and p50/p99 of queue wait and total
+                latency (enqueue to result) in milliseconds over the recent window.
+        """
+        with self._lock:
+            snapshot = dict(self.counters, depth=self.depth, executors=len(self._threads))
+            waits = np.array(self.queue_wait_ms)
+            latencies = np.array(self.latency_ms)
+        for key, values in (("queue_wait", waits), ("latency", latencies)):
+            if len(values):
+                snapshot[f"{key}_p50_ms"] = float(np.percentile(values, 50))
+                snapshot[f"{key}_p99_ms"] = float(np.percentile(values, 99))
+        return snapshot
+
+    def close(self):
+        """
+        Stop the worker threads once the queued requests are served.
+        """
+        self._closed = True
+        for _ in self._threads:
+            self.requests.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    async def aclose(self):
+        """
+        Close the model from a coroutine without blocking the event loop.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+class ModelServer:
+    """
+    Several AsyncModels served side by side, e.g. a detector and a classifier.
+
+    Every model has its own executors, worker threads and backpressure, so a
+    burst on one model does not queue behind the other.
+    """
+
+    def __init__(self):
+        self.models = {}
+
+    def add(self, model):
+        """
+        Register a model under its name.
+
+        Parameters:
+            model (AsyncModel): The model.
+
+        Returns:
+            AsyncModel: The model.
+        """
+        if model.name in self.models:
+            raise ValueError(f"A model named {model.name!r} is already registered")
+        self.models[model.name] = model
+        return model
+
+    def __getitem__(self, name):
+        return self.models[name]
+
+    async def infer(self, name, input_data, timeout=None):
+        """
+        Run inference on a registered model.
+
+        Parameters:
+            name (str): Model name.
+            input_data (numpy.ndarray): Model input.
+            timeout (float): Seconds to wait, or None.
+
+        Returns:
+            list: One numpy array per model output.
+        """
+        return await self.models[name].infer(input_data, timeout)
+
+    def metrics(self):
+        """
+        Metrics of every registered model.
+
+        Returns:
+            dict: Model name to AsyncModel.metrics().
+        """
+        return {name: model.metrics() for name, model in self.models.items()}
+
+    async def aclose(self):
+        """
+        Close all models.
+        """
+        await asyncio.gather(*(model.aclose() for model in self.models.values()))
+
+
+async def run_demo(server, inputs, num_requests, concurrency):
+    """
+    Send concurrent requests to every model while the event loop keeps ticking.
+
+    Parameters:
+        server (ModelServer): Server with the models to exercise.
+        inputs (dict): Model name to an input array.
+        num_requests (int): Requests per model.
+        concurrency (int): Concurrent client coroutines per model.
+
+    Returns:
+        float: Largest event loop stall observed, in milliseconds.
+    """
+    stall_ms = 0.0
+    done = asyncio.Event()
+
+    async def heartbeat():
+        nonlocal stall_ms
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stall_ms = max(stall_ms, (time.perf_counter() - start) * 1000 - 1)
+
+    async def client(name, count):
+        for _ in range(count):
+            await server.infer(name, inputs[name])
+
+    # The first clients send one more request when concurrency does not divide num_requests
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.gather(*(
+        client(name, num_requests // concurrency + (i < num_requests % concurrency))
+        for name in inputs
+        for i in range(concurrency)
+    ))
+    done.set()
+    await beat
+    return stall_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve TVM and onnxruntime models from an asyncio event loop.")
+    parser.add_argument("--device", default="llvm", help="TVM device, e.g. llvm or cuda")
+    parser.add_argument("--executors", type=int, default=2, help="TVM executors (worker threads)")
+    parser.add_argument("--onnx", default=None, help="Also serve this ONNX model with onnxruntime")
+    parser.add_argument("--ort-device", default="cpu", help="onnxruntime device")
+    parser.add_argument("--num-requests", type=int, default=64, help="Requests per model")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients per model")
+    args = parser.parse_args()
+
+    from benchmark import get_tvm_device
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)
+    input_dtype = "uint8"
+    input_data = np.random.randint(0, 256, size=input_shape, dtype=input_dtype)
+
+    server = ModelServer()
+    server.add(AsyncModel.from_exported(
+        "detector", "g2210_b_4_lib_after.so", "g2210_b_4_graph_after.json", "g2210_b_4_param_after.params",
+        get_tvm_device(args.device), input_name, input_shape, input_dtype, num_executors=args.executors,
+    ))
+    inputs = {"detector": input_data}
+    if args.onnx:
+        server.add(AsyncModel.from_onnx("onnx", args.onnx, input_name, args.ort_device))
+        inputs["onnx"] = input_data
+
+    async def serve():
+        try:
+            return await run_demo(server, inputs, args.num_requests, args.concurrency)
+        finally:
+            await server.aclose()
+
+    stall_ms = asyncio.run(serve())
+    for name, metrics in server.metrics().items():
+        if "latency_p50_ms" not in metrics:
+            print(f"[{name}] {metrics['completed']} completed, {metrics['failed']} failed")
+            continue
+        print(f"[{name}] {metrics['completed']} completed, max queue depth {metrics['max_depth']}, "
+              f"latency p50 {metrics['latency_p50_ms']:.2f} ms / p99 {metrics['latency_p99_ms']:.2f} ms, "
+              f"queue wait p99 {metrics['queue_wait_p99_ms']:.2f} ms")
+    print(f"Longest event loop stall: {stall_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
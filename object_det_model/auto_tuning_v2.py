@@ -3,10 +3,21 @@ from tvm import relay, auto_scheduler
 from tvm.contrib import graph_executor
 import numpy as np
 import onnx
+import os
 import time
 
+from artifact_cache import build_cached, copy_artifacts
+from tuning_resume import resume_tune
+from log_tools import merge_logs, print_stats
+from rpc_farm import RPCFarm
+from tuning_telemetry import make_auto_scheduler_early_stop
+from cost_model import make_warm_search_policies, make_warm_xgb_model, update_history
+from benchmark import summarize_latencies
+from results_store import record_run
+
 # Step 1: Load your ONNX model
-onnx_model = onnx.load('g2210_b_4.onnx')
+onnx_model_path = 'g2210_b_4.onnx'
+onnx_model = onnx.load(onnx_model_path)
 
 # Step 2: Prepare input data, shape, and data types
 input_name = 'input'
@@ -30,22 +41,27 @@ mod, params = relay.frontend.from_onnx(
 # Step 4: Define the compilation target
 target = tvm.target.Target("cuda")
 
+# Every before/after measurement is appended here; gate with `python results_store.py compare`
+results_store = 'benchmark_results.jsonl'
+
 # Step 5: Compile and export the model before tuning
 print("Compiling without tuning...")
-with tvm.transform.PassContext(opt_level=3):
-    lib_before = relay.build(
-        mod,
-        target=target,
-        params=params
-    )
+lib_before, paths_before, _ = build_cached(
+    onnx_model_path,
+    shape_dict,
+    dtype_dict,
+    target=target,
+    opt_level=3,
+    relay_module=(mod, params)
+)
 
 # Export the un-tuned model
-lib_before.export_library("g2210_b_4_lib_before.so")
-with open("g2210_b_4_graph_before.json", "w") as f:
-    f.write(lib_before.get_graph_json())
-with open("g2210_b_4_param_before.params", "wb") as f:
-    param_bytes = tvm.runtime.save_param_dict(lib_before.get_params())
-    f.write(param_bytes)
+copy_artifacts(
+    paths_before,
+    "g2210_b_4_lib_before.so",
+    "g2210_b_4_graph_before.json",
+    "g2210_b_4_param_before.params"
+)
 
 # Measure performance before tuning
 dev = tvm.cuda(0)
@@ -57,10 +73,19 @@ module_before.run()
 
 # Time the execution
 print("Measuring performance before tuning...")
-ftimer = module_before.module.time_evaluator("run", dev, number=10, repeat=3)
+# Enough repeats for results_store to compare runs statistically
+ftimer = module_before.module.time_evaluator("run", dev, number=10, repeat=30)
 timing_result = ftimer().results
 mean_time_before = np.mean(timing_result) * 1000  # Convert to milliseconds
 print(f"Mean inference time (before tuning): {mean_time_before:.2f} ms")
+record_run(
+    results_store,
+    "g2210_b_4/before/time_evaluator",
+    summarize_latencies(np.array(timing_result) * 1000, batch_size=input_shape[0], keep_samples=True),
+    model_path=onnx_model_path,
+    target=target,
+    tuning_log=None,
+)
 
 # Step 6: Perform AutoScheduler tuning
 print("Starting AutoScheduler tuning...")
@@ -68,37 +93,109 @@ print("Starting AutoScheduler tuning...")
 # Define the tuning tasks
 tasks, task_weights = auto_scheduler.extract_tasks(mod["main"], params, target)
 
-# Define the tuning options
-tuning_option = auto_scheduler.TuningOptions(
-    num_measure_trials=3000,  # You can adjust this number based on time constraints
-    early_stopping=1500,  # Stop if no improvement after 3000 trials
-    runner=auto_scheduler.LocalRunner(repeat=5, min_repeat_ms=200, timeout=20),
-    measure_callbacks=[auto_scheduler.RecordToFile('autoscheduler_tuning_log.json')],
-    verbose=2,
+tuning_log = 'autoscheduler_tuning_log.json'
+total_trials = 3000  # You can adjust this number based on time constraints
+# Set to True to measure on a local tracker plus num_rpc_servers pinned RPC servers in parallel
+use_rpc_farm = False
+num_rpc_servers = 4
+
+# Set to True to continue from the records already in the tuning log instead
+# of starting over; only the trials not yet spent are run
+resume = True
+# Tasks whose best recorded latency is at or below this value (ms) are not tuned again
+target_task_latency_ms = None
+
+# Retire a task once its best latency improved by less than 0.5% over its last 256 trials;
+# follow the curves with `python tuning_telemetry.py autoscheduler_tuning_log.json --watch 60`
+early_stop = make_auto_scheduler_early_stop(window=256, min_gain=0.005)
+
+# Warm-start the learned cost model from all earlier sessions and from logs of
+# similar models, instead of learning from scratch every run; the history keeps
+# every measured config and grows with each session. Only records of workloads
+# extracted above are used, so a similar model contributes its shared layers
+cost_model_history = 'autoscheduler_cost_model_history.json'
+transfer_logs = ['g2208_*autoscheduler_tuning_log*.json']
+if os.path.exists(tuning_log):
+    update_history([tuning_log], cost_model_history)
+cost_model = make_warm_xgb_model(
+    [cost_model_history] + transfer_logs,
+    model_file='autoscheduler_cost_model.xgb',
+    num_warmup_sample=len(tasks) * 64,
+    tasks=tasks,
 )
 
-# Create a task scheduler and tune
-task_scheduler = auto_scheduler.TaskScheduler(tasks, task_weights)
-task_scheduler.tune(tuning_option)
+rpc_farm = None
+if use_rpc_farm:
+    rpc_farm = RPCFarm(num_rpc_servers, key="local").start()
+    builder = rpc_farm.auto_scheduler_builder(timeout=15)
+    runner = rpc_farm.auto_scheduler_runner(repeat=5, min_repeat_ms=200, timeout=20)
+else:
+    builder = "local"
+    runner = auto_scheduler.LocalRunner(repeat=5, min_repeat_ms=200, timeout=20)
+
+# Stop the tracker and servers even when tuning fails, so the ports are free for the next run
+try:
+    if resume:
+        resume_tune(
+            tasks,
+            task_weights,
+            tuning_log,
+            total_trials,
+            runner,
+            target_latency_ms=target_task_latency_ms,
+            early_stopping=1500,
+            verbose=2,
+            measure_callbacks=[early_stop],
+            cost_model=cost_model,
+            builder=builder,
+        )
+    else:
+        # Define the tuning options
+        tuning_option = auto_scheduler.TuningOptions(
+            num_measure_trials=total_trials,
+            early_stopping=1500,  # Stop if no improvement after 1500 trials
+            builder=builder,
+            runner=runner,
+            measure_callbacks=[auto_scheduler.RecordToFile(tuning_log), early_stop],
+            verbose=2,
+        )
+
+        # Create a task scheduler and tune
+        task_scheduler = auto_scheduler.TaskScheduler(tasks, task_weights)
+        early_stop.bind(task_scheduler)
+        task_scheduler.tune(tuning_option, search_policy=make_warm_search_policies(tasks, cost_model, verbose=2))
+finally:
+    if rpc_farm is not None:
+        rpc_farm.stop()
+
+update_history([tuning_log], cost_model_history)
 
 # Step 7: Compile and export the model after tuning
+# The full log is kept for resuming; compilation only needs the best record per workload
+best_log = 'autoscheduler_tuning_log.best.json'
+print_stats(merge_logs([tuning_log], best_log, top_k=1))
+
 print("Compiling with tuning...")
 
-with auto_scheduler.ApplyHistoryBest('autoscheduler_tuning_log.json'):
-    with tvm.transform.PassContext(opt_level=3, config={"relay.backend.use_auto_scheduler": True}):
-        lib_after = relay.build(
-            mod,
-            target=target,
-            params=params
-        )
+# The tuning log hash is part of the cache key, so new records always trigger a rebuild
+lib_after, paths_after, _ = build_cached(
+    onnx_model_path,
+    shape_dict,
+    dtype_dict,
+    target=target,
+    opt_level=3,
+    config={"relay.backend.use_auto_scheduler": True},
+    tuning_log=best_log,
+    relay_module=(mod, params)
+)
 
 # Export the tuned model
-lib_after.export_library("g2210_b_4_lib_after.so")
-with open("g2210_b_4_graph_after.json", "w") as f:
-    f.write(lib_after.get_graph_json())
-with open("g2210_b_4_param_after.params", "wb") as f:
-    param_bytes = tvm.runtime.save_param_dict(lib_after.get_params())
-    f.write(param_bytes)
+copy_artifacts(
+    paths_after,
+    "g2210_b_4_lib_after.so",
+    "g2210_b_4_graph_after.json",
+    "g2210_b_4_param_after.params"
+)
 
 # Measure performance after tuning
 module_after = graph_executor.GraphModule(lib_after["default"](dev))
@@ -109,10 +206,19 @@ module_after.run()
 
 # Time the execution
 print("Measuring performance after tuning...")
-ftimer = module_after.module.time_evaluator("run", dev, number=10, repeat=3)
+# Enough repeats for results_store to compare runs statistically
+ftimer = module_after.module.time_evaluator("run", dev, number=10, repeat=30)
 timing_result = ftimer().results
 mean_time_after = np.mean(timing_result) * 1000  # Convert to milliseconds
 print(f"Mean inference time (after tuning): {mean_time_after:.2f} ms")
+record_run(
+    results_store,
+    "g2210_b_4/after/time_evaluator",
+    summarize_latencies(np.array(timing_result) * 1000, batch_size=input_shape[0], keep_samples=True),
+    model_path=onnx_model_path,
+    target=target,
+    tuning_log=best_log,
+)
 
 # Step 8: Compare the performance
 print(f"Performance improvement: {((mean_time_before - mean_time_after) / mean_time_before) * 100:.2f}%")
@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+
+
+def build_family(onnx_path, input_name, sample_shape, input_dtype, batch_sizes, target,
+                 family_dir, target_host=None, tuning_log=None, cache_dir="tvm_cache"):
+    """
+    Compile one module per batch size and describe them in a manifest.
+
+    Each variant goes through the artifact cache and is then copied into
+    family_dir/b<batch>/ as lib.so, graph.json and params.params.
+
+    Parameters:
+        onnx_path (str): Path to the ONNX model; its batch axis must be overridable.
+        input_name (str): The name of the input tensor.
+        sample_shape (tuple): Shape of one sample, without the batch axis.
+        input_dtype (str): Input dtype.
+        batch_sizes (list): Batch sizes to compile, e.g. [1, 2, 4, 8].
+        target (str): Compilation target.
+        family_dir (str): Output directory of the family.
+        target_host (str): Host target, or None.
+        tuning_log (str): Tuning log to apply, or None.
+        cache_dir (str): Root directory of the artifact cache.
+
+    Returns:
+        dict: The written manifest.
+    """
+    from artifact_cache import build_cached, copy_artifacts
+
+    os.makedirs(family_dir, exist_ok=True)
+    manifest = {
+        "onnx": os.path.basename(onnx_path),
+        "input_name": input_name,
+        "input_dtype": input_dtype,
+        "sample_shape": list(sample_shape),
+        "target": str(target),
+        "variants": [],
+    }
+    for batch_size in sorted(set(batch_sizes)):
+        print(f"Building batch size {batch_size}...")
+        shape = (batch_size,) + tuple(sample_shape)
+        _, paths, _ = build_cached(
+            onnx_path,
+            {input_name: shape},
+            {input_name: input_dtype},
+            target=target,
+            target_host=target_host,
+            opt_level=3,
+            tuning_log=tuning_log,
+            cache_dir=cache_dir,
+            load=False,
+        )
+        variant_dir = "b%d" % batch_size
+        os.makedirs(os.path.join(family_dir, variant_dir), exist_ok=True)
+        variant = {
+            "batch_size": batch_size,
+            "lib": os.path.join(variant_dir, "lib.so"),
+            "graph": os.path.join(variant_dir, "graph.json"),
+            "params": os.path.join(variant_dir, "params.params"),
+        }
+        copy_artifacts(
+            paths,
+            os.path.join(family_dir, variant["lib"]),
+            os.path.join(family_dir, variant["graph"]),
+            os.path.join(family_dir, variant["params"]),
+        )
+        manifest["variants"].append(variant)
+
+    with open(os.path.join(family_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class BatchFamily:
+    """
+    Run arbitrary batch sizes on the smallest compiled variant that fits.
+
+    Modules are loaded on first use. A batch larger than the largest variant
+    is split into chunks of the largest variant. The number of zero rows the
+    last call padded its chunks with is kept in last_padded.
+
+    Parameters:
+        family_dir (str): Directory written by build_family.
+        dev (tvm.device): TVM device where the model runs.
+    """
+
+    # Lets DynamicBatcher hand over partial batches instead of padding them
+    variable_batch = True
+
+    def __init__(self, family_dir, dev):
+        with open(os.path.join(family_dir, MANIFEST_NAME), "r") as f:
+            self.manifest = json.load(f)
+        self.family_dir = family_dir
+        self.dev = dev
+        self.input_name = self.manifest["input_name"]
+        self.input_dtype = self.manifest["input_dtype"]
+        self.sample_shape = tuple(self.manifest["sample_shape"])
+        self.variants = sorted(self.manifest["variants"], key=lambda v: v["batch_size"])
+        self.batch_sizes = [v["batch_size"] for v in self.variants]
+        self.max_batch_size = self.batch_sizes[-1]
+        self.last_padded = 0
+        self._modules = {}
+
+    def select(self, n):
+        """
+        Pick the smallest compiled batch size that holds n samples.
+
+        Parameters:
+            n (int): Number of samples.
+
+        Returns:
+            int: Batch size of the chosen variant.
+        """
+        for batch_size in self.batch_sizes:
+            if batch_size >= n:
+                return batch_size
+        return self.max_batch_size
+
+    def module(self, batch_size):
+        """
+        Return the executor and input buffer of one variant, loading it if needed.
+
+        Parameters:
+            batch_size (int): Batch size of the variant.
+
+        Returns:
+            tuple: (graph_executor.GraphModule, tvm.nd.NDArray input buffer).
+        """
+        if batch_size not in self._modules:
+            import tvm
+            from performance import load_model
+
+            variant = self.variants[self.batch_sizes.index(batch_size)]
+            module = load_model(
+                os.path.join(self.family_dir, variant["lib"]),
+                os.path.join(self.family_dir, variant["graph"]),
+                os.path.join(self.family_dir, variant["params"]),
+                self.dev,
+            )
+            input_nd = tvm.nd.empty((batch_size,) + self.sample_shape, self.input_dtype, self.dev)
+            self._modules[batch_size] = (module, input_nd)
+        return self._modules[batch_size]
+
+    def load_all(self):
+        """
+        Load every variant up front, so no request pays the load time.
+        """
+        for batch_size in self.batch_sizes:
+            self.module(batch_size)
+
+    def _run_chunk(self, chunk):
+        n = chunk.shape[0]
+        batch_size = self.select(n)
+        module, input_nd = self.module(batch_size)
+        if n < batch_size:
+            self.last_padded += batch_size - n
+            padded = np.zeros((batch_size,) + self.sample_shape, dtype=self.input_dtype)
+            padded[:n] = chunk
+            chunk = padded
+        input_nd.copyfrom(np.ascontiguousarray(chunk))
+        module.set_input(self.input_name, input_nd)
+        module.run()
+        return [module.get_output(i).numpy()[:n] for i in range(module.get_num_outputs())]
+
+    def __call__(self, batch):
+        """
+        Run a batch of any size.
+
+        Parameters:
+            batch (numpy.ndarray): Input with the batch axis first.
+
+        Returns:
+            list: One numpy array per model output, with batch.shape[0] rows.
+        """
+        self.last_padded = 0
+        chunks = [
+            self._run_chunk(batch[start:start + self.max_batch_size])
+            for start in range(0, batch.shape[0], self.max_batch_size)
+        ]
+        if len(chunks) == 1:
+            return chunks[0]
+        return [np.concatenate(parts) for parts in zip(*chunks)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and benchmark a multi-batch-size artifact family.")
+    parser.add_argument("--onnx", default="g2210_b_4.onnx", help="ONNX model")
+    parser.add_argument("--family-dir", default="g2210_family", help="Output directory")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8], help="Batch sizes to compile")
+    parser.add_argument("--target", default="llvm", help="Compilation target")
+    parser.add_argument("--device", default="llvm", help="Device to benchmark on")
+    parser.add_argument("--tuning-log", default=None, help="Tuning log to apply")
+    parser.add_argument("--num-runs", type=int, default=100, help="Number of timed runs per batch size")
+    args = parser.parse_args()
+
+    from benchmark import get_tvm_device, measure_latencies, print_summary, summarize_latencies
+
+    # Configuration
+    input_name = "input"
+    sample_shape = (3, 640, 640)
+    input_dtype = "uint8"
+
+    build_family(
+        args.onnx, input_name, sample_shape, input_dtype, args.batch_sizes,
+        args.target, args.family_dir, tuning_log=args.tuning_log
+    )
+    print(f"Family written to {args.family_dir}\n")
+
+    family = BatchFamily(args.family_dir, get_tvm_device(args.device))
+    family.load_all()
+    for n in range(1, family.max_batch_size + 1):
+        batch = np.random.randint(0, 256, size=(n,) + sample_shape, dtype=input_dtype)
+        warmup_ms, latencies_ms = measure_latencies(lambda: family(batch), args.num_runs, 5)
+        print_summary(f"{n} samples -> batch {family.select(n)}", summarize_latencies(latencies_ms, warmup_ms, n))
+
+
+if __name__ == "__main__":
+    main()
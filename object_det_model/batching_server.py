@@ -0,0 +1,262 @@
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class GraphModuleBackend:
+    """
+    Run fixed-shape batches on a graph_executor.GraphModule.
+
+    Parameters:
+        module (graph_executor.GraphModule): Module compiled for input_shape.
+        input_name (str): The name of the input tensor.
+        input_shape (tuple): Compiled input shape; the first axis is the batch size.
+        input_dtype (str): Input dtype.
+        dev (tvm.device): TVM device where the model runs.
+    """
+
+    def __init__(self, module, input_name, input_shape, input_dtype, dev):
+        self.module = module
+        self.input_name = input_name
+        self.batch_size = input_shape[0]
+        self.sample_shape = tuple(input_shape[1:])
+        self.input_dtype = input_dtype
+        self.dev = dev
+        # The executor's own input tensor, so each batch is copied to the device once
+        self.input_nd = module.get_input(input_name)
+
+    def __call__(self, batch):
+        """
+        Run one full batch.
+
+        Parameters:
+            batch (numpy.ndarray): Input of the compiled batch size.
+
+        Returns:
+            list: One numpy array per model output, batch axis first.
+        """
+        self.input_nd.copyfrom(batch)
+        self.module.run()
+        return [self.module.get_output(i).numpy() for i in range(self.module.get_num_outputs())]
+
+
+class DynamicBatcher:
+    """
+    Coalesce single-sample requests into batches for a fixed-batch model.
+
+    Requests are queued by submit(). A worker thread takes the first pending
+    request, then waits at most max_wait_ms for more until the batch is full,
+    pads the rest of the batch with zeros, runs it and resolves every
+    request's future with its own slice of each output.
+
+    Parameters:
+        backend (callable): Runs a full batch and returns a list of outputs, e.g. GraphModuleBackend.
+            Backends with a true variable_batch attribute receive only the filled rows
+            and report their own padding in a last_padded attribute.
+        batch_size (int): Compiled batch size of the backend.
+        sample_shape (tuple): Shape of one sample, without the batch axis.
+        dtype (str): Input dtype.
+        max_wait_ms (float): Longest time the first request of a batch waits for more.
+        max_queue (int): Maximum number of queued requests, 0 for unbounded.
+    """
+
+    def __init__(self, backend, batch_size, sample_shape, dtype, max_wait_ms=5.0, max_queue=0):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.sample_shape = tuple(sample_shape)
+        self.dtype = dtype
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue(maxsize=max_queue)
+        self.batch_buffer = np.zeros((batch_size,) + self.sample_shape, dtype=dtype)
+        self.stats = {"batches": 0, "requests": 0, "padded_slots": 0}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="DynamicBatcher", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_graph_module(cls, module, input_name, input_shape, input_dtype, dev, **kwargs):
+        """
+        Create a batcher around a compiled graph executor module.
+
+        Parameters:
+            module (graph_executor.GraphModule): Module compiled for input_shape.
+            input_name (str): The name of the input tensor.
+            input_shape (tuple): Compiled input shape; the first axis is the batch size.
+            input_dtype (str): Input dtype.
+            dev (tvm.device): TVM device where the model runs.
+            **kwargs: max_wait_ms and max_queue, see DynamicBatcher.
+
+        Returns:
+            DynamicBatcher: The started batcher.
+        """
+        backend = GraphModuleBackend(module, input_name, input_shape, input_dtype, dev)
+        return cls(backend, backend.batch_size, backend.sample_shape, input_dtype, **kwargs)
+
+    @classmethod
+    def from_family(cls, family, **kwargs):
+        """
+        Create a batcher around a multi-batch-size artifact family.
+
+        Batches are collected up to the largest compiled batch size and run
+        on the smallest variant that fits, instead of being padded.
+
+        Parameters:
+            family (batch_family.BatchFamily): The loaded family.
+            **kwargs: max_wait_ms and max_queue, see DynamicBatcher.
+
+        Returns:
+            DynamicBatcher: The started batcher.
+        """
+        return cls(family, family.max_batch_size, family.sample_shape, family.input_dtype, **kwargs)
+
+    def submit(self, sample):
+        """
+        Queue one sample for inference.
+
+        Parameters:
+            sample (numpy.ndarray): One input sample, without the batch axis.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the list of outputs for this sample.
+        """
+        if self._stop.is_set():
+            raise RuntimeError("DynamicBatcher is closed")
+        if sample.shape != self.sample_shape:
+            raise ValueError(f"Expected a sample of shape {self.sample_shape}, got {sample.shape}")
+        future = Future()
+        self.requests.put((sample, future))
+        return future
+
+    def infer(self, sample, timeout=None):
+        """
+        Run inference on one sample and wait for the result.
+
+        Parameters:
+            sample (numpy.ndarray): One input sample, without the batch axis.
+            timeout (float): Seconds to wait for the result, or None.
+
+        Returns:
+            list: One numpy array per model output for this sample.
+        """
+        return self.submit(sample).result(timeout)
+
+    def close(self):
+        """
+        Stop the worker thread once the queued requests are served.
+        """
+        self._stop.set()
+        self._thread.join()
+
+    def _collect(self):
+        try:
+            first = self.requests.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _serve(self):
+        while not (self._stop.is_set() and self.requests.empty()):
+            batch = self._collect()
+            if not batch:
+                continue
+            batch = [(sample, future) for sample, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            count = len(batch)
+            for i, (sample, _) in enumerate(batch):
+                self.batch_buffer[i] = sample
+            if getattr(self.backend, "variable_batch", False):
+                # The backend picks a fitting compiled batch size itself
+                inputs = self.batch_buffer[:count]
+            else:
+                # Pad the unused slots so stale samples never reach the model
+                self.batch_buffer[count:] = 0
+                inputs = self.batch_buffer
+
+            try:
+                outputs = self.backend(inputs)
+            except Exception as err:  # pylint: disable=broad-except
+                for _, future in batch:
+                    future.set_exception(err)
+                continue
+
+            for i, (_, future) in enumerate(batch):
+                future.set_result([output[i].copy() for output in outputs])
+
+            self.stats["batches"] += 1
+            self.stats["requests"] += count
+            if getattr(self.backend, "variable_batch", False):
+                # Rows the backend padded up to its chosen compiled batch size
+                self.stats["padded_slots"] += getattr(self.backend, "last_padded", 0)
+            else:
+                self.stats["padded_slots"] += self.batch_size - count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve single-frame requests with dynamic batching.")
+    parser.add_argument("--lib", default="g2210_b_4_lib_after.so", help="Exported library built for --device")
+    parser.add_argument("--device", default="llvm", help="Device to run on, e.g. llvm or cuda")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Batching deadline")
+    parser.add_argument("--num-requests", type=int, default=200, help="Number of simulated frames")
+    parser.add_argument("--interval-ms", type=float, default=2.0, help="Time between simulated frames")
+    args = parser.parse_args()
+
+    from tvm import runtime
+    from tvm.contrib import graph_executor
+    from benchmark import get_tvm_device, print_summary, summarize_latencies
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)  # Compiled batch size of 4
+    input_dtype = "uint8"
+
+    dev = get_tvm_device(args.device)
+    lib = runtime.load_module(args.lib)
+    module = graph_executor.GraphModule(lib["default"](dev))
+    batcher = DynamicBatcher.from_graph_module(
+        module, input_name, input_shape, input_dtype, dev, max_wait_ms=args.max_wait_ms
+    )
+
+    # Simulate a camera stream that delivers one frame at a time
+    frame = np.random.randint(0, 256, size=input_shape[1:], dtype=input_dtype)
+    latencies = []
+    futures = []
+    for _ in range(args.num_requests):
+        start_time = time.perf_counter()
+        future = batcher.submit(frame)
+        future.add_done_callback(
+            lambda _, start_time=start_time: latencies.append((time.perf_counter() - start_time) * 1000)
+        )
+        futures.append(future)
+        time.sleep(args.interval_ms / 1000)
+
+    for future in futures:
+        future.result()
+    batcher.close()
+
+    print_summary("request latency", summarize_latencies(np.array(latencies)))
+    stats = batcher.stats
+    print(
+        f"{stats['requests']} requests in {stats['batches']} batches, "
+        f"mean fill {stats['requests'] / max(stats['batches'], 1):.2f}/{input_shape[0]}, "
+        f"{stats['padded_slots']} padded slots"
+    )
+
+
+if __name__ == "__main__":
+    main()
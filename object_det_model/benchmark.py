@@ -0,0 +1,268 @@
+import json
+import time
+
+import numpy as np
+
+
+def get_tvm_device(device):
+    """
+    Resolve a device string such as "cuda", "cuda:1", "llvm" or "cpu" to a TVM device.
+
+    Parameters:
+        device (str): Device name, optionally followed by ":<index>".
+
+    Returns:
+        tvm.runtime.Device: The matching TVM device.
+    """
+    import tvm
+
+    name, _, index = device.partition(":")
+    if name in ("llvm", "cpu"):
+        name = "cpu"
+    return tvm.device(name, int(index) if index else 0)
+
+
+def get_ort_providers(device):
+    """
+    Map a device string to the onnxruntime execution providers to use.
+
+    Parameters:
+        device (str): Device name, e.g. "cuda" or "cpu".
+
+    Returns:
+        list: Execution provider names, most preferred first.
+    """
+    name = device.partition(":")[0]
+    if name == "cuda":
+        return ["CUDAExecutionProvider", "CPUExecutionProvider"]
+    return ["CPUExecutionProvider"]
+
+
+def measure_latencies(run_fn, num_runs=1000, num_warmup=10):
+    """
+    Time every call of run_fn individually.
+
+    Parameters:
+        run_fn (callable): Runs one inference and returns once the result is ready.
+        num_runs (int): Number of timed runs.
+        num_warmup (int): Number of warmup runs, timed separately.
+
+    Returns:
+        tuple: (warmup latencies in ms, steady-state latencies in ms) as numpy arrays.
+    """
+    warmup = np.empty(num_warmup, dtype=np.float64)
+    for i in range(num_warmup):
+        start_time = time.perf_counter()
+        run_fn()
+        warmup[i] = time.perf_counter() - start_time
+
+    latencies = np.empty(num_runs, dtype=np.float64)
+    for i in range(num_runs):
+        start_time = time.perf_counter()
+        run_fn()
+        latencies[i] = time.perf_counter() - start_time
+
+    return warmup * 1000, latencies * 1000
+
+
+def summarize_latencies(latencies_ms, warmup_ms=None, batch_size=1, keep_samples=False):
+    """
+    Compute the latency distribution, throughput and drift of a benchmark run.
+
+    Drift compares the median of the second half of the steady-state runs with
+    the first half; a positive value means the run got slower over time.
+
+    Parameters:
+        latencies_ms (numpy.ndarray): Steady-state latencies in milliseconds.
+        warmup_ms (numpy.ndarray): Warmup latencies in milliseconds, or None.
+        batch_size (int): Number of samples processed per run.
+        keep_samples (bool): Also return the raw latencies as "latencies_ms".
+
+    Returns:
+        dict: Summary statistics, all latencies in milliseconds.
+    """
+    latencies_ms = np.asarray(latencies_ms, dtype=np.float64)
+    total_s = latencies_ms.sum() / 1000
+    half = len(latencies_ms) // 2
+    summary = {
+        "num_runs": int(len(latencies_ms)),
+        "batch_size": int(batch_size),
+        "mean_ms": float(latencies_ms.mean()),
+        "std_ms": float(latencies_ms.std()),
+        "min_ms": float(latencies_ms.min()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p90_ms": float(np.percentile(latencies_ms, 90)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max()),
+        "throughput_per_s": float(len(latencies_ms) * batch_size / total_s) if total_s > 0 else 0.0,
+        "drift_pct": 0.0,
+    }
+    if half > 0:
+        first = np.median(latencies_ms[:half])
+        second = np.median(latencies_ms[half:])
+        summary["drift_pct"] = float((second - first) / first * 100)
+    if warmup_ms is not None and len(warmup_ms) > 0:
+        summary["num_warmup"] = int(len(warmup_ms))
+        summary["first_run_ms"] = float(warmup_ms[0])
+        summary["warmup_mean_ms"] = float(np.mean(warmup_ms))
+        summary["warmup_vs_steady_pct"] = float(
+            (np.mean(warmup_ms) - summary["p50_ms"]) / summary["p50_ms"] * 100
+        )
+    if keep_samples:
+        summary["latencies_ms"] = latencies_ms.tolist()
+    return summary
+
+
+def benchmark_tvm(module, input_name, input_data, dev, num_runs=1000, num_warmup=10, keep_samples=False):
+    """
+    Benchmark a TVM graph executor module.
+
+    Parameters:
+        module (graph_executor.GraphModule): The TVM module to benchmark.
+        input_name (str): The name of the input tensor.
+        input_data (numpy.ndarray): The input data to feed into the model.
+        dev (tvm.device): TVM device where the model runs.
+        num_runs (int): Number of timed runs.
+        num_warmup (int): Number of warmup runs.
+        keep_samples (bool): Also return the raw latencies, e.g. for results_store.
+
+    Returns:
+        dict: Summary statistics, see summarize_latencies.
+    """
+    import tvm
+
+    module.set_input(input_name, tvm.nd.array(input_data, device=dev))
+
+    def run_fn():
+        module.run()
+        # Kernel launches are asynchronous on GPU targets
+        dev.sync()
+
+    warmup_ms, latencies_ms = measure_latencies(run_fn, num_runs, num_warmup)
+    summary = summarize_latencies(
+        latencies_ms, warmup_ms, batch_size=input_data.shape[0], keep_samples=keep_samples
+    )
+    summary["backend"] = "tvm"
+    summary["device"] = str(dev)
+    return summary
+
+
+def benchmark_tvm_io(module, input_name, input_data, dev, bound=False, num_runs=1000, num_warmup=10, keep_samples=False):
+    """
+    Benchmark a TVM module end to end, including input upload and output download.
+
+    With bound=False every run wraps the input with tvm.nd.array and fetches
+    the outputs with get_output().numpy(), which allocates and copies both
+    ways. With bound=True the run goes through io_binding.BoundExecutor and
+    its preallocated (on CPU, zero-copy) buffers.
+
+    Parameters:
+        module (graph_executor.GraphModule): The TVM module to benchmark.
+        input_name (str): The name of the input tensor.
+        input_data (numpy.ndarray): The input data to feed into the model.
+        dev (tvm.device): TVM device where the model runs.
+        bound (bool): Use preallocated, bound I/O buffers.
+        num_runs (int): Number of timed runs.
+        num_warmup (int): Number of warmup runs.
+        keep_samples (bool): Also return the raw latencies, e.g. for results_store.
+
+    Returns:
+        dict: Summary statistics, see summarize_latencies.
+    """
+    import tvm
+
+    if bound:
+        from io_binding import BoundExecutor
+
+        executor = BoundExecutor(module, input_name, input_data.shape, str(input_data.dtype), dev)
+        np.copyto(executor.input_buffer, input_data)
+        # On CPU the buffer is already bound, on other devices it is uploaded by run()
+        run_input = None if executor.zero_copy else executor.input_buffer
+
+        def run_fn():
+            executor.run(run_input)
+    else:
+        num_outputs = module.get_num_outputs()
+
+        def run_fn():
+            module.set_input(input_name, tvm.nd.array(input_data, device=dev))
+            module.run()
+            for i in range(num_outputs):
+                module.get_output(i).numpy()
+
+    warmup_ms, latencies_ms = measure_latencies(run_fn, num_runs, num_warmup)
+    summary = summarize_latencies(
+        latencies_ms, warmup_ms, batch_size=input_data.shape[0], keep_samples=keep_samples
+    )
+    summary["backend"] = "tvm-bound-io" if bound else "tvm-copy-io"
+    summary["device"] = str(dev)
+    return summary
+
+
+def benchmark_onnx(session, input_name, input_data, num_runs=1000, num_warmup=10, keep_samples=False):
+    """
+    Benchmark an onnxruntime inference session.
+
+    Parameters:
+        session (onnxruntime.InferenceSession): The ONNX runtime session.
+        input_name (str): The name of the input tensor in the ONNX model.
+        input_data (numpy.ndarray): The input data to feed into the model.
+        num_runs (int): Number of timed runs.
+        num_warmup (int): Number of warmup runs.
+        keep_samples (bool): Also return the raw latencies, e.g. for results_store.
+
+    Returns:
+        dict: Summary statistics, see summarize_latencies.
+    """
+    feed = {input_name: input_data}
+
+    def run_fn():
+        session.run(None, feed)
+
+    warmup_ms, latencies_ms = measure_latencies(run_fn, num_runs, num_warmup)
+    summary = summarize_latencies(
+        latencies_ms, warmup_ms, batch_size=input_data.shape[0], keep_samples=keep_samples
+    )
+    summary["backend"] = "onnxruntime"
+    summary["device"] = ",".join(session.get_providers())
+    return summary
+
+
+def print_summary(name, summary):
+    """
+    Print a benchmark summary in a human readable form.
+
+    Parameters:
+        name (str): Label of the benchmarked model.
+        summary (dict): Summary statistics from summarize_latencies.
+    """
+    print(f"[{name}] {summary['num_runs']} runs, batch size {summary['batch_size']}")
+    print(
+        f"  mean {summary['mean_ms']:.2f} ms | p50 {summary['p50_ms']:.2f} ms | "
+        f"p90 {summary['p90_ms']:.2f} ms | p99 {summary['p99_ms']:.2f} ms | "
+        f"max {summary['max_ms']:.2f} ms"
+    )
+    print(f"  throughput {summary['throughput_per_s']:.1f} samples/s | drift {summary['drift_pct']:+.2f}%")
+    if "warmup_mean_ms" in summary:
+        print(
+            f"  first run {summary['first_run_ms']:.2f} ms | warmup mean {summary['warmup_mean_ms']:.2f} ms "
+            f"({summary['warmup_vs_steady_pct']:+.1f}% vs p50)"
+        )
+
+
+def write_json_report(path, results, metadata=None):
+    """
+    Write benchmark summaries to a JSON file.
+
+    Parameters:
+        path (str): Output file path.
+        results (dict): Mapping of model label to summary statistics.
+        metadata (dict): Extra information to store alongside the results.
+    """
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "metadata": metadata or {},
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
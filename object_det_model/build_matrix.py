@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+# Ordered from most to least preferred within an architecture; "features" are
+# the /proc/cpuinfo flags a host needs to run the artifact. An -mcpu enables
+# more than its headline extension, so the x86 lists name every flag of that
+# CPU that code generation may emit; a host or VM that hides one of them
+# falls back to the next entry instead of dying with SIGILL
+_HASWELL_FEATURES = [
+    "ssse3", "sse4_1", "sse4_2", "popcnt", "avx", "avx2", "fma", "f16c", "bmi1", "bmi2", "abm", "movbe",
+]
+_SKYLAKE_AVX512_FEATURES = _HASWELL_FEATURES + [
+    "adx", "3dnowprefetch", "avx512f", "avx512cd", "avx512bw", "avx512dq", "avx512vl",
+]
+DEFAULT_MATRIX = [
+    {
+        "name": "x86_64_avx512_vnni",
+        "target": "llvm -mtriple=x86_64-linux-gnu -mcpu=cascadelake",
+        "arch": "x86_64",
+        "features": _SKYLAKE_AVX512_FEATURES + ["avx512_vnni"],
+    },
+    {
+        "name": "x86_64_avx512",
+        "target": "llvm -mtriple=x86_64-linux-gnu -mcpu=skylake-avx512",
+        "arch": "x86_64",
+        "features": _SKYLAKE_AVX512_FEATURES,
+    },
+    {
+        "name": "x86_64_avx2",
+        "target": "llvm -mtriple=x86_64-linux-gnu -mcpu=haswell",
+        "arch": "x86_64",
+        "features": _HASWELL_FEATURES,
+    },
+    {
+        "name": "x86_64",
+        "target": "llvm -mtriple=x86_64-linux-gnu -mcpu=x86-64",
+        "arch": "x86_64",
+        "features": [],
+    },
+    {
+        "name": "aarch64_dotprod",
+        "target": "llvm -mtriple=aarch64-linux-gnu -mattr=+neon,+dotprod",
+        "arch": "aarch64",
+        "features": ["asimd", "asimddp"],
+        "cross_compiler": "aarch64-linux-gnu-g++",
+    },
+    {
+        "name": "aarch64",
+        "target": "llvm -mtriple=aarch64-linux-gnu -mattr=+neon",
+        "arch": "aarch64",
+        "features": ["asimd"],
+        "cross_compiler": "aarch64-linux-gnu-g++",
+    },
+]
+
+MANIFEST_NAME = "manifest.json"
+
+
+def read_cpu_features(cpuinfo_path="/proc/cpuinfo"):
+    """
+    Detect the host architecture and CPU feature flags.
+
+    Parameters:
+        cpuinfo_path (str): Path of the cpuinfo file.
+
+    Returns:
+        tuple: (architecture such as "x86_64" or "aarch64", set of feature flags).
+    """
+    arch = platform.machine().lower()
+    arch = {"amd64": "x86_64", "arm64": "aarch64"}.get(arch, arch)
+    features = set()
+    try:
+        with open(cpuinfo_path, "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                # x86 lists "flags", ARM lists "Features"; the first core is enough
+                if key.strip() in ("flags", "Features"):
+                    features = set(value.split())
+                    break
+    except OSError:
+        pass
+    return arch, features
+
+
+def build_matrix(onnx_path, shape_dict, dtype_dict, matrix, out_dir, cache_dir="tvm_cache",
+                 tuning_log=None, workers=None):
+    """
+    Compile the model for every matrix entry in parallel and write a manifest.
+
+    Parameters:
+        onnx_path (str): Path to the ONNX model.
+        shape_dict (dict): Input name to shape.
+        dtype_dict (dict): Input name to dtype.
+        matrix (list): Entries with name, target, arch, features and an
+            optional cross_compiler, in order of preference.
+        out_dir (str): Directory receiving one subdirectory per entry and the manifest.
+        cache_dir (str): Root directory of the artifact cache.
+        tuning_log (str): Tuning log to apply, or None.
+        workers (int): Number of compile processes, defaults to the number of CPUs.
+
+    Returns:
+        dict: The manifest.
+    """
+    from build_sweep import build_variant
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(build_variant, onnx_path, shape_dict, dtype_dict, entry, entry["target"], cache_dir, tuning_log)
+            for entry in matrix
+        ]
+        built = [future.result() for future in futures]
+
+    os.makedirs(out_dir, exist_ok=True)
+    artifacts = []
+    for priority, entry in enumerate(built):
+        if "error" in entry:
+            print(f"[{entry['name']}] build failed: {entry['error']}")
+            continue
+        artifact_dir = os.path.join(out_dir, entry["name"])
+        shutil.rmtree(artifact_dir, ignore_errors=True)
+        shutil.copytree(os.path.dirname(entry["paths"]["lib"]), artifact_dir)
+        artifacts.append({
+            "name": entry["name"],
+            "target": entry["target"],
+            "arch": entry["arch"],
+            "features": sorted(entry["features"]),
+            "priority": priority,
+            "dir": entry["name"],
+        })
+        print(f"[{entry['name']}] {entry['target']}")
+
+    manifest = {
+        "model": os.path.basename(onnx_path),
+        "shape": {name: list(shape) for name, shape in shape_dict.items()},
+        "dtype": dtype_dict,
+        "artifacts": artifacts,
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def select_artifact(manifest, arch=None, features=None):
+    """
+    Pick the most preferred artifact the host can run.
+
+    Parameters:
+        manifest (dict): Manifest written by build_matrix.
+        arch (str): Host architecture, detected when None.
+        features (set): Host feature flags, detected when None.
+
+    Returns:
+        dict: The manifest entry.
+    """
+    if arch is None or features is None:
+        detected_arch, detected_features = read_cpu_features()
+        arch = detected_arch if arch is None else arch
+        features = detected_features if features is None else features
+    compatible = [
+        entry for entry in manifest["artifacts"]
+        if entry["arch"] == arch and set(entry["features"]) <= set(features)
+    ]
+    if not compatible:
+        raise RuntimeError(f"No artifact in the manifest runs on {arch} with the detected CPU features")
+    return min(compatible, key=lambda entry: entry["priority"])
+
+
+def load_best(matrix_dir, dev):
+    """
+    Load the fastest artifact of a build matrix that the host supports.
+
+    Parameters:
+        matrix_dir (str): Output directory of build_matrix.
+        dev (tvm.device): TVM device where the model will run.
+
+    Returns:
+        tuple: (graph_executor.GraphModule, manifest entry).
+    """
+    from artifact_cache import artifact_paths
+    from performance import load_model
+
+    with open(os.path.join(matrix_dir, MANIFEST_NAME), "r") as f:
+        manifest = json.load(f)
+    entry = select_artifact(manifest)
+    paths = artifact_paths(os.path.join(matrix_dir, entry["dir"]))
+    return load_model(paths["lib"], paths["graph"], paths["params"], dev), entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the model for several CPU targets, or pick one for this host.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Compile the build matrix")
+    build_parser.add_argument("--onnx", default="g2210_b_4.onnx", help="ONNX model")
+    build_parser.add_argument("--matrix", default=None, help="JSON file with the matrix entries")
+    build_parser.add_argument("--only", nargs="+", default=None, help="Build only these entry names")
+    build_parser.add_argument("--tuning-log", default=None, help="Tuning log to apply")
+    build_parser.add_argument("--workers", type=int, default=None, help="Number of compile processes")
+    build_parser.add_argument("--output-dir", default="g2210_b_4_matrix", help="Output directory")
+
+    select_parser = subparsers.add_parser("select", help="Show which artifact this host would load")
+    select_parser.add_argument("--matrix-dir", default="g2210_b_4_matrix", help="Output directory of build")
+    args = parser.parse_args()
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)
+    input_dtype = "uint8"
+
+    if args.command == "select":
+        arch, features = read_cpu_features()
+        with open(os.path.join(args.matrix_dir, MANIFEST_NAME), "r") as f:
+            entry = select_artifact(json.load(f), arch, features)
+        print(f"Host {arch}: loading {entry['name']} ({entry['target']})")
+        return
+
+    matrix = DEFAULT_MATRIX
+    if args.matrix:
+        with open(args.matrix, "r") as f:
+            matrix = json.load(f)
+    if args.only:
+        matrix = [entry for entry in matrix if entry["name"] in args.only]
+    manifest = build_matrix(
+        args.onnx, {input_name: input_shape}, {input_name: input_dtype}, matrix, args.output_dir,
+        tuning_log=args.tuning_log, workers=args.workers,
+    )
+    print(f"{len(manifest['artifacts'])}/{len(matrix)} artifacts and the manifest written to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+# Each variant is a set of overrides of the default build: opt_level 3, the
+# ONNX NCHW layout, the plain llvm target and no disabled passes
+DEFAULT_VARIANTS = [
+    {"name": "baseline"},
+    {"name": "opt2", "opt_level": 2},
+    {"name": "nhwc", "layout": "NHWC"},
+    {"name": "avx2", "target": "llvm -mcpu=core-avx2"},
+    {"name": "nhwc_avx2", "layout": "NHWC", "target": "llvm -mcpu=core-avx2"},
+    {"name": "avx512", "target": "llvm -mcpu=skylake-avx512"},
+    {"name": "no_alter_layout", "disabled_pass": ["AlterOpLayout"]},
+]
+
+
+def convert_layout(mod, layout):
+    """
+    Convert convolutions of a Relay module to another data layout.
+
+    Parameters:
+        mod (tvm.IRModule): The Relay module.
+        layout (str): "NHWC" or "NCHW".
+
+    Returns:
+        tvm.IRModule: The converted module.
+    """
+    import tvm
+    from tvm import relay
+
+    kernel_layout = "HWIO" if layout == "NHWC" else "OIHW"
+    desired_layouts = {
+        "nn.conv2d": [layout, kernel_layout],
+        "qnn.conv2d": [layout, kernel_layout],
+    }
+    seq = tvm.transform.Sequential([
+        relay.transform.RemoveUnusedFunctions(),
+        relay.transform.ConvertLayout(desired_layouts),
+    ])
+    with tvm.transform.PassContext(opt_level=3):
+        return seq(mod)
+
+
+def build_variant(onnx_path, shape_dict, dtype_dict, variant, default_target, cache_dir, tuning_log=None):
+    """
+    Compile one variant through the artifact cache; runs in a worker process.
+
+    Parameters:
+        onnx_path (str): Path to the ONNX model.
+        shape_dict (dict): Input name to shape.
+        dtype_dict (dict): Input name to dtype.
+        variant (dict): Overrides: target, opt_level, layout, disabled_pass, config,
+            and cross_compiler (e.g. "aarch64-linux-gnu-g++") for other architectures.
+        default_target (str): Target used when the variant does not set one.
+        cache_dir (str): Root directory of the artifact cache.
+        tuning_log (str): Tuning log to apply, or None.
+
+    Returns:
+        dict: The variant plus its artifact paths, or an "error" message.
+    """
+    from artifact_cache import build_cached
+
+    layout = variant.get("layout")
+    config = dict(variant.get("config", {}))
+    disabled_pass = variant.get("disabled_pass", [])
+    extra = {"layout": layout}
+    export_kwargs = None
+    if variant.get("cross_compiler"):
+        from tvm.contrib import cc
+
+        extra["cross_compiler"] = variant["cross_compiler"]
+        export_kwargs = {"fcompile": cc.cross_compiler(variant["cross_compiler"])}
+    try:
+        _, paths, _ = build_cached(
+            onnx_path,
+            shape_dict,
+            dtype_dict,
+            target=variant.get("target", default_target),
+            opt_level=variant.get("opt_level", 3),
+            config=config,
+            tuning_log=tuning_log,
+            cache_dir=cache_dir,
+            transform=(lambda mod, params: (convert_layout(mod, layout), params)) if layout else None,
+            extra=extra,
+            export_kwargs=export_kwargs,
+            disabled_pass=disabled_pass,
+            load=False,
+        )
+    except Exception as err:  # pylint: disable=broad-except
+        return dict(variant, error=f"{type(err).__name__}: {err}")
+    return dict(variant, paths=paths)
+
+
+def benchmark_variant(paths, input_name, input_shape, input_dtype, device, num_runs):
+    """
+    Load and benchmark one built variant; runs in a child process.
+
+    Parameters:
+        paths (dict): Artifact paths from build_variant.
+        input_name (str): The name of the input tensor.
+        input_shape (tuple): Input shape.
+        input_dtype (str): Input dtype.
+        device (str): Device to benchmark on.
+        num_runs (int): Number of timed runs.
+
+    Returns:
+        dict: Output of benchmark.benchmark_tvm.
+    """
+    from tvm import runtime
+    from tvm.contrib import graph_executor
+    from benchmark import benchmark_tvm, get_tvm_device
+
+    dev = get_tvm_device(device)
+    input_data = np.random.default_rng(0).integers(0, 256, size=input_shape).astype(input_dtype)
+    lib = runtime.load_module(paths["lib"])
+    module = graph_executor.GraphModule(lib["default"](dev))
+    return benchmark_tvm(module, input_name, input_data, dev, num_runs=num_runs)
+
+
+def run_sweep(onnx_path, input_name, input_shape, input_dtype, variants, default_target="llvm",
+              device="llvm", cache_dir="tvm_cache", tuning_log=None, workers=None, num_runs=100):
+    """
+    Compile all variants in a process pool, then benchmark them one at a time.
+
+    Benchmarks run one at a time so that variants do not compete for cores
+    while they are measured, each in its own child process: an artifact the
+    host cannot execute, e.g. an AVX-512 build on a host without AVX-512,
+    dies with SIGILL, which is recorded as an error instead of ending the sweep.
+
+    Parameters:
+        onnx_path (str): Path to the ONNX model.
+        input_name (str): The name of the input tensor.
+        input_shape (tuple): Input shape.
+        input_dtype (str): Input dtype.
+        variants (list): Variant dicts, see DEFAULT_VARIANTS.
+        default_target (str): Target of variants without their own.
+        device (str): Device to benchmark on.
+        cache_dir (str): Root directory of the artifact cache.
+        tuning_log (str): Tuning log to apply, or None.
+        workers (int): Number of compile processes, defaults to the number of CPUs.
+        num_runs (int): Number of timed runs per variant.
+
+    Returns:
+        list: Variant results sorted by p50 latency, failed variants last.
+    """
+    shape_dict = {input_name: input_shape}
+    dtype_dict = {input_name: input_dtype}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(build_variant, onnx_path, shape_dict, dtype_dict, variant, default_target, cache_dir, tuning_log)
+            for variant in variants
+        ]
+        built = [future.result() for future in futures]
+
+    results = []
+    for variant in built:
+        if "error" in variant:
+            print(f"[{variant['name']}] build failed: {variant['error']}")
+            results.append(variant)
+            continue
+        try:
+            # A fresh process per variant, since a crashed worker breaks its pool
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                variant["benchmark"] = pool.submit(
+                    benchmark_variant, variant["paths"], input_name, input_shape, input_dtype, device, num_runs
+                ).result()
+        except BrokenProcessPool:
+            variant["error"] = "benchmark process crashed, e.g. an illegal instruction for this host"
+            print(f"[{variant['name']}] benchmark failed: {variant['error']}")
+        except Exception as err:  # pylint: disable=broad-except
+            variant["error"] = f"{type(err).__name__}: {err}"
+            print(f"[{variant['name']}] benchmark failed: {variant['error']}")
+        results.append(variant)
+
+    results.sort(key=lambda r: r["benchmark"]["p50_ms"] if "benchmark" in r else float("inf"))
+    return results
+
+
+def print_ranking(results):
+    """
+    Print the variants ranked by p50 latency.
+
+    Parameters:
+        results (list): Output of run_sweep.
+    """
+    print("| Rank | %-16s | %-32s | Opt | Layout | p50 (ms) | p99 (ms) |" % ("Variant", "Target"))
+    for rank, result in enumerate(results, 1):
+        bench = result.get("benchmark")
+        print("| %4d | %-16s | %-32s | %3d | %-6s | %8s | %8s |" % (
+            rank,
+            result["name"],
+            result.get("target", "(default)")[:32],
+            result.get("opt_level", 3),
+            result.get("layout") or "NCHW",
+            "%.2f" % bench["p50_ms"] if bench else "error",
+            "%.2f" % bench["p99_ms"] if bench else "-",
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile and rank build-configuration variants.")
+    parser.add_argument("--onnx", default="g2210_b_4.onnx", help="ONNX model")
+    parser.add_argument("--variants", default=None, help="JSON file with a list of variants")
+    parser.add_argument("--target", default="llvm", help="Default compilation target")
+    parser.add_argument("--device", default="llvm", help="Device to benchmark on")
+    parser.add_argument("--tuning-log", default=None, help="Tuning log to apply")
+    parser.add_argument("--workers", type=int, default=None, help="Number of compile processes")
+    parser.add_argument("--num-runs", type=int, default=100, help="Number of timed runs per variant")
+    parser.add_argument("--output-dir", default="g2210_b_4_best", help="Where to keep the winning artifact")
+    args = parser.parse_args()
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)
+    input_dtype = "uint8"
+
+    variants = DEFAULT_VARIANTS
+    if args.variants:
+        with open(args.variants, "r") as f:
+            variants = json.load(f)
+
+    results = run_sweep(
+        args.onnx, input_name, input_shape, input_dtype, variants,
+        default_target=args.target, device=args.device, tuning_log=args.tuning_log,
+        workers=args.workers, num_runs=args.num_runs
+    )
+    print_ranking(results)
+
+    with open(os.path.splitext(args.onnx)[0] + "_sweep.json", "w") as f:
+        json.dump(results, f, indent=2)
+
+    best = results[0]
+    if "benchmark" in best:
+        shutil.rmtree(args.output_dir, ignore_errors=True)
+        shutil.copytree(os.path.dirname(best["paths"]["lib"]), args.output_dir)
+        print(f"Winner '{best['name']}' copied to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
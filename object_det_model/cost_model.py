@@ -0,0 +1,225 @@
+import argparse
+import glob
+import os
+
+from log_tools import merge_logs, print_stats
+
+
+def expand_logs(paths):
+    """
+    Expand glob patterns and drop logs that do not exist (yet).
+
+    Parameters:
+        paths (list): Log files or glob patterns.
+
+    Returns:
+        list: Existing log files.
+    """
+    logs = []
+    for pattern in paths:
+        logs.extend(path for path in sorted(glob.glob(pattern)) if os.path.getsize(path) > 0)
+    return logs
+
+
+def update_history(new_logs, history_log):
+    """
+    Fold the records of a tuning session into a persistent training history.
+
+    Cost models learn from bad configs as much as from good ones, so unlike
+    the best-only logs used for compilation the history keeps every distinct
+    config, including failed ones; only exact duplicates are dropped.
+
+    Parameters:
+        new_logs (list): Logs written by the session.
+        history_log (str): History log, created if missing.
+
+    Returns:
+        dict: Counters from log_tools.merge_logs.
+    """
+    return merge_logs(expand_logs(list(new_logs) + [history_log]), history_log, top_k=0, keep_failed=True)
+
+
+def load_autotvm_history(history_logs):
+    """
+    Read AutoTVM records for pre-training tuners.
+
+    Parameters:
+        history_logs (list): AutoTVM logs or glob patterns, e.g. the history of
+            this model and of similar models such as g2208.
+
+    Returns:
+        list: (MeasureInput, MeasureResult) pairs.
+    """
+    from tvm import autotvm
+
+    records = []
+    for path in expand_logs(history_logs):
+        records.extend(autotvm.record.load_from_file(path))
+    return records
+
+
+def make_warm_xgb_tuner(task, history, loss_type="reg", feature_type="curve", min_seed_records=50):
+    """
+    Create an XGBTuner that is pre-trained on historical records before its first batch.
+
+    The "curve" features describe the memory access pattern of a config
+    rather than its knob values, so records of other shapes of the same
+    template (other layers, or another model such as g2208 for g2210) carry
+    over. The pre-trained model is the base model of the tuner: its
+    predictions are the starting point the tuner refines with every new
+    measurement.
+
+    Parameters:
+        task (autotvm.task.Task): The task to tune.
+        history (list): Records from load_autotvm_history.
+        loss_type (str): XGBoost loss, as in XGBTuner.
+        feature_type (str): "curve" for transfer across workloads; "itervar" or
+            "knob" only transfer between identical workloads.
+        min_seed_records (int): Pre-train only when at least this many records
+            of the same template and target are available.
+
+    Returns:
+        autotvm.tuner.XGBTuner: The tuner.
+    """
+    from tvm.autotvm.tuner import XGBTuner
+
+    tuner = XGBTuner(task, loss_type=loss_type, feature_type=feature_type)
+    if history:
+        # Records of other templates or targets are filtered out by the cost model
+        used = sum(
+            1 for inp, _ in history
+            if inp.task.name == task.name and inp.target.kind.name == task.target.kind.name
+        )
+        print(f"[{task.name}] {used}/{len(history)} history records share the template and target kind")
+        tuner.load_history(history, min_seed_records=min_seed_records)
+    return tuner
+
+
+def count_usable_records(log_file, workload_keys):
+    """
+    Count the auto-scheduler records a cost model can extract features from.
+
+    Parameters:
+        log_file (str): Auto-scheduler log.
+        workload_keys (set): Workload keys registered in this process.
+
+    Returns:
+        tuple: (usable records, total records).
+    """
+    from tvm import auto_scheduler
+
+    used = total = 0
+    for inp, _ in auto_scheduler.load_records(log_file):
+        total += 1
+        used += inp.task.workload_key in workload_keys
+    return used, total
+
+
+def make_warm_xgb_model(history_logs, model_file=None, num_warmup_sample=100, tasks=None):
+    """
+    Create an auto-scheduler XGBModel trained on historical records.
+
+    The auto-scheduler retrains its model from all records it has seen after
+    every round, so the history is fed in as training records (update_from_file)
+    rather than as a loaded booster, which would be discarded at the first
+    retraining. With model_file set, the model is saved after every update and
+    can be inspected or reused with TaskScheduler(load_model_file=...).
+
+    Features are extracted by replaying a record on its task's compute DAG,
+    which needs the workload to be registered in this process. Workloads are
+    registered by extract_tasks, so records of workloads that were not
+    extracted (e.g. layers of another model that g2210 does not share) are
+    skipped; extract the tasks first and pass them in to log how many
+    records were actually used.
+
+    Parameters:
+        history_logs (list): Auto-scheduler logs or glob patterns.
+        model_file (str): Where to save the model, or None.
+        num_warmup_sample (int): Records needed before the model replaces random
+            predictions; pre-training usually exceeds it from the start.
+        tasks (list): auto_scheduler.SearchTask list extracted in this process,
+            used to count the records that can be used, or None.
+
+    Returns:
+        auto_scheduler.XGBModel: The model.
+    """
+    from tvm import auto_scheduler
+
+    model = auto_scheduler.XGBModel(num_warmup_sample=num_warmup_sample, model_file=model_file)
+    workload_keys = {task.workload_key for task in tasks} if tasks is not None else None
+    for path in expand_logs(history_logs):
+        if workload_keys is not None:
+            used, total = count_usable_records(path, workload_keys)
+            print(f"{path}: {used}/{total} records match an extracted workload")
+        model.update_from_file(path)
+    print(f"Cost model pre-trained on {len(model.inputs)} records")
+    return model
+
+
+def make_warm_search_policies(tasks, cost_model, preload_log=None, verbose=1):
+    """
+    Create one sketch search policy per task, all sharing a pre-trained cost model.
+
+    The result can be passed as search_policy to TaskScheduler.tune.
+
+    Parameters:
+        tasks (list): auto_scheduler.SearchTask list.
+        cost_model (auto_scheduler.XGBModel): Model from make_warm_xgb_model.
+        preload_log (str): Log whose measured states are not measured again, or None.
+        verbose (int): Verbosity of the policies.
+
+    Returns:
+        list: auto_scheduler.SketchPolicy instances.
+    """
+    from tvm import auto_scheduler
+
+    init_search_callbacks = []
+    if preload_log and os.path.exists(preload_log):
+        init_search_callbacks.append(auto_scheduler.PreloadMeasuredStates(preload_log))
+    return [
+        auto_scheduler.SketchPolicy(
+            task, cost_model, verbose=verbose, init_search_callbacks=init_search_callbacks
+        )
+        for task in tasks
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain cost-model training histories.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update_parser = subparsers.add_parser("update", help="Fold session logs into a history log")
+    update_parser.add_argument("logs", nargs="+", help="Session logs or glob patterns")
+    update_parser.add_argument("-o", "--history", required=True, help="History log")
+
+    pretrain_parser = subparsers.add_parser("pretrain", help="Train an auto-scheduler model file from logs")
+    pretrain_parser.add_argument("logs", nargs="+", help="Auto-scheduler logs or glob patterns")
+    pretrain_parser.add_argument("-o", "--model-file", required=True, help="Output model file")
+    pretrain_parser.add_argument("--onnx", default="g2210_b_4.onnx", help="Model whose workloads are registered")
+    pretrain_parser.add_argument("--target", default="cuda", help="Target the logs were tuned for")
+    args = parser.parse_args()
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)
+    input_dtype = "uint8"
+
+    if args.command == "update":
+        print_stats(update_history(args.logs, args.history))
+    else:
+        import onnx
+        from tvm import auto_scheduler, relay
+
+        # Extracting the tasks registers their workloads, without which no
+        # record yields features
+        mod, params = relay.frontend.from_onnx(
+            onnx.load(args.onnx), shape={input_name: input_shape}, dtype={input_name: input_dtype}
+        )
+        tasks, _ = auto_scheduler.extract_tasks(mod["main"], params, args.target)
+        model = make_warm_xgb_model(args.logs, tasks=tasks)
+        model.save(args.model_file)
+        print(f"Model written to {args.model_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import argparse
+
+import numpy as np
+import tvm
+from tvm import relay
+
+# YOLOv5 default anchors (width, height in pixels) per output stride
+DEFAULT_STRIDES = (8, 16, 32)
+DEFAULT_ANCHORS = (
+    ((10, 13), (16, 30), (33, 23)),
+    ((30, 61), (62, 45), (59, 119)),
+    ((116, 90), (156, 198), (373, 326)),
+)
+
+
+def make_grid(image_size, strides=DEFAULT_STRIDES, anchors=DEFAULT_ANCHORS):
+    """
+    Build the per-row grid offsets, strides and anchor sizes of a concatenated head output.
+
+    Rows are expected level by level, then anchor, then grid row and column,
+    which is the order of the YOLOv5-style concat output
+    (g2208_b_4_output_concat).
+
+    Parameters:
+        image_size (tuple): Model input (height, width).
+        strides (tuple): Output stride of every level.
+        anchors (tuple): Anchor (width, height) pairs of every level.
+
+    Returns:
+        tuple: (grid_xy (A, 2), stride (A, 1), anchor_wh (A, 2)) as float32 arrays.
+    """
+    grids, stride_rows, anchor_rows = [], [], []
+    height, width = image_size
+    for stride, level_anchors in zip(strides, anchors):
+        ny, nx = height // stride, width // stride
+        yv, xv = np.meshgrid(np.arange(ny), np.arange(nx), indexing="ij")
+        cells = np.stack([xv, yv], axis=-1).reshape(-1, 2)
+        for anchor in level_anchors:
+            grids.append(cells)
+            stride_rows.append(np.full((len(cells), 1), stride))
+            anchor_rows.append(np.tile(np.array(anchor).reshape(1, 2), (len(cells), 1)))
+    return (
+        np.concatenate(grids).astype("float32"),
+        np.concatenate(stride_rows).astype("float32"),
+        np.concatenate(anchor_rows).astype("float32"),
+    )
+
+
+def append_postprocess(mod, image_size, score_threshold=0.25, iou_threshold=0.45, max_detections=300,
+                       pre_nms_top_k=-1, decode=True, class_agnostic=False, output_index=0,
+                       strides=DEFAULT_STRIDES, anchors=DEFAULT_ANCHORS):
+    """
+    Append box decoding, score filtering and NMS to the main function of a Relay module.
+
+    The raw head output (N, A, 5 + num_classes) holds per row
+    [x, y, w, h, objectness, class scores...]. With decode=True these are
+    logits decoded YOLOv5-style on the anchor grid; with decode=False they are
+    already sigmoid scores and pixel boxes (cx, cy, w, h).
+
+    The new main returns one fixed-capacity tensor (N, max_detections, 6) of
+    [class_id, score, x1, y1, x2, y2] rows sorted by score; unused rows are -1.
+
+    Parameters:
+        mod (tvm.IRModule): The Relay module of the detector.
+        image_size (tuple): Model input (height, width).
+        score_threshold (float): Minimum objectness times class score.
+        iou_threshold (float): IoU at or above which the lower-scoring box is suppressed.
+        max_detections (int): Capacity of the output per image.
+        pre_nms_top_k (int): Keep only the k best candidates before NMS, -1 for all.
+        decode (bool): Decode raw logits on the anchor grid.
+        class_agnostic (bool): Suppress across classes instead of per class.
+        output_index (int): Which output holds the head, if main returns a tuple.
+        strides (tuple): Output stride of every level.
+        anchors (tuple): Anchor (width, height) pairs of every level.
+
+    Returns:
+        tvm.IRModule: The module with the detection output.
+    """
+    mod = relay.transform.InferType()(mod)
+    main = mod["main"]
+    head = main.body
+    if isinstance(main.ret_type, relay.TupleType):
+        head = relay.TupleGetItem(head, output_index)
+        head_type = main.ret_type.fields[output_index]
+    else:
+        head_type = main.ret_type
+    num_rows = int(head_type.shape[1])
+    num_fields = int(head_type.shape[2])
+    if head_type.dtype != "float32":
+        head = relay.cast(head, "float32")
+
+    x = relay.sigmoid(head) if decode else head
+    xy = relay.strided_slice(x, begin=[0], end=[2], axes=[2])
+    wh = relay.strided_slice(x, begin=[2], end=[4], axes=[2])
+    objectness = relay.strided_slice(x, begin=[4], end=[5], axes=[2])
+    class_scores = relay.strided_slice(x, begin=[5], end=[num_fields], axes=[2])
+
+    if decode:
+        grid_xy, stride, anchor_wh = make_grid(image_size, strides, anchors)
+        if len(grid_xy) != num_rows:
+            raise ValueError(f"The anchor grid has {len(grid_xy)} rows, the head output has {num_rows}")
+        xy = (xy * relay.const(2.0) - relay.const(0.5) + relay.const(grid_xy[None])) * relay.const(stride[None])
+        wh = wh * relay.const(2.0)
+        wh = wh * wh * relay.const(anchor_wh[None])
+
+    scores = class_scores * objectness
+    score = relay.max(scores, axis=2, keepdims=True)
+    class_id = relay.cast(relay.argmax(scores, axis=2, keepdims=True), "float32")
+    half = wh * relay.const(0.5)
+    data = relay.concatenate([class_id, score, xy - half, xy + half], axis=2)
+
+    valid = relay.vision.get_valid_counts(data, score_threshold, id_index=0, score_index=1)
+    nms = relay.vision.non_max_suppression(
+        valid[1],
+        valid[0],
+        valid[2],
+        max_output_size=max_detections,
+        iou_threshold=iou_threshold,
+        force_suppress=class_agnostic,
+        top_k=pre_nms_top_k,
+        coord_start=2,
+        score_index=1,
+        id_index=0,
+        return_indices=False,
+        invalid_to_bottom=True,
+    )
+    detections = relay.strided_slice(nms, begin=[0], end=[min(max_detections, num_rows)], axes=[1])
+    if num_rows < max_detections:
+        # Keep the documented capacity when the head has fewer rows than that
+        detections = relay.nn.pad(detections, ((0, 0), (0, max_detections - num_rows), (0, 0)), pad_value=-1.0)
+
+    new_mod = tvm.IRModule.from_expr(relay.Function(main.params, detections))
+    for global_var, func in mod.functions.items():
+        if global_var.name_hint != "main":
+            new_mod[global_var] = func
+    return relay.transform.InferType()(new_mod)
+
+
+def numpy_postprocess(head, image_size, score_threshold=0.25, iou_threshold=0.45, max_detections=300,
+                      pre_nms_top_k=-1, decode=True, class_agnostic=False,
+                      strides=DEFAULT_STRIDES, anchors=DEFAULT_ANCHORS):
+    """
+    NumPy reference of append_postprocess, with the same output layout.
+
+    Parameters:
+        head (numpy.ndarray): Raw head output (N, A, 5 + num_classes).
+        Others: See append_postprocess.
+
+    Returns:
+        numpy.ndarray: (N, max_detections, 6) detections, unused rows are -1.
+    """
+    x = 1 / (1 + np.exp(-head.astype(np.float32))) if decode else head.astype(np.float32)
+    xy, wh = x[..., 0:2], x[..., 2:4]
+    if decode:
+        grid_xy, stride, anchor_wh = make_grid(image_size, strides, anchors)
+        xy = (xy * 2 - 0.5 + grid_xy) * stride
+        wh = (wh * 2) ** 2 * anchor_wh
+    scores = x[..., 5:] * x[..., 4:5]
+    score = scores.max(axis=2)
+    class_id = scores.argmax(axis=2).astype(np.float32)
+    boxes = np.concatenate([xy - wh / 2, xy + wh / 2], axis=2)
+
+    out = np.full((len(head), max_detections, 6), -1, dtype=np.float32)
+    for n in range(len(head)):
+        keep = np.nonzero(score[n] > score_threshold)[0]
+        order = keep[np.argsort(-score[n][keep], kind="stable")]
+        if pre_nms_top_k > 0:
+            order = order[:pre_nms_top_k]
+        selected = []
+        suppressed = np.zeros(len(order), dtype=bool)
+        areas = np.prod(np.maximum(boxes[n, order, 2:] - boxes[n, order, :2], 0), axis=1)
+        for i in range(len(order)):
+            if suppressed[i]:
+                continue
+            selected.append(order[i])
+            if len(selected) == max_detections:
+                break
+            rest = np.arange(i + 1, len(order))
+            top_left = np.maximum(boxes[n, order[i], :2], boxes[n, order[rest], :2])
+            bottom_right = np.minimum(boxes[n, order[i], 2:], boxes[n, order[rest], 2:])
+            inter = np.prod(np.maximum(bottom_right - top_left, 0), axis=1)
+            iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-12)
+            same_class = class_agnostic | (class_id[n, order[rest]] == class_id[n, order[i]])
+            suppressed[rest[(iou >= iou_threshold) & same_class]] = True
+        selected = np.array(selected, dtype=np.int64)
+        out[n, :len(selected), 0] = class_id[n, selected]
+        out[n, :len(selected), 1] = score[n, selected]
+        out[n, :len(selected), 2:] = boxes[n, selected]
+    return out
+
+
+def count_matches(reference, detections, tolerance=1e-2):
+    """
+    Count the reference detections that also appear in the compiled output.
+
+    Parameters:
+        reference (numpy.ndarray): Output of numpy_postprocess.
+        detections (numpy.ndarray): Output of the compiled module.
+        tolerance (float): Allowed absolute difference per field.
+
+    Returns:
+        tuple: (matched, total reference detections).
+    """
+    matched = total = 0
+    for ref_image, det_image in zip(reference, detections):
+        ref_rows = ref_image[ref_image[:, 0] >= 0]
+        det_rows = det_image[det_image[:, 0] >= 0]
+        total += len(ref_rows)
+        for row in ref_rows:
+            if len(det_rows) and np.any(np.all(np.abs(det_rows - row) <= tolerance * np.maximum(1, np.abs(row)), axis=1)):
+                matched += 1
+    return matched, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile box decoding and NMS into the detector.")
+    parser.add_argument("--onnx", default="g2208_b_4_output_concat.onnx", help="ONNX model with the raw head output")
+    parser.add_argument("--target", default="llvm", help="Compilation target")
+    parser.add_argument("--device", default="llvm", help="Device to run on")
+    parser.add_argument("--score-threshold", type=float, default=0.25)
+    parser.add_argument("--iou-threshold", type=float, default=0.45)
+    parser.add_argument("--max-detections", type=int, default=300)
+    parser.add_argument("--pre-nms-top-k", type=int, default=-1)
+    parser.add_argument("--decoded", action="store_true", help="The head output is already decoded")
+    parser.add_argument("--num-runs", type=int, default=100, help="Number of timed runs")
+    parser.add_argument("--json", default="g2208_b_4_postprocess.json", help="Path of the JSON report")
+    args = parser.parse_args()
+
+    import onnx
+    from tvm.contrib import graph_executor
+    from artifact_cache import build_cached
+    from benchmark import get_tvm_device, measure_latencies, summarize_latencies, write_json_report
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)
+    input_dtype = "uint8"
+    shape_dict = {input_name: input_shape}
+    dtype_dict = {input_name: input_dtype}
+    image_size = input_shape[2:]
+    options = {
+        "score_threshold": args.score_threshold,
+        "iou_threshold": args.iou_threshold,
+        "max_detections": args.max_detections,
+        "pre_nms_top_k": args.pre_nms_top_k,
+        "decode": not args.decoded,
+    }
+
+    mod, params = relay.frontend.from_onnx(onnx.load(args.onnx), shape=shape_dict, dtype=dtype_dict)
+    dev = get_tvm_device(args.device)
+    input_data = tvm.nd.array(np.random.randint(0, 256, size=input_shape, dtype=input_dtype), device=dev)
+
+    lib_raw, _, _ = build_cached(args.onnx, shape_dict, dtype_dict, target=args.target, relay_module=(mod, params))
+    lib_fused, _, _ = build_cached(
+        args.onnx, shape_dict, dtype_dict, target=args.target, relay_module=(mod, params),
+        transform=lambda m, p: (append_postprocess(m, image_size, **options), p),
+        extra={"postprocess": options},
+    )
+    raw = graph_executor.GraphModule(lib_raw["default"](dev))
+    fused = graph_executor.GraphModule(lib_fused["default"](dev))
+    raw.set_input(input_name, input_data)
+    fused.set_input(input_name, input_data)
+
+    def run_host():
+        raw.run()
+        return numpy_postprocess(raw.get_output(0).numpy(), image_size, **options)
+
+    def run_fused():
+        fused.run()
+        return fused.get_output(0).numpy()
+
+    # Random frames give few confident boxes; the comparison still covers decode, filter and NMS
+    matched, total = count_matches(run_host(), run_fused())
+    print(f"Compiled postprocessing matches {matched}/{total} reference detections")
+
+    report = {"options": options, "matched": matched, "reference_detections": total}
+    for name, run_fn in (("numpy", run_host), ("compiled", run_fused)):
+        warmup_ms, latencies_ms = measure_latencies(run_fn, args.num_runs)
+        report[name] = summarize_latencies(latencies_ms, warmup_ms, batch_size=input_shape[0])
+        print(f"{name:>8}: p50 {report[name]['p50_ms']:.2f} ms, p99 {report[name]['p99_ms']:.2f} ms (model + postprocessing)")
+    write_json_report(args.json, report, metadata={"device": args.device, "target": args.target})
+    print(f"JSON report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import argparse
+import itertools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import tvm
+from tvm import runtime
+from tvm.contrib import graph_executor
+
+# threading::ThreadGroup::AffinityMode::kSpecifyOneCorePerThread
+AFFINITY_ONE_CORE_PER_THREAD = -2
+
+
+def create_executors(lib, graph_json, params_bytes, dev, num_executors):
+    """
+    Create several graph executors that share one library and one set of parameters.
+
+    The first executor loads the parameters; the others reference its
+    parameter NDArrays through share_params instead of loading their own.
+    Their storage pools still allocate the parameter buffers, which stay
+    unused.
+
+    Parameters:
+        lib (tvm.runtime.Module): The loaded compiled library.
+        graph_json (str): The graph JSON.
+        params_bytes (bytes): Parameters saved with save_param_dict.
+        dev (tvm.device): TVM device where the model runs.
+        num_executors (int): Number of executors to create.
+
+    Returns:
+        list: graph_executor.GraphModule instances.
+    """
+    first = graph_executor.create(graph_json, lib, dev)
+    first.load_params(params_bytes)
+    executors = [first]
+    for _ in range(num_executors - 1):
+        module = graph_executor.create(graph_json, lib, dev)
+        module.share_params(first, params_bytes)
+        executors.append(module)
+    return executors
+
+
+def partition_cores(num_parts, cpus=None):
+    """
+    Split the available CPU cores into disjoint, contiguous sets.
+
+    Parameters:
+        num_parts (int): Number of sets.
+        cpus (list): Cores to split, defaults to the cores this process may run on.
+
+    Returns:
+        list: One sorted list of core ids per set.
+    """
+    cpus = sorted(cpus if cpus is not None else os.sched_getaffinity(0))
+    if num_parts > len(cpus):
+        raise ValueError(f"Cannot split {len(cpus)} cores into {num_parts} sets")
+    return [[int(cpu) for cpu in part] for part in np.array_split(cpus, num_parts)]
+
+
+def pin_current_thread(cpus):
+    """
+    Pin the calling thread and its TVM thread pool to the given cores.
+
+    TVM keeps one thread pool per calling thread, so this has to run in the
+    thread that later calls module.run().
+
+    Parameters:
+        cpus (list): Core ids.
+    """
+    os.sched_setaffinity(0, cpus)
+    config_threadpool = tvm.get_global_func("runtime.config_threadpool")
+    config_threadpool(AFFINITY_ONE_CORE_PER_THREAD, len(cpus), [str(cpu) for cpu in cpus])
+
+
+class ExecutorPool:
+    """
+    Serve requests with several executor instances, each pinned to its own cores.
+
+    Every instance runs in its own thread with a private request queue.
+    Requests go to the instances round-robin or to the instance with the
+    fewest pending requests.
+
+    Parameters:
+        executors (list): graph_executor.GraphModule instances, e.g. from create_executors.
+        input_name (str): The name of the input tensor.
+        input_shape (tuple): Input shape.
+        input_dtype (str): Input dtype.
+        dev (tvm.device): TVM device where the model runs.
+        core_sets (list): One list of core ids per executor, or None to leave threads unpinned.
+        policy (str): "round_robin" or "least_loaded".
+    """
+
+    def __init__(self, executors, input_name, input_shape, input_dtype, dev, core_sets=None, policy="least_loaded"):
+        if policy not in ("round_robin", "least_loaded"):
+            raise ValueError(f"Unknown dispatch policy: {policy}")
+        self.policy = policy
+        self.queues = [queue.Queue() for _ in executors]
+        self.pending = [0] * len(executors)
+        self.completed = [0] * len(executors)
+        self._lock = threading.Lock()
+        self._next = itertools.cycle(range(len(executors)))
+        self._threads = []
+        for i, module in enumerate(executors):
+            cpus = core_sets[i] if core_sets is not None else None
+            thread = threading.Thread(
+                target=self._serve,
+                args=(i, module, input_name, input_shape, input_dtype, dev, cpus),
+                name=f"ExecutorPool-{i}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    @classmethod
+    def load(cls, lib_path, graph_json_path, params_path, dev, num_executors,
+             input_name, input_shape, input_dtype, pin=True, policy="least_loaded"):
+        """
+        Load an exported model and create a pool of executors for it.
+
+        Parameters:
+            lib_path (str): Path to the compiled shared library (.so file).
+            graph_json_path (str): Path to the graph JSON file.
+            params_path (str): Path to the parameters file.
+            dev (tvm.device): TVM device where the model runs.
+            num_executors (int): Number of executor instances.
+            input_name (str): The name of the input tensor.
+            input_shape (tuple): Input shape.
+            input_dtype (str): Input dtype.
+            pin (bool): Pin every instance to a disjoint core set (CPU only).
+            policy (str): "round_robin" or "least_loaded".
+
+        Returns:
+            ExecutorPool: The started pool.
+        """
+        lib = runtime.load_module(lib_path)
+        with open(graph_json_path, "r") as f:
+            graph_json = f.read()
+        with open(params_path, "rb") as f:
+            params_bytes = f.read()
+        executors = create_executors(lib, graph_json, params_bytes, dev, num_executors)
+        core_sets = partition_cores(num_executors) if pin and dev.device_type == tvm.cpu(0).device_type else None
+        return cls(executors, input_name, input_shape, input_dtype, dev, core_sets=core_sets, policy=policy)
+
+    def _serve(self, index, module, input_name, input_shape, input_dtype, dev, cpus):
+        if cpus is not None:
+            pin_current_thread(cpus)
+        input_nd = tvm.nd.empty(input_shape, input_dtype, dev)
+        num_outputs = module.get_num_outputs()
+        requests = self.queues[index]
+        while True:
+            item = requests.get()
+            if item is None:
+                break
+            input_data, future = item
+            if future.set_running_or_notify_cancel():
+                try:
+                    input_nd.copyfrom(input_data)
+                    module.set_input(input_name, input_nd)
+                    module.run()
+                    future.set_result([module.get_output(i).numpy() for i in range(num_outputs)])
+                except Exception as err:  # pylint: disable=broad-except
+                    future.set_exception(err)
+            with self._lock:
+                self.pending[index] -= 1
+                self.completed[index] += 1
+
+    def submit(self, input_data):
+        """
+        Queue one inference request.
+
+        Parameters:
+            input_data (numpy.ndarray): Model input.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the list of outputs.
+        """
+        future = Future()
+        with self._lock:
+            if self.policy == "round_robin":
+                index = next(self._next)
+            else:
+                index = int(np.argmin(self.pending))
+            self.pending[index] += 1
+        self.queues[index].put((input_data, future))
+        return future
+
+    def close(self):
+        """
+        Stop all instances once their queued requests are served.
+        """
+        for requests in self.queues:
+            requests.put(None)
+        for thread in self._threads:
+            thread.join()
+
+
+def measure_scaling(lib_path, graph_json_path, params_path, dev, input_name, input_data,
+                    pool_sizes, num_requests=200, pin=True, policy="least_loaded"):
+    """
+    Measure aggregate throughput of the pool for several instance counts.
+
+    Parameters:
+        lib_path (str): Path to the compiled shared library (.so file).
+        graph_json_path (str): Path to the graph JSON file.
+        params_path (str): Path to the parameters file.
+        dev (tvm.device): TVM device where the model runs.
+        input_name (str): The name of the input tensor.
+        input_data (numpy.ndarray): The input data to feed into the model.
+        pool_sizes (list): Instance counts to try.
+        num_requests (int): Requests sent per pool size.
+        pin (bool): Pin instances to disjoint core sets.
+        policy (str): "round_robin" or "least_loaded".
+
+    Returns:
+        list: One dict per pool size with throughput and mean latency.
+    """
+    results = []
+    batch_size = input_data.shape[0]
+    for num_executors in pool_sizes:
+        pool = ExecutorPool.load(
+            lib_path, graph_json_path, params_path, dev, num_executors,
+            input_name, input_data.shape, str(input_data.dtype), pin=pin, policy=policy
+        )
+        # Warm up every instance
+        for future in [pool.submit(input_data) for _ in range(2 * num_executors)]:
+            future.result()
+
+        start_time = time.perf_counter()
+        for future in [pool.submit(input_data) for _ in range(num_requests)]:
+            future.result()
+        elapsed = time.perf_counter() - start_time
+        pool.close()
+
+        results.append({
+            "executors": num_executors,
+            "throughput_per_s": num_requests * batch_size / elapsed,
+            "requests_per_executor": list(pool.completed),
+        })
+        print("%3d executors: %8.1f images/s" % (num_executors, results[-1]["throughput_per_s"]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of a pinned executor pool versus pool size.")
+    parser.add_argument("--device", default="llvm", help="Device to run on, e.g. llvm or cuda")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 4], help="Instance counts to try")
+    parser.add_argument("--num-requests", type=int, default=200, help="Requests per pool size")
+    parser.add_argument("--policy", choices=["round_robin", "least_loaded"], default="least_loaded")
+    parser.add_argument("--no-pin", action="store_true", help="Do not pin instances to cores")
+    args = parser.parse_args()
+
+    from benchmark import get_tvm_device
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)
+    input_dtype = "uint8"
+    input_data = np.random.randint(0, 256, size=input_shape, dtype=input_dtype)
+
+    results = measure_scaling(
+        "g2210_b_4_lib_after.so", "g2210_b_4_graph_after.json", "g2210_b_4_param_after.params",
+        get_tvm_device(args.device), input_name, input_data, args.pool_sizes,
+        num_requests=args.num_requests, pin=not args.no_pin, policy=args.policy
+    )
+    base = results[0]["throughput_per_s"]
+    for result in results:
+        print("%3d executors: %.2fx of %d executor(s)" % (
+            result["executors"], result["throughput_per_s"] / base, results[0]["executors"]
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import argparse
+import glob
+import json
+import os
+
+# AutoTVM reports failed measurements with this cost
+FAILED_COST = 1e9
+
+
+# Records are handled as raw JSON lines so that logs from any machine or TVM
+# build can be merged quickly, without decoding them into TVM objects
+def parse_record(line):
+    """
+    Parse one line of an AutoTVM or auto-scheduler log.
+
+    Parameters:
+        line (str): A line of the log file.
+
+    Returns:
+        dict: {"kind", "workload", "target", "config", "cost", "error_no", "line"},
+            or None if the line is empty or not a tuning record.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    try:
+        row = json.loads(line)
+    except ValueError:
+        return None
+
+    if "input" in row:
+        target, task_name, args, _ = row["input"]
+        workload = json.dumps([task_name, args], separators=(",", ":"))
+        config = json.dumps(row["config"].get("entity", row["config"].get("index")), separators=(",", ":"))
+        costs, error_no = row["result"][0], row["result"][1]
+        kind = "autotvm"
+    elif "i" in row:
+        task = row["i"][0]
+        workload, target = task[0], task[1]
+        config = json.dumps(row["i"][1], separators=(",", ":"))
+        costs, error_no = row["r"][0], row["r"][1]
+        kind = "auto_scheduler"
+    else:
+        return None
+
+    cost = sum(costs) / len(costs) if costs else FAILED_COST
+    return {
+        "kind": kind,
+        "workload": workload,
+        "target": target,
+        "config": config,
+        "cost": cost,
+        "error_no": error_no,
+        "line": json.dumps(row, separators=(",", ":")),
+    }
+
+
+def is_valid(record):
+    """
+    Check whether a record is a successful measurement.
+
+    Parameters:
+        record (dict): Parsed record from parse_record.
+
+    Returns:
+        bool: False for build/run errors, timeouts and failure costs.
+    """
+    return record["error_no"] == 0 and 0 < record["cost"] < FAILED_COST
+
+
+def iter_records(paths):
+    """
+    Yield parsed records from several log files.
+
+    Parameters:
+        paths (list): Log files or glob patterns.
+
+    Yields:
+        dict: Parsed record from parse_record.
+    """
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with open(path, "r") as f:
+                for line in f:
+                    record = parse_record(line)
+                    if record is not None:
+                        yield record
+
+
+def merge_records(records, top_k=1, keep_failed=False):
+    """
+    Dedupe records by (target, workload, config) and keep the top-k per workload.
+
+    Parameters:
+        records (iterable): Parsed records from parse_record.
+        top_k (int): Number of fastest distinct configs kept per (target, workload);
+            0 keeps all of them.
+        keep_failed (bool): Keep failed and timed-out records instead of dropping them.
+
+    Returns:
+        tuple: (dict mapping (target, workload) to records sorted by cost, dict of counters).
+    """
+    stats = {"read": 0, "failed": 0, "duplicates": 0, "pruned": 0}
+    best = {}
+    for record in records:
+        stats["read"] += 1
+        if not keep_failed and not is_valid(record):
+            stats["failed"] += 1
+            continue
+        key = (record["target"], record["workload"])
+        configs = best.setdefault(key, {})
+        seen = configs.get(record["config"])
+        if seen is not None:
+            stats["duplicates"] += 1
+            if seen["cost"] <= record["cost"]:
+                continue
+        configs[record["config"]] = record
+
+    groups = {}
+    for key, configs in best.items():
+        ranked = sorted(configs.values(), key=lambda r: r["cost"])
+        if top_k > 0:
+            stats["pruned"] += max(0, len(ranked) - top_k)
+            ranked = ranked[:top_k]
+        groups[key] = ranked
+    return groups, stats
+
+
+def write_log(groups, out_path, index_path=None):
+    """
+    Write merged records as a compact log, grouped by target and workload.
+
+    An index next to the log maps every (target, workload) group to its byte
+    offset, record count and best cost, so that a loader can read only the
+    workloads it needs.
+
+    Parameters:
+        groups (dict): Output of merge_records.
+        out_path (str): Path of the merged log.
+        index_path (str): Path of the index, defaults to out_path + ".index.json".
+
+    Returns:
+        str: Path of the written index.
+    """
+    index_path = index_path or out_path + ".index.json"
+    index = []
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for (target, workload), records in sorted(groups.items()):
+            index.append({
+                "target": target,
+                "workload": workload,
+                "kind": records[0]["kind"],
+                "offset": f.tell(),
+                "count": len(records),
+                "best_cost": records[0]["cost"],
+            })
+            for record in records:
+                f.write((record["line"] + "\n").encode("utf-8"))
+    os.replace(tmp_path, out_path)
+    with open(index_path, "w") as f:
+        json.dump({"log": os.path.basename(out_path), "groups": index}, f, indent=1)
+    return index_path
+
+
+def read_indexed(out_path, workloads, index_path=None):
+    """
+    Read only the records of the given workloads from an indexed log.
+
+    Parameters:
+        out_path (str): Path of a log written by write_log.
+        workloads (set): Workload keys to read.
+        index_path (str): Path of the index, defaults to out_path + ".index.json".
+
+    Returns:
+        list: Raw record lines.
+    """
+    with open(index_path or out_path + ".index.json", "r") as f:
+        index = json.load(f)["groups"]
+    lines = []
+    with open(out_path, "rb") as f:
+        for group in index:
+            if group["workload"] not in workloads:
+                continue
+            f.seek(group["offset"])
+            for _ in range(group["count"]):
+                lines.append(f.readline().decode("utf-8").rstrip("\n"))
+    return lines
+
+
+def merge_logs(paths, out_path, top_k=1, keep_failed=False):
+    """
+    Merge, dedupe and prune tuning logs into one compact indexed log.
+
+    Inputs may include out_path itself, which is then merged with the new records.
+
+    Parameters:
+        paths (list): Input logs or glob patterns.
+        out_path (str): Path of the merged log.
+        top_k (int): Number of fastest configs kept per workload, 0 keeps all.
+        keep_failed (bool): Keep failed and timed-out records.
+
+    Returns:
+        dict: Counters of read, failed, duplicate, pruned and written records.
+    """
+    groups, stats = merge_records(iter_records(paths), top_k=top_k, keep_failed=keep_failed)
+    write_log(groups, out_path)
+    stats["workloads"] = len(groups)
+    stats["written"] = sum(len(records) for records in groups.values())
+    return stats
+
+
+def print_stats(stats):
+    """
+    Print the counters returned by merge_logs.
+
+    Parameters:
+        stats (dict): Counters from merge_logs.
+    """
+    print(
+        "read %(read)d, dropped failed %(failed)d, duplicates %(duplicates)d, "
+        "pruned %(pruned)d, wrote %(written)d records for %(workloads)d workloads" % stats
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage AutoTVM and auto-scheduler tuning logs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    merge_parser = subparsers.add_parser("merge", help="Merge, dedupe and prune logs")
+    merge_parser.add_argument("logs", nargs="+", help="Input logs or glob patterns")
+    merge_parser.add_argument("-o", "--output", required=True, help="Path of the merged log")
+    merge_parser.add_argument("--top-k", type=int, default=1, help="Configs kept per workload, 0 keeps all")
+    merge_parser.add_argument("--keep-failed", action="store_true", help="Keep failed and timed-out records")
+
+    stats_parser = subparsers.add_parser("stats", help="Show per-workload statistics")
+    stats_parser.add_argument("logs", nargs="+", help="Input logs or glob patterns")
+    args = parser.parse_args()
+
+    if args.command == "merge":
+        stats = merge_logs(args.logs, args.output, top_k=args.top_k, keep_failed=args.keep_failed)
+        print_stats(stats)
+        print(f"Merged log written to {args.output}")
+    else:
+        groups, stats = merge_records(iter_records(args.logs), top_k=0)
+        print("| %-60s | %-20s | Configs | Best (ms) |" % ("Workload", "Target"))
+        for (target, workload), records in sorted(groups.items(), key=lambda item: item[1][0]["cost"]):
+            print("| %-60s | %-20s | %7d | %9.4f |" % (
+                workload[:60], target[:20], len(records), records[0]["cost"] * 1000
+            ))
+        print("read %(read)d records, %(failed)d failed, %(duplicates)d duplicates" % stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+
+def dtype_bytes(dltype):
+    """
+    Size in bytes of one element of a graph JSON dtype such as "float32" or "uint8".
+
+    Parameters:
+        dltype (str): Dtype string from the graph JSON.
+
+    Returns:
+        int: Element size in bytes.
+    """
+    return max(1, np.dtype("float16" if dltype == "bfloat16" else dltype).itemsize)
+
+
+def plan_storage(graph_json, param_names=()):
+    """
+    Compute the memory the graph executor will allocate for a graph JSON.
+
+    Every node entry has a storage id; entries with the same id share one
+    buffer, which is sized for its largest entry. Buffers used by a
+    parameter are counted as parameters, the model input buffers as inputs,
+    and everything else (intermediates and outputs) as activations.
+
+    Parameters:
+        graph_json (str): The graph JSON.
+        param_names (iterable): Names of the parameter nodes, e.g. the keys of the params file.
+
+    Returns:
+        dict: Bytes per category, the buffer count, and the bytes a planner
+            without buffer reuse would need for the activations.
+    """
+    graph = json.loads(graph_json)
+    attrs = graph["attrs"]
+    storage_ids = attrs["storage_id"][1]
+    shapes = attrs["shape"][1]
+    dltypes = attrs["dltype"][1]
+    node_row_ptr = graph["node_row_ptr"]
+    param_names = set(param_names)
+
+    kind_of_entry = {}
+    for node_id in graph["arg_nodes"]:
+        kind = "params" if graph["nodes"][node_id]["name"] in param_names else "inputs"
+        kind_of_entry[node_row_ptr[node_id]] = kind
+
+    storage_bytes = {}
+    storage_kind = {}
+    unshared_activation_bytes = 0
+    for entry, (storage_id, shape, dltype) in enumerate(zip(storage_ids, shapes, dltypes)):
+        size = int(np.prod(shape)) * dtype_bytes(dltype)
+        storage_bytes[storage_id] = max(storage_bytes.get(storage_id, 0), size)
+        kind = kind_of_entry.get(entry, "activations")
+        if kind != "activations" or storage_id not in storage_kind:
+            storage_kind[storage_id] = kind
+        if kind == "activations":
+            unshared_activation_bytes += size
+
+    report = {"params": 0, "inputs": 0, "activations": 0}
+    for storage_id, size in storage_bytes.items():
+        report[storage_kind[storage_id]] += size
+    report["num_buffers"] = len(storage_bytes)
+    report["activations_without_reuse"] = unshared_activation_bytes
+    report["total"] = report["params"] + report["inputs"] + report["activations"]
+    return report
+
+
+def param_file_report(params_path):
+    """
+    Summarize a saved parameter file by dtype.
+
+    Parameters:
+        params_path (str): Path to the parameters file.
+
+    Returns:
+        dict: Parameter count, total bytes, bytes per dtype and file size.
+    """
+    from tvm import runtime
+
+    with open(params_path, "rb") as f:
+        params = runtime.load_param_dict(f.read())
+    by_dtype = {}
+    for value in params.values():
+        size = int(np.prod(value.shape)) * dtype_bytes(value.dtype)
+        by_dtype[value.dtype] = by_dtype.get(value.dtype, 0) + size
+    return {
+        "names": sorted(params),
+        "count": len(params),
+        "bytes": sum(by_dtype.values()),
+        "bytes_by_dtype": by_dtype,
+        "file_bytes": os.path.getsize(params_path),
+    }
+
+
+def read_rss():
+    """
+    Current and peak resident set size of this process, from /proc/self/status.
+
+    Returns:
+        dict: "rss" and "peak_rss" in bytes.
+    """
+    values = {}
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                values[key] = int(value.split()[0]) * 1024
+    return {"rss": values["VmRSS"], "peak_rss": values["VmHWM"]}
+
+
+def reset_peak_rss():
+    """
+    Reset the peak RSS counter so the next read_rss covers only the next phase.
+
+    Needs Linux 4.0 or newer; on failure the peak keeps covering the whole process.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def measure_loading(mode, lib_path, graph_json_path, params_path, device, num_executors,
+                    input_name, input_shape, input_dtype):
+    """
+    Load num_executors executors and run each once, recording RSS per phase.
+
+    Parameters:
+        mode (str): "separate" (performance.load_model per executor) or
+            "shared" (performance.load_executors, parameters read and written once).
+        lib_path (str): Path to the compiled shared library (.so file).
+        graph_json_path (str): Path to the graph JSON file.
+        params_path (str): Path to the parameters file.
+        device (str): Device to run on, see benchmark.get_tvm_device.
+        num_executors (int): Number of executors.
+        input_name (str): The name of the input tensor.
+        input_shape (tuple): Input shape.
+        input_dtype (str): Input dtype.
+
+    Returns:
+        dict: RSS at start, after load and peak during load and run, in bytes.
+    """
+    import tvm
+    from benchmark import get_tvm_device
+    from performance import load_executors, load_model
+
+    dev = get_tvm_device(device)
+    result = {"mode": mode, "executors": num_executors, "start": read_rss()["rss"]}
+    reset_peak_rss()
+    if mode == "shared":
+        executors = load_executors(lib_path, graph_json_path, params_path, dev, num_executors)
+    else:
+        executors = [load_model(lib_path, graph_json_path, params_path, dev) for _ in range(num_executors)]
+    load = read_rss()
+    result["after_load"] = load["rss"]
+    result["peak_load"] = load["peak_rss"]
+
+    reset_peak_rss()
+    input_data = tvm.nd.array(np.random.randint(0, 256, size=input_shape).astype(input_dtype), device=dev)
+    for module in executors:
+        module.set_input(input_name, input_data)
+        module.run()
+    dev.sync()
+    run = read_rss()
+    result["after_run"] = run["rss"]
+    result["peak_run"] = run["peak_rss"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the memory footprint of a compiled model.")
+    parser.add_argument("--lib", default="g2210_b_4_lib_after.so", help="Compiled library")
+    parser.add_argument("--graph", default="g2210_b_4_graph_after.json", help="Graph JSON")
+    parser.add_argument("--params", default="g2210_b_4_param_after.params", help="Parameters file")
+    parser.add_argument("--device", default="llvm", help="Device to run on")
+    parser.add_argument("--executors", type=int, default=4, help="Executors loaded per mode")
+    parser.add_argument("--json", default="g2210_b_4_memory.json", help="Path of the JSON report")
+    parser.add_argument("--child", choices=["separate", "shared"], default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)
+    input_dtype = "uint8"
+
+    if args.child:
+        print(json.dumps(measure_loading(
+            args.child, args.lib, args.graph, args.params, args.device, args.executors,
+            input_name, input_shape, input_dtype,
+        )))
+        return
+
+    params = param_file_report(args.params)
+    with open(args.graph, "r") as f:
+        storage = plan_storage(f.read(), params.pop("names"))
+
+    mb = 2 ** 20
+    print(f"Parameters: {params['count']} tensors, {params['bytes'] / mb:.1f} MB "
+          f"({', '.join(f'{k}: {v / mb:.1f} MB' for k, v in params['bytes_by_dtype'].items())})")
+    print(f"Planned storage per executor: {storage['total'] / mb:.1f} MB in {storage['num_buffers']} buffers "
+          f"(params {storage['params'] / mb:.1f} MB, inputs {storage['inputs'] / mb:.1f} MB, "
+          f"activations {storage['activations'] / mb:.1f} MB, "
+          f"{storage['activations_without_reuse'] / mb:.1f} MB without buffer reuse)")
+
+    # Each mode runs in a fresh process so that the peaks do not mix
+    loading = []
+    for mode in ("separate", "shared"):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode,
+             "--lib", args.lib, "--graph", args.graph, "--params", args.params,
+             "--device", args.device, "--executors", str(args.executors)],
+            check=True, stdout=subprocess.PIPE, text=True,
+        ).stdout
+        loading.append(json.loads(output.strip().splitlines()[-1]))
+
+    print("| Mode     | Executors | Load (MB) | Peak load (MB) | Peak run (MB) |")
+    for entry in loading:
+        print("| %-8s | %9d | %9.1f | %14.1f | %13.1f |" % (
+            entry["mode"], entry["executors"], (entry["after_load"] - entry["start"]) / mb,
+            (entry["peak_load"] - entry["start"]) / mb, (entry["peak_run"] - entry["start"]) / mb,
+        ))
+    with open(args.json, "w") as f:
+        json.dump({"params": params, "storage": storage, "loading": loading}, f, indent=2)
+    print(f"JSON report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
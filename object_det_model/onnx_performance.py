@@ -1,63 +1,39 @@
+import argparse
 import onnxruntime as ort
 import numpy as np
-import time
 
+from benchmark import benchmark_onnx, get_ort_providers, print_summary, write_json_report
 
-def load_onnx_model(onnx_path):
+
+def load_onnx_model(onnx_path, device="cuda"):
     """
-    Load an ONNX model using onnxruntime with GPU (CUDAExecutionProvider).
+    Load an ONNX model using onnxruntime on the given device.
     
     Parameters:
         onnx_path (str): Path to the ONNX model file.
+        device (str): Device to run on, e.g. "cuda" or "cpu".
     
     Returns:
         onnxruntime.InferenceSession: The loaded ONNX runtime session.
     """
-    # Use GPU
-    providers = ["CUDAExecutionProvider"]
+    providers = get_ort_providers(device)
     session = ort.InferenceSession(onnx_path, providers=providers)
     return session
 
 
-def measure_inference_time(session, input_name, input_data, num_runs=1000):
-    """
-    Measure the mean inference time of an ONNX model over a specified number of runs.
-
-    Parameters:
-        session (onnxruntime.InferenceSession): The ONNX runtime session.
-        input_name (str): The name of the input tensor in the ONNX model.
-        input_data (numpy.ndarray): The input data to feed into the model.
-        num_runs (int): Number of inference runs to perform.
-
-    Returns:
-        float: Mean inference time in milliseconds.
-    """
-    # Warm up the model to ensure accurate timing (e.g., GPU context initialization)
-    for _ in range(10):
-        session.run(None, {input_name: input_data})
-
-    # Start timing
-    start_time = time.perf_counter()
-
-    for _ in range(num_runs):
-        session.run(None, {input_name: input_data})
-
-    end_time = time.perf_counter()
-
-    # Calculate mean time in milliseconds
-    total_time = end_time - start_time
-    mean_time = (total_time / num_runs) * 1000  # Convert to ms
-
-    return mean_time
-
-
 def main():
+    parser = argparse.ArgumentParser(description="Benchmark an ONNX model with onnxruntime.")
+    parser.add_argument("--device", default="cuda", help="Device to run on, e.g. cuda or cpu")
+    parser.add_argument("--num-runs", type=int, default=1000, help="Number of timed runs")
+    parser.add_argument("--num-warmup", type=int, default=10, help="Number of warmup runs")
+    parser.add_argument("--json", default="g2210_b_4_onnx_performance.json", help="Path of the JSON report")
+    args = parser.parse_args()
+
     # Configuration (matching your original shapes and dtype)
     onnx_model_path = "g2210_b_4.onnx"
     input_name = "input"  # Adjust if your ONNX input layer has a different name
     input_shape = (4, 3, 640, 640)  # Batch size of 4
     input_dtype = "uint8"
-    num_runs = 1000
 
     # Generate random input data
     input_data = np.random.randint(
@@ -69,13 +45,23 @@ def main():
 
     # Load the ONNX model
     print("Loading ONNX model...")
-    session = load_onnx_model(onnx_model_path)
+    session = load_onnx_model(onnx_model_path, device=args.device)
     print("ONNX model loaded successfully.\n")
 
     # Measure inference time
-    print("Measuring performance with onnxruntime-gpu...")
-    mean_time = measure_inference_time(session, input_name, input_data, num_runs=num_runs)
-    print(f"Mean inference time: {mean_time:.2f} ms over {num_runs} runs\n")
+    print(f"Measuring performance with onnxruntime on {args.device}...")
+    result = benchmark_onnx(
+        session, input_name, input_data, num_runs=args.num_runs, num_warmup=args.num_warmup
+    )
+    print_summary(onnx_model_path, result)
+    print()
+
+    write_json_report(
+        args.json,
+        {onnx_model_path: result},
+        metadata={"input_shape": list(input_shape), "input_dtype": input_dtype, "device": args.device},
+    )
+    print(f"JSON report written to {args.json}")
 
 
 if __name__ == "__main__":
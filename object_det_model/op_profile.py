@@ -0,0 +1,155 @@
+import argparse
+import json
+
+import numpy as np
+import tvm
+from tvm import runtime
+from tvm.contrib.debugger import debug_executor
+
+
+def profile_ops(lib_path, graph_json_path, params_path, dev, input_name, input_data, repeat=5):
+    """
+    Measure the time spent in every fused operator of a compiled model.
+
+    The graph runs repeat times under the debug executor's profiler and the
+    per-call durations are summed per operator name and averaged over the runs.
+
+    Parameters:
+        lib_path (str): Path to the compiled shared library (.so file).
+        graph_json_path (str): Path to the graph JSON file.
+        params_path (str): Path to the parameters file.
+        dev (tvm.device): TVM device where the model runs.
+        input_name (str): The name of the input tensor.
+        input_data (numpy.ndarray): The input data to feed into the model.
+        repeat (int): Number of profiled runs.
+
+    Returns:
+        dict: Operator name -> {"time_us": mean time per run, "calls": calls per run}.
+    """
+    lib = runtime.load_module(lib_path)
+    with open(graph_json_path, "r") as f:
+        graph_json = f.read()
+    with open(params_path, "rb") as f:
+        params = f.read()
+
+    module = debug_executor.create(graph_json, lib, dev, dump_root="/tmp/tvmdbg")
+    module.load_params(params)
+    module.set_input(input_name, tvm.nd.array(input_data, device=dev))
+    # Warm up so that one-time initialization is not attributed to the first operator
+    module.run()
+
+    ops = {}
+    for _ in range(repeat):
+        report = json.loads(module.profile().json())
+        for call in report["calls"]:
+            name = call["Name"]["string"]
+            entry = ops.setdefault(name, {"time_us": 0.0, "calls": 0})
+            entry["time_us"] += call["Duration (us)"]["microseconds"]
+            entry["calls"] += call.get("Count", {}).get("count", 1)
+
+    for entry in ops.values():
+        entry["time_us"] /= repeat
+        entry["calls"] //= repeat
+    return ops
+
+
+def diff_profiles(before, after):
+    """
+    Join two operator profiles by operator name.
+
+    Parameters:
+        before (dict): Profile of the reference build, from profile_ops.
+        after (dict): Profile of the new build, from profile_ops.
+
+    Returns:
+        list: One dict per operator, sorted by time saved (largest regressions last).
+    """
+    total_before = sum(entry["time_us"] for entry in before.values()) or 1.0
+    total_after = sum(entry["time_us"] for entry in after.values()) or 1.0
+    rows = []
+    for name in sorted(set(before) | set(after)):
+        time_before = before.get(name, {}).get("time_us")
+        time_after = after.get(name, {}).get("time_us")
+        row = {
+            "op": name,
+            "before_us": time_before,
+            "after_us": time_after,
+            "before_share_pct": time_before / total_before * 100 if time_before is not None else None,
+            "after_share_pct": time_after / total_after * 100 if time_after is not None else None,
+            "saved_us": None,
+            "speedup": None,
+        }
+        if time_before is not None and time_after is not None:
+            row["saved_us"] = time_before - time_after
+            row["speedup"] = time_before / time_after if time_after > 0 else None
+        rows.append(row)
+    rows.sort(key=lambda r: -(r["saved_us"] if r["saved_us"] is not None else -np.inf))
+    return rows
+
+
+def print_diff(rows, top=30):
+    """
+    Print the joined profile as a ranked table.
+
+    Operators are listed by time after tuning, so the table shows where the
+    remaining time goes; regressed operators are marked with "!".
+
+    Parameters:
+        rows (list): Output of diff_profiles.
+        top (int): Number of operators to print.
+    """
+    def fmt(value, spec):
+        return spec % value if value is not None else "-"
+
+    ranked = sorted(rows, key=lambda r: -(r["after_us"] or 0))
+    print("|   | %-50s | Before (us) | After (us) | Share (%%) | Speedup |" % "Operator")
+    for row in ranked[:top]:
+        regressed = row["saved_us"] is not None and row["saved_us"] < 0
+        print("| %s | %-50s | %11s | %10s | %9s | %7s |" % (
+            "!" if regressed else " ",
+            row["op"][-50:],
+            fmt(row["before_us"], "%.1f"),
+            fmt(row["after_us"], "%.1f"),
+            fmt(row["after_share_pct"], "%.1f"),
+            fmt(row["speedup"], "%.2fx"),
+        ))
+    regressions = [row for row in rows if row["saved_us"] is not None and row["saved_us"] < 0]
+    print(f"{len(regressions)} operators regressed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-operator profile of a model before and after tuning.")
+    parser.add_argument("--device", default="cuda", help="Device to run on, e.g. cuda, llvm")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of profiled runs per build")
+    parser.add_argument("--json", default="g2210_b_4_op_profile.json", help="Path of the JSON report")
+    args = parser.parse_args()
+
+    from benchmark import get_tvm_device
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)
+    input_dtype = "uint8"
+    input_data = np.random.randint(0, 256, size=input_shape, dtype=input_dtype)
+    dev = get_tvm_device(args.device)
+
+    print("Profiling build before tuning...")
+    before = profile_ops(
+        "g2210_b_4_lib_before.so", "g2210_b_4_graph_before.json", "g2210_b_4_param_before.params",
+        dev, input_name, input_data, repeat=args.repeat
+    )
+    print("Profiling build after tuning...")
+    after = profile_ops(
+        "g2210_b_4_lib_after.so", "g2210_b_4_graph_after.json", "g2210_b_4_param_after.params",
+        dev, input_name, input_data, repeat=args.repeat
+    )
+
+    rows = diff_profiles(before, after)
+    print_diff(rows)
+    with open(args.json, "w") as f:
+        json.dump({"device": args.device, "ops": rows}, f, indent=2)
+    print(f"JSON report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
+import argparse
+import os
 import tvm
 from tvm import runtime
 from tvm.contrib import graph_executor
 import numpy as np
-import time
+
+from benchmark import benchmark_tvm, benchmark_tvm_io, get_tvm_device, print_summary, write_json_report
+from results_store import record_run
 
 def load_model(lib_path, graph_json_path, params_path, dev):
     """
@@ -36,42 +40,58 @@ def load_model(lib_path, graph_json_path, params_path, dev):
 
     return module
 
-def measure_inference_time(module, input_name, input_data, dev, num_runs=1000):
+def load_executors(lib_path, graph_json_path, params_path, dev, num_executors):
     """
-    Measure the mean inference time of a TVM module over a specified number of runs.
+    Load several executors of one compiled model that share one set of parameters.
+
+    Unlike calling load_model repeatedly, the library is loaded once and the
+    parameter file is read once, and all executors compute with the first
+    executor's parameter arrays. Every executor's storage pool still
+    allocates its own parameter buffers, so device memory is not saved; on
+    CPU the buffers of the other executors are never written, so their pages
+    do not count towards RSS. See executor_pool.create_executors.
 
     Parameters:
-        module (graph_executor.GraphModule): The TVM module to benchmark.
-        input_name (str): The name of the input tensor.
-        input_data (numpy.ndarray): The input data to feed into the model.
-        dev (tvm.device): TVM device where the model runs.
-        num_runs (int): Number of inference runs to perform.
+        lib_path (str): Path to the compiled shared library (.so file).
+        graph_json_path (str): Path to the graph JSON file.
+        params_path (str): Path to the parameters file.
+        dev (tvm.device): TVM device where the model will run.
+        num_executors (int): Number of executors.
 
     Returns:
-        float: Mean inference time in milliseconds.
+        list: graph_executor.GraphModule instances.
     """
-    # Set the input
-    module.set_input(input_name, tvm.nd.array(input_data, device=dev))
-
-    # Warm up the model to ensure accurate timing
-    for _ in range(10):
-        module.run()
-
-    # Start timing
-    start_time = time.perf_counter()
-
-    for _ in range(num_runs):
-        module.run()
-
-    end_time = time.perf_counter()
+    from executor_pool import create_executors
 
-    # Calculate mean time in milliseconds
-    total_time = end_time - start_time
-    mean_time = (total_time / num_runs) * 1000  # Convert to ms
+    lib = runtime.load_module(lib_path)
+    with open(graph_json_path, "r") as f:
+        graph_json = f.read()
+    with open(params_path, "rb") as f:
+        params = f.read()
+    return create_executors(lib, graph_json, params, dev, num_executors)
 
-    return mean_time
 
 def main():
+    parser = argparse.ArgumentParser(description="Benchmark TVM models before and after tuning.")
+    parser.add_argument("--device", default="cuda", help="Device to run on, e.g. cuda, cuda:1, llvm")
+    parser.add_argument("--num-runs", type=int, default=1000, help="Number of timed runs")
+    parser.add_argument("--num-warmup", type=int, default=10, help="Number of warmup runs")
+    parser.add_argument(
+        "--io-mode",
+        choices=["run", "copy", "bound"],
+        default="run",
+        help="run: time module.run() only; copy: include per-call input/output copies; "
+             "bound: include I/O through preallocated, zero-copy buffers"
+    )
+    parser.add_argument("--json", default="g2210_b_4_performance.json", help="Path of the JSON report")
+    parser.add_argument("--store", default=None, help="Append both runs to this results store (JSON lines)")
+    parser.add_argument("--tag", default=None, help="Tag of the stored runs, e.g. a release name")
+    parser.add_argument("--onnx", default="g2210_b_4.onnx", help="ONNX model, hashed into stored runs")
+    parser.add_argument(
+        "--tuning-log", default="autoscheduler_tuning_log.best.json", help="Tuning log of the tuned build"
+    )
+    args = parser.parse_args()
+
     # Configuration
     input_name = "input"
     input_shape = (4, 3, 640, 640)  # Batch size of 4
@@ -85,8 +105,8 @@ def main():
         dtype=input_dtype
     )
 
-    # Set the target device (CUDA)
-    dev = tvm.device("cuda", 0)
+    # Set the target device
+    dev = get_tvm_device(args.device)
 
     # Paths to the compiled models
     before_lib_path = "g2210_b_4_lib_before.so"
@@ -103,31 +123,73 @@ def main():
     module_after = load_model(after_lib_path, after_graph_json_path, after_params_path, dev)
     print("Models loaded successfully.\n")
 
+    if args.io_mode == "run":
+        run_benchmark = benchmark_tvm
+    else:
+        def run_benchmark(module, *bench_args, **bench_kwargs):
+            return benchmark_tvm_io(module, *bench_args, bound=args.io_mode == "bound", **bench_kwargs)
+
     # Measure inference time before tuning
     print("Measuring performance before tuning...")
-    mean_time_before = measure_inference_time(
+    result_before = run_benchmark(
         module_before,
         input_name,
         input_data,
         dev,
-        num_runs=1000
+        num_runs=args.num_runs,
+        num_warmup=args.num_warmup,
+        keep_samples=args.store is not None
     )
-    print(f"Mean inference time (before tuning): {mean_time_before:.2f} ms\n")
+    print_summary("before tuning", result_before)
+    print()
 
     # Measure inference time after tuning
     print("Measuring performance after tuning...")
-    mean_time_after = measure_inference_time(
+    result_after = run_benchmark(
         module_after,
         input_name,
         input_data,
         dev,
-        num_runs=1000
+        num_runs=args.num_runs,
+        num_warmup=args.num_warmup,
+        keep_samples=args.store is not None
     )
-    print(f"Mean inference time (after tuning): {mean_time_after:.2f} ms\n")
+    print_summary("after tuning", result_after)
+    print()
 
     # Calculate performance improvement
+    mean_time_before = result_before["mean_ms"]
+    mean_time_after = result_after["mean_ms"]
     improvement = ((mean_time_before - mean_time_after) / mean_time_before) * 100
-    print(f"Performance improvement: {improvement:.2f}%")
+    p99_improvement = ((result_before["p99_ms"] - result_after["p99_ms"]) / result_before["p99_ms"]) * 100
+    print(f"Performance improvement: {improvement:.2f}% (p99: {p99_improvement:.2f}%)")
+
+    if args.store:
+        for label, result, tuning_log in (("before", result_before, None), ("after", result_after, args.tuning_log)):
+            entry = record_run(
+                args.store,
+                f"g2210_b_4/{label}/{args.io_mode}",
+                result,
+                model_path=args.onnx if os.path.exists(args.onnx) else None,
+                target=args.device,
+                tuning_log=tuning_log if tuning_log and os.path.exists(tuning_log) else None,
+                tag=args.tag,
+            )
+            # The raw samples live in the store, not in the JSON report
+            del result["latencies_ms"]
+            print(f"Stored run {entry['id']} ({entry['name']}) in {args.store}")
+
+    write_json_report(
+        args.json,
+        {"before": result_before, "after": result_after},
+        metadata={
+            "input_shape": list(input_shape),
+            "input_dtype": input_dtype,
+            "device": args.device,
+            "io_mode": args.io_mode,
+        },
+    )
+    print(f"JSON report written to {args.json}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,357 @@
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from benchmark import summarize_latencies
+
+_END = object()
+
+
+class _Failure:
+    def __init__(self, stage, error):
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    """
+    One step of a frame pipeline.
+
+    Parameters:
+        name (str): Label used in the timing report.
+        fn (callable): Transforms one item into the next stage's item.
+        workers (int): Number of threads running fn. Keep 1 for stages that are
+            not thread-safe, such as a GraphModule; items stay in order either way.
+    """
+
+    def __init__(self, name, fn, workers=1):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.latencies_ms = []
+        self.wait_s = 0.0
+        self.blocked_s = 0.0
+
+    def _timed(self, item):
+        start_time = time.perf_counter()
+        result = self.fn(item)
+        self.latencies_ms.append((time.perf_counter() - start_time) * 1000)
+        return result
+
+    def report(self):
+        """
+        Summarize the time spent in this stage.
+
+        Returns:
+            dict: Latency statistics of fn plus the time spent waiting for input
+                (stage starved) and blocked on a full output queue (stage ahead).
+        """
+        summary = summarize_latencies(np.array(self.latencies_ms)) if self.latencies_ms else {"num_runs": 0}
+        summary["wait_s"] = self.wait_s
+        summary["blocked_s"] = self.blocked_s
+        return summary
+
+
+class Pipeline:
+    """
+    Run stages concurrently, connected by bounded queues.
+
+    While the inference stage runs batch N, preprocessing can already work on
+    batch N+1 and postprocessing on batch N-1. Each queue holds at most
+    queue_size items, so a slow stage applies backpressure instead of letting
+    memory grow.
+
+    Parameters:
+        stages (list): Stage objects, in order.
+        queue_size (int): Capacity of each queue between stages.
+        poll_s (float): How often blocked stages check whether the pipeline was stopped.
+    """
+
+    def __init__(self, stages, queue_size=2, poll_s=0.1):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.poll_s = poll_s
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _put(self, stage, out_q, item):
+        start_time = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    out_q.put(item, timeout=self.poll_s)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        finally:
+            if stage is not None:
+                stage.blocked_s += time.perf_counter() - start_time
+
+    def _get(self, in_q):
+        while not self._stop.is_set():
+            try:
+                return in_q.get(timeout=self.poll_s)
+            except queue.Empty:
+                pass
+        return _END
+
+    def _worker(self, stage, in_q, out_q):
+        pool = ThreadPoolExecutor(stage.workers) if stage.workers > 1 else None
+        try:
+            while True:
+                start_time = time.perf_counter()
+                item = self._get(in_q)
+                if isinstance(item, Future):
+                    item = item.result()
+                stage.wait_s += time.perf_counter() - start_time
+                if item is _END or isinstance(item, _Failure):
+                    self._put(stage, out_q, item)
+                    break
+                if pool is not None:
+                    # The future keeps the item's position in the queue, so order is preserved
+                    item = pool.submit(self._guarded, stage, item)
+                else:
+                    item = self._guarded(stage, item)
+                if not self._put(stage, out_q, item):
+                    break
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+    def _guarded(self, stage, item):
+        try:
+            return stage._timed(item)
+        except Exception as err:  # pylint: disable=broad-except
+            return _Failure(stage.name, err)
+
+    def _feed(self, source, out_q):
+        try:
+            for item in source:
+                if not self._put(None, out_q, item):
+                    return
+        except Exception as err:  # pylint: disable=broad-except
+            self._put(None, out_q, _Failure("source", err))
+            return
+        self._put(None, out_q, _END)
+
+    def run(self, source):
+        """
+        Push every item of source through the stages.
+
+        The stage threads are stopped and joined when the generator finishes,
+        fails or is closed early, e.g. by breaking out of the loop over it.
+
+        Parameters:
+            source (iterable): Input items, e.g. batches of decoded frames.
+
+        Yields:
+            object: Output of the last stage, in source order.
+        """
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._feed, args=(source, queues[0]), daemon=True)]
+        for i, stage in enumerate(self.stages):
+            self._threads.append(threading.Thread(
+                target=self._worker, args=(stage, queues[i], queues[i + 1]), name=stage.name, daemon=True
+            ))
+        for thread in self._threads:
+            thread.start()
+
+        try:
+            while True:
+                item = self._get(queues[-1])
+                if isinstance(item, Future):
+                    item = item.result()
+                if item is _END:
+                    break
+                if isinstance(item, _Failure):
+                    raise RuntimeError(f"Pipeline stage '{item.stage}' failed") from item.error
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Stop all stage threads and wait for them to exit.
+
+        A stage that is inside fn finishes that item first. Safe to call more than once.
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def report(self):
+        """
+        Collect the timing report of every stage.
+
+        Returns:
+            dict: Stage name to report, see Stage.report.
+        """
+        return {stage.name: stage.report() for stage in self.stages}
+
+
+def batch_frames(frames, batch_size):
+    """
+    Group a stream of frames into lists of batch_size frames; the last one may be shorter.
+
+    Parameters:
+        frames (iterable): Decoded frames.
+        batch_size (int): Number of frames per batch.
+
+    Yields:
+        list: Up to batch_size frames.
+    """
+    batch = []
+    for frame in frames:
+        batch.append(frame)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def make_preprocess(input_shape, input_dtype="uint8"):
+    """
+    Create a stage function that resizes HWC frames and packs them into an NCHW batch.
+
+    OpenCV is used for resizing when it is installed, nearest-neighbor NumPy
+    indexing otherwise. Missing frames of a short batch are zero-filled.
+
+    Parameters:
+        input_shape (tuple): Model input shape (N, C, H, W).
+        input_dtype (str): Model input dtype.
+
+    Returns:
+        callable: list of HWC frames -> (NCHW array, number of real frames).
+    """
+    batch_size, _, height, width = input_shape
+    try:
+        import cv2
+    except ImportError:
+        cv2 = None
+
+    def resize(frame):
+        if frame.shape[:2] == (height, width):
+            return frame
+        if cv2 is not None:
+            return cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR)
+        rows = np.arange(height) * frame.shape[0] // height
+        cols = np.arange(width) * frame.shape[1] // width
+        return frame[rows[:, None], cols]
+
+    def preprocess(frames):
+        batch = np.zeros(input_shape, dtype=input_dtype)
+        for i, frame in enumerate(frames):
+            batch[i] = resize(frame).transpose(2, 0, 1)
+        return batch, len(frames)
+
+    return preprocess
+
+
+def make_inference(module, input_name, input_shape, input_dtype, dev):
+    """
+    Create a stage function that runs a graph executor on a packed batch.
+
+    Parameters:
+        module (graph_executor.GraphModule): The TVM module to run.
+        input_name (str): The name of the input tensor.
+        input_shape (tuple): Model input shape.
+        input_dtype (str): Model input dtype.
+        dev (tvm.device): TVM device where the model runs.
+
+    Returns:
+        callable: (NCHW array, number of real frames) -> (list of outputs, number of real frames).
+    """
+    from io_binding import BoundExecutor
+
+    executor = BoundExecutor(module, input_name, input_shape, input_dtype, dev)
+
+    def inference(item):
+        batch, count = item
+        outputs = executor.run(batch)
+        # The executor reuses its output buffers, so hand copies to the next stage
+        return [output[:count].copy() for output in outputs], count
+
+    return inference
+
+
+def print_report(report):
+    """
+    Print the per-stage timing report.
+
+    Parameters:
+        report (dict): Output of Pipeline.report.
+    """
+    print("| %-12s | Items | Mean (ms) | p99 (ms) | Waiting (s) | Blocked (s) |" % "Stage")
+    for name, stage in report.items():
+        if stage["num_runs"] == 0:
+            continue
+        print("| %-12s | %5d | %9.2f | %8.2f | %11.2f | %11.2f |" % (
+            name, stage["num_runs"], stage["mean_ms"], stage["p99_ms"], stage["wait_s"], stage["blocked_s"]
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure end-to-end FPS of the frame pipeline.")
+    parser.add_argument("--lib", default="g2210_b_4_lib_after.so", help="Exported library built for --device")
+    parser.add_argument("--device", default="llvm", help="Device to run on, e.g. llvm or cuda")
+    parser.add_argument("--num-frames", type=int, default=200, help="Number of synthetic frames")
+    parser.add_argument("--preprocess-workers", type=int, default=2, help="Threads for preprocessing")
+    args = parser.parse_args()
+
+    from tvm import runtime
+    from tvm.contrib import graph_executor
+    from benchmark import get_tvm_device
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)
+    input_dtype = "uint8"
+    frame_shape = (720, 1280, 3)
+
+    dev = get_tvm_device(args.device)
+    lib = runtime.load_module(args.lib)
+    module = graph_executor.GraphModule(lib["default"](dev))
+
+    frames = [np.random.randint(0, 256, size=frame_shape, dtype="uint8") for _ in range(8)]
+
+    def source():
+        for i in range(args.num_frames):
+            yield frames[i % len(frames)]
+
+    def postprocess(item):
+        outputs, count = item
+        return [float(output.max()) for output in outputs], count
+
+    preprocess = make_preprocess(input_shape, input_dtype)
+    inference = make_inference(module, input_name, input_shape, input_dtype, dev)
+
+    # Serial reference: every batch goes through all steps before the next one starts
+    start_time = time.perf_counter()
+    for batch in batch_frames(source(), input_shape[0]):
+        postprocess(inference(preprocess(batch)))
+    serial_fps = args.num_frames / (time.perf_counter() - start_time)
+
+    pipeline = Pipeline([
+        Stage("preprocess", preprocess, workers=args.preprocess_workers),
+        Stage("inference", inference),
+        Stage("postprocess", postprocess),
+    ])
+    start_time = time.perf_counter()
+    for _ in pipeline.run(batch_frames(source(), input_shape[0])):
+        pass
+    pipelined_fps = args.num_frames / (time.perf_counter() - start_time)
+
+    print_report(pipeline.report())
+    print(f"Serial: {serial_fps:.1f} FPS, pipelined: {pipelined_fps:.1f} FPS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+import tvm
+from tvm import relay
+
+PRECISIONS = ("fp32", "fp16", "int8")
+MIXED_PRECISION_OPS = ("nn.conv2d", "nn.dense")
+# relay.quantize.qconfig settings of the int8 mode
+INT8_QCONFIG = {
+    "calibrate_mode": "kl_divergence",
+    "weight_scale": "max",
+    "skip_conv_layers": [0],
+}
+
+
+def load_calibration_set(folder, input_name, input_shape, input_dtype, limit=64):
+    """
+    Load sample inputs from a folder and group them into model-sized batches.
+
+    .npy files may hold one sample (C, H, W) or a batch (N, C, H, W). Images
+    (.jpg, .png) are read with OpenCV when it is installed, resized to the
+    model resolution and converted from HWC to CHW.
+
+    Parameters:
+        folder (str): Directory with sample inputs.
+        input_name (str): The name of the input tensor.
+        input_shape (tuple): Model input shape (N, C, H, W).
+        input_dtype (str): Model input dtype.
+        limit (int): Maximum number of samples to use.
+
+    Returns:
+        tuple: (list of {input_name: batch} dicts, sorted list of the files used).
+    """
+    batch_size, _, height, width = input_shape
+    files = sorted(
+        path for path in glob.glob(os.path.join(folder, "*"))
+        if os.path.splitext(path)[1].lower() in (".npy", ".jpg", ".jpeg", ".png")
+    )
+    samples = []
+    used = []
+    for path in files:
+        if len(samples) >= limit:
+            break
+        if path.endswith(".npy"):
+            data = np.load(path)
+            data = data[None] if data.ndim == 3 else data
+        else:
+            import cv2
+
+            image = cv2.resize(cv2.imread(path), (width, height))
+            data = image.transpose(2, 0, 1)[None]
+        samples.extend(data.astype(input_dtype))
+        used.append(path)
+
+    if not samples:
+        raise ValueError(f"No calibration samples found in {folder}")
+    samples = samples[:limit]
+    batches = []
+    for start in range(0, len(samples) - batch_size + 1, batch_size):
+        batches.append({input_name: np.stack(samples[start:start + batch_size])})
+    if not batches:
+        raise ValueError(f"Need at least {batch_size} calibration samples, found {len(samples)}")
+    return batches, used
+
+
+def convert_precision(mod, params, precision, calibration_set=None,
+                      calculation_dtype="float16", acc_dtype="float32",
+                      mixed_precision_ops=MIXED_PRECISION_OPS):
+    """
+    Rewrite a Relay module for the requested precision.
+
+    Parameters:
+        mod (tvm.IRModule): The fp32 Relay module.
+        params (dict): Model parameters.
+        precision (str): "fp32", "fp16" (mixed precision) or "int8".
+        calibration_set (list): {input_name: batch} dicts, required for int8.
+        calculation_dtype (str): Compute dtype of mixed-precision operators.
+        acc_dtype (str): Accumulation dtype of mixed-precision operators.
+        mixed_precision_ops (tuple): Operators converted to calculation_dtype.
+
+    Returns:
+        tuple: (mod, params) in the requested precision.
+    """
+    if precision == "fp32":
+        return mod, params
+    if precision == "fp16":
+        from tvm.driver.tvmc.transform import apply_graph_transforms
+
+        mod = apply_graph_transforms(
+            mod,
+            {
+                "mixed_precision": True,
+                "mixed_precision_ops": list(mixed_precision_ops),
+                "mixed_precision_calculation_type": calculation_dtype,
+                "mixed_precision_acc_type": acc_dtype,
+            },
+        )
+        return mod, params
+    if precision == "int8":
+        if not calibration_set:
+            raise ValueError("int8 quantization needs a calibration set")
+        with relay.quantize.qconfig(**INT8_QCONFIG):
+            mod = relay.quantize.quantize(mod, params, dataset=calibration_set)
+        # quantize() binds the parameters into the module
+        return mod, {}
+    raise ValueError(f"Unknown precision {precision!r}, expected one of {PRECISIONS}")
+
+
+def precision_cache_key(precision, calibration_files=(), calculation_dtype="float16", acc_dtype="float32",
+                        mixed_precision_ops=MIXED_PRECISION_OPS):
+    """
+    Describe every convert_precision setting that changes the built model.
+
+    Pass the result as extra to artifact_cache.build_cached, so that changing
+    any of these settings rebuilds instead of returning a stale artifact.
+
+    Parameters:
+        precision (str): "fp32", "fp16" or "int8".
+        calibration_files (list): Files of the calibration set, used for int8.
+        calculation_dtype (str): Compute dtype of mixed-precision operators.
+        acc_dtype (str): Accumulation dtype of mixed-precision operators.
+        mixed_precision_ops (tuple): Operators converted to calculation_dtype.
+
+    Returns:
+        dict: The settings that apply to this precision.
+    """
+    key = {"precision": precision}
+    if precision == "fp16":
+        key["calculation_dtype"] = calculation_dtype
+        key["acc_dtype"] = acc_dtype
+        key["mixed_precision_ops"] = sorted(mixed_precision_ops)
+    elif precision == "int8":
+        key["qconfig"] = INT8_QCONFIG
+        key["calibration_sha256"] = hash_files(calibration_files)
+    return key
+
+
+def hash_files(paths):
+    """
+    Hash the content of several files, e.g. a calibration set.
+
+    Parameters:
+        paths (list): File paths.
+
+    Returns:
+        str: Hex digest over all files in the given order.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def compare_outputs(reference, outputs):
+    """
+    Measure how far outputs deviate from the fp32 reference.
+
+    Parameters:
+        reference (list): fp32 outputs as numpy arrays.
+        outputs (list): Outputs of the lower-precision build.
+
+    Returns:
+        dict: Max and mean absolute error and cosine similarity over all outputs.
+    """
+    ref = np.concatenate([r.astype(np.float64).ravel() for r in reference])
+    out = np.concatenate([o.astype(np.float64).ravel() for o in outputs])
+    norm = np.linalg.norm(ref) * np.linalg.norm(out)
+    return {
+        "max_abs_err": float(np.max(np.abs(ref - out))),
+        "mean_abs_err": float(np.mean(np.abs(ref - out))),
+        "cosine": float(np.dot(ref, out) / norm) if norm > 0 else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32, fp16 and int8 builds on latency, size and accuracy.")
+    parser.add_argument("--onnx", default="g2210_b_4.onnx", help="ONNX model")
+    parser.add_argument("--calibration-dir", default="calibration", help="Folder of sample inputs")
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=list(PRECISIONS))
+    parser.add_argument("--target", default="llvm", help="Compilation target")
+    parser.add_argument("--device", default="llvm", help="Device to benchmark on")
+    parser.add_argument("--num-runs", type=int, default=100, help="Number of timed runs per build")
+    parser.add_argument("--json", default="g2210_b_4_precision.json", help="Path of the JSON report")
+    args = parser.parse_args()
+
+    import onnx
+    from tvm.contrib import graph_executor
+    from artifact_cache import build_cached
+    from benchmark import benchmark_tvm, get_tvm_device
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)
+    input_dtype = "uint8"
+    shape_dict = {input_name: input_shape}
+    dtype_dict = {input_name: input_dtype}
+
+    calibration_set, calibration_files = load_calibration_set(
+        args.calibration_dir, input_name, input_shape, input_dtype
+    )
+    # The first calibration batch doubles as the accuracy probe
+    probe = calibration_set[0][input_name]
+    mod, params = relay.frontend.from_onnx(onnx.load(args.onnx), shape=shape_dict, dtype=dtype_dict)
+    dev = get_tvm_device(args.device)
+
+    report = {}
+    reference = None
+    for precision in ["fp32"] + [p for p in args.precisions if p != "fp32"]:
+        print(f"Building {precision}...")
+        lib, paths, _ = build_cached(
+            args.onnx, shape_dict, dtype_dict, target=args.target, opt_level=3,
+            relay_module=(mod, params),
+            transform=lambda m, p, precision=precision: convert_precision(m, p, precision, calibration_set),
+            extra=precision_cache_key(precision, calibration_files),
+        )
+        module = graph_executor.GraphModule(lib["default"](dev))
+        module.set_input(input_name, tvm.nd.array(probe, device=dev))
+        module.run()
+        outputs = [module.get_output(i).numpy() for i in range(module.get_num_outputs())]
+        if reference is None:
+            reference = outputs
+
+        entry = benchmark_tvm(module, input_name, probe, dev, num_runs=args.num_runs)
+        entry["lib_bytes"] = os.path.getsize(paths["lib"])
+        entry["params_bytes"] = os.path.getsize(paths["params"])
+        entry["artifact"] = os.path.dirname(paths["lib"])
+        entry.update(compare_outputs(reference, outputs))
+        report[precision] = entry
+
+    print("| Precision | p50 (ms) | p99 (ms) | Size (MB) | Max abs err | Cosine |")
+    for precision, entry in report.items():
+        size_mb = (entry["lib_bytes"] + entry["params_bytes"]) / 2 ** 20
+        print("| %-9s | %8.2f | %8.2f | %9.1f | %11.4g | %6.4f |" % (
+            precision, entry["p50_ms"], entry["p99_ms"], size_mb, entry["max_abs_err"], entry["cosine"]
+        ))
+    with open(args.json, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"JSON report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import json
+
+import numpy as np
+import tvm
+from tvm import relay
+
+
+def prepend_preprocess(mod, input_name, frame_shape, bgr_to_rgb=True, mean=None, std=None, resize=None):
+    """
+    Prepend camera-frame preprocessing to the main function of a Relay module.
+
+    The new main takes raw uint8 frames (N, H, W, 3) under the original input
+    name and applies, in order: an optional bilinear resize, BGR to RGB, HWC to
+    CHW and an optional mean/std normalization, then casts to the dtype the
+    model expects. The preprocessing then runs in-graph as compiled kernels
+    on the target device instead of as NumPy code on the host. Whether those
+    kernels merge with the first convolution depends on FuseOps and the
+    schedules; the transpose and reverse usually remain kernels of their own.
+
+    Normalization is only meaningful for models with a float input; a uint8
+    model such as g2210_b_4 already normalizes inside its ONNX graph, so leave
+    mean and std unset for it.
+
+    Parameters:
+        mod (tvm.IRModule): The Relay module from the ONNX frontend.
+        input_name (str): The name of the input tensor.
+        frame_shape (tuple): Shape of the raw frames, (N, H, W, 3).
+        bgr_to_rgb (bool): Swap the channel order, e.g. for OpenCV frames.
+        mean (tuple): Per-channel mean in RGB order, on the 0-255 scale, or None.
+        std (tuple): Per-channel standard deviation in RGB order, or None.
+        resize (tuple): (height, width) the frames are resized to, or None
+            when they already have the model resolution.
+
+    Returns:
+        tvm.IRModule: The module with the raw-frame input.
+    """
+    mod = relay.transform.InferType()(mod)
+    main = mod["main"]
+    model_input = [param for param in main.params if param.name_hint == input_name][0]
+    model_dtype = model_input.checked_type.dtype
+
+    frame = relay.var(input_name, shape=frame_shape, dtype="uint8")
+    x = frame
+    needs_float = resize is not None or mean is not None or std is not None
+    if needs_float:
+        x = relay.cast(x, "float32")
+    if resize is not None:
+        x = relay.image.resize2d(x, size=resize, layout="NHWC", method="linear",
+                                 coordinate_transformation_mode="half_pixel")
+    if bgr_to_rgb:
+        x = relay.reverse(x, axis=3)
+    x = relay.transpose(x, axes=(0, 3, 1, 2))
+    if mean is not None:
+        x = relay.subtract(x, relay.const(np.array(mean, dtype="float32").reshape(1, 3, 1, 1)))
+    if std is not None:
+        # Multiply by the reciprocal rather than divide, which is cheaper per element
+        x = relay.multiply(x, relay.const((1.0 / np.array(std, dtype="float32")).reshape(1, 3, 1, 1)))
+    if needs_float and model_dtype != "float32":
+        if model_dtype.startswith(("uint", "int")):
+            info = np.iinfo(model_dtype)
+            x = relay.clip(relay.round(x), float(info.min), float(info.max))
+        x = relay.cast(x, model_dtype)
+
+    body = relay.bind(main.body, {model_input: x})
+    params = [frame] + [param for param in main.params if param.name_hint != input_name]
+    new_mod = tvm.IRModule.from_expr(relay.Function(params, body))
+    for global_var, func in mod.functions.items():
+        if global_var.name_hint != "main":
+            new_mod[global_var] = func
+    return relay.transform.InferType()(new_mod)
+
+
+def numpy_preprocess(frames, bgr_to_rgb=True, mean=None, std=None, model_dtype="uint8"):
+    """
+    Host-side reference of prepend_preprocess, without the resize.
+
+    Parameters:
+        frames (numpy.ndarray): Raw uint8 frames (N, H, W, 3).
+        bgr_to_rgb (bool): Swap the channel order.
+        mean (tuple): Per-channel mean, or None.
+        std (tuple): Per-channel standard deviation, or None.
+        model_dtype (str): Dtype the model expects.
+
+    Returns:
+        numpy.ndarray: Model input (N, 3, H, W).
+    """
+    x = frames[..., ::-1] if bgr_to_rgb else frames
+    x = x.transpose(0, 3, 1, 2)
+    if mean is None and std is None:
+        return np.ascontiguousarray(x).astype(model_dtype)
+    x = x.astype(np.float32)
+    if mean is not None:
+        x = x - np.array(mean, dtype=np.float32).reshape(1, 3, 1, 1)
+    if std is not None:
+        x = x * (1.0 / np.array(std, dtype=np.float32)).reshape(1, 3, 1, 1)
+    if np.dtype(model_dtype).kind in "iu":
+        info = np.iinfo(model_dtype)
+        x = np.clip(np.round(x), info.min, info.max)
+    return x.astype(model_dtype)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the detector with preprocessing fused into the graph.")
+    parser.add_argument("--onnx", default="g2210_b_4.onnx", help="ONNX model")
+    parser.add_argument("--target", default="llvm", help="Compilation target")
+    parser.add_argument("--device", default="llvm", help="Device to run on")
+    parser.add_argument("--frame-size", nargs=2, type=int, default=None, metavar=("H", "W"),
+                        help="Raw frame resolution, resized to the model resolution when it differs")
+    parser.add_argument("--no-bgr-to-rgb", action="store_true", help="Frames are already RGB")
+    parser.add_argument("--mean", nargs=3, type=float, default=None, help="Per-channel mean (RGB)")
+    parser.add_argument("--std", nargs=3, type=float, default=None, help="Per-channel std (RGB)")
+    parser.add_argument("--num-runs", type=int, default=100, help="Number of timed runs")
+    parser.add_argument("--json", default="g2210_b_4_preprocess.json", help="Path of the JSON report")
+    args = parser.parse_args()
+
+    import onnx
+    from tvm.contrib import graph_executor
+    from artifact_cache import build_cached
+    from benchmark import get_tvm_device, measure_latencies, summarize_latencies, write_json_report
+
+    # Configuration
+    input_name = "input"
+    input_shape = (4, 3, 640, 640)
+    input_dtype = "uint8"
+    shape_dict = {input_name: input_shape}
+    dtype_dict = {input_name: input_dtype}
+
+    batch, _, height, width = input_shape
+    frame_height, frame_width = args.frame_size or (height, width)
+    frame_shape = (batch, frame_height, frame_width, 3)
+    resize = (height, width) if (frame_height, frame_width) != (height, width) else None
+    options = {
+        "frame_shape": list(frame_shape),
+        "bgr_to_rgb": not args.no_bgr_to_rgb,
+        "mean": args.mean,
+        "std": args.std,
+        "resize": list(resize) if resize else None,
+    }
+
+    mod, params = relay.frontend.from_onnx(onnx.load(args.onnx), shape=shape_dict, dtype=dtype_dict)
+    dev = get_tvm_device(args.device)
+    frames = np.random.randint(0, 256, size=frame_shape, dtype="uint8")
+
+    lib_plain, _, _ = build_cached(
+        args.onnx, shape_dict, dtype_dict, target=args.target, relay_module=(mod, params)
+    )
+    lib_fused, paths_fused, _ = build_cached(
+        args.onnx, shape_dict, dtype_dict, target=args.target, relay_module=(mod, params),
+        transform=lambda m, p: (prepend_preprocess(
+            m, input_name, frame_shape, options["bgr_to_rgb"], args.mean, args.std, resize
+        ), p),
+        extra={"preprocess": options},
+    )
+    plain = graph_executor.GraphModule(lib_plain["default"](dev))
+    fused = graph_executor.GraphModule(lib_fused["default"](dev))
+
+    def run_host():
+        # Without a resize, the host path is the NumPy reference
+        model_input = numpy_preprocess(frames, options["bgr_to_rgb"], args.mean, args.std, input_dtype)
+        plain.set_input(input_name, tvm.nd.array(model_input, device=dev))
+        plain.run()
+        dev.sync()
+
+    def run_fused():
+        fused.set_input(input_name, tvm.nd.array(frames, device=dev))
+        fused.run()
+        dev.sync()
+
+    report = {"options": options}
+    if resize is None:
+        run_host()
+        run_fused()
+        error = max(
+            float(np.max(np.abs(plain.get_output(i).numpy().astype(np.float64)
+                                - fused.get_output(i).numpy().astype(np.float64))))
+            for i in range(plain.get_num_outputs())
+        )
+        report["max_abs_err_vs_host"] = error
+        print(f"Max abs difference to host preprocessing: {error:.4g}")
+        warmup_ms, latencies_ms = measure_latencies(run_host, args.num_runs)
+        report["host"] = summarize_latencies(latencies_ms, warmup_ms, batch_size=batch)
+
+    warmup_ms, latencies_ms = measure_latencies(run_fused, args.num_runs)
+    report["fused"] = summarize_latencies(latencies_ms, warmup_ms, batch_size=batch)
+    for name in ("host", "fused"):
+        if name in report:
+            print(f"{name:>5}: p50 {report[name]['p50_ms']:.2f} ms, p99 {report[name]['p99_ms']:.2f} ms")
+    print(f"Fused artifact: {paths_fused['lib']}")
+    write_json_report(args.json, report, metadata={"device": args.device, "target": args.target})
+    print(f"JSON report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+DEFAULT_STORE = "benchmark_results.jsonl"
+
+
+def record_run(store_path, name, summary, model_path=None, target=None, tuning_log=None,
+               latencies_ms=None, tag=None, extra=None):
+    """
+    Append one benchmark run to a JSON lines results store.
+
+    Parameters:
+        store_path (str): Path of the store, created if missing.
+        name (str): Label of the benchmarked configuration, e.g. "g2210_b_4/after".
+        summary (dict): Summary statistics, see benchmark.summarize_latencies.
+        model_path (str): Model file whose hash identifies the model, or None.
+        target (str): Compilation target.
+        tuning_log (str): Tuning log applied to the build, or None.
+        latencies_ms (list): Raw per-run latencies; defaults to summary["latencies_ms"].
+        tag (str): Optional label to select the run as a baseline later, e.g. a release.
+        extra (dict): Any other information to keep with the run.
+
+    Returns:
+        dict: The stored entry.
+    """
+    import tvm
+    from artifact_cache import hash_file
+
+    summary = dict(summary)
+    if latencies_ms is None:
+        latencies_ms = summary.pop("latencies_ms", None)
+    if latencies_ms is None:
+        raise ValueError("The results store needs the raw latencies, benchmark with keep_samples=True")
+
+    entry = {
+        "id": len(load_runs(store_path)),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "name": name,
+        "tag": tag,
+        "model_sha256": hash_file(model_path) if model_path else None,
+        "target": str(target) if target is not None else None,
+        "tvm_version": tvm.__version__,
+        "tuning_log_sha256": hash_file(tuning_log) if tuning_log else None,
+        "summary": summary,
+        "latencies_ms": [float(x) for x in latencies_ms],
+        "extra": extra or {},
+    }
+    with open(store_path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def load_runs(store_path, name=None):
+    """
+    Read all runs from a results store.
+
+    Parameters:
+        store_path (str): Path of the store.
+        name (str): Only return runs with this label, or None for all.
+
+    Returns:
+        list: Stored entries in insertion order.
+    """
+    if not os.path.exists(store_path):
+        return []
+    runs = []
+    with open(store_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                runs.append(json.loads(line))
+    return [run for run in runs if name is None or run["name"] == name]
+
+
+def select_run(runs, selector):
+    """
+    Pick one run by id, tag, "latest" or "previous".
+
+    Parameters:
+        runs (list): Candidate runs, in insertion order.
+        selector (str): Run id, tag, "latest" or "previous" (the one before latest).
+
+    Returns:
+        dict: The selected run.
+    """
+    if selector == "latest" and runs:
+        return runs[-1]
+    if selector == "previous" and len(runs) > 1:
+        return runs[-2]
+    for run in reversed(runs):
+        if str(run["id"]) == selector or run["tag"] == selector:
+            return run
+    raise KeyError(f"No run matches {selector!r}")
+
+
+def mann_whitney_greater(baseline, candidate):
+    """
+    One-sided Mann-Whitney U test that candidate latencies are larger than baseline latencies.
+
+    Uses scipy when it is installed, otherwise the normal approximation with
+    tie correction, which is accurate for the sample sizes of a benchmark run.
+
+    Parameters:
+        baseline (numpy.ndarray): Baseline latencies.
+        candidate (numpy.ndarray): Candidate latencies.
+
+    Returns:
+        float: p-value.
+    """
+    try:
+        from scipy.stats import mannwhitneyu
+    except ImportError:
+        pass
+    else:
+        return float(mannwhitneyu(candidate, baseline, alternative="greater").pvalue)
+
+    n1, n2 = len(candidate), len(baseline)
+    combined = np.concatenate([candidate, baseline])
+    order = combined.argsort(kind="mergesort")
+    ranks = np.empty(len(combined), dtype=np.float64)
+    ranks[order] = np.arange(1, len(combined) + 1)
+    # Average the ranks of tied values
+    values, inverse, counts = np.unique(combined, return_inverse=True, return_counts=True)
+    rank_sums = np.bincount(inverse, weights=ranks)
+    ranks = (rank_sums / counts)[inverse]
+
+    u = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    tie_term = ((counts ** 3 - counts).sum()) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def bootstrap_median_ratio(baseline, candidate, num_resamples=2000, confidence=0.99, seed=0):
+    """
+    Bootstrap confidence interval of median(candidate) / median(baseline).
+
+    Parameters:
+        baseline (numpy.ndarray): Baseline latencies.
+        candidate (numpy.ndarray): Candidate latencies.
+        num_resamples (int): Number of bootstrap resamples.
+        confidence (float): Two-sided confidence level.
+        seed (int): Random seed, so repeated comparisons agree.
+
+    Returns:
+        tuple: (lower bound, upper bound) of the ratio.
+    """
+    rng = np.random.default_rng(seed)
+    base = np.median(rng.choice(baseline, (num_resamples, len(baseline))), axis=1)
+    cand = np.median(rng.choice(candidate, (num_resamples, len(candidate))), axis=1)
+    ratios = cand / base
+    alpha = (1 - confidence) / 2
+    return float(np.quantile(ratios, alpha)), float(np.quantile(ratios, 1 - alpha))
+
+
+def compare_runs(baseline, candidate, method="mannwhitney", alpha=0.01, min_slowdown_pct=2.0):
+    """
+    Decide whether a candidate run is a significant regression over a baseline.
+
+    A regression must be both statistically significant and larger than
+    min_slowdown_pct, so that noise-level shifts on a quiet machine do not
+    block a deployment.
+
+    Parameters:
+        baseline (dict): Baseline run from the store.
+        candidate (dict): Candidate run from the store.
+        method (str): "mannwhitney" or "bootstrap".
+        alpha (float): Significance level.
+        min_slowdown_pct (float): Smallest median slowdown that counts as a regression.
+
+    Returns:
+        dict: Median change, the test result and a "regression" flag.
+    """
+    base = np.asarray(baseline["latencies_ms"], dtype=np.float64)
+    cand = np.asarray(candidate["latencies_ms"], dtype=np.float64)
+    change_pct = (np.median(cand) / np.median(base) - 1) * 100
+    result = {
+        "baseline_id": baseline["id"],
+        "candidate_id": candidate["id"],
+        "baseline_p50_ms": float(np.median(base)),
+        "candidate_p50_ms": float(np.median(cand)),
+        "change_pct": float(change_pct),
+        "method": method,
+    }
+    if method == "mannwhitney":
+        result["p_value"] = mann_whitney_greater(base, cand)
+        significant = result["p_value"] < alpha
+    elif method == "bootstrap":
+        low, high = bootstrap_median_ratio(base, cand, confidence=1 - alpha)
+        result["ratio_ci"] = [low, high]
+        significant = low > 1.0
+    else:
+        raise ValueError(f"Unknown method {method!r}")
+    result["regression"] = bool(significant and change_pct > min_slowdown_pct)
+    return result
+
+
+def describe_differences(baseline, candidate):
+    """
+    List the build inputs that differ between two runs.
+
+    Parameters:
+        baseline (dict): Baseline run.
+        candidate (dict): Candidate run.
+
+    Returns:
+        list: Names of the differing fields.
+    """
+    fields = ["model_sha256", "target", "tvm_version", "tuning_log_sha256"]
+    return [field for field in fields if baseline.get(field) != candidate.get(field)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect stored benchmark runs and gate on regressions.")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="Path of the results store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="List stored runs")
+    list_parser.add_argument("--name", default=None, help="Only runs with this label")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare a candidate run with a baseline")
+    compare_parser.add_argument("--name", required=True, help="Label of the runs to compare")
+    compare_parser.add_argument("--baseline", default="previous", help="Run id, tag or 'previous'")
+    compare_parser.add_argument("--candidate", default="latest", help="Run id, tag or 'latest'")
+    compare_parser.add_argument("--method", choices=["mannwhitney", "bootstrap"], default="mannwhitney")
+    compare_parser.add_argument("--alpha", type=float, default=0.01, help="Significance level")
+    compare_parser.add_argument("--min-slowdown", type=float, default=2.0, help="Smallest slowdown in %% to flag")
+    args = parser.parse_args()
+
+    runs = load_runs(args.store, args.name)
+    if args.command == "list":
+        print("|   ID | %-19s | %-24s | %-8s | %-12s | p50 (ms) | p99 (ms) |" % ("Time", "Name", "Tag", "Model"))
+        for run in runs:
+            print("| %4d | %-19s | %-24s | %-8s | %-12s | %8.2f | %8.2f |" % (
+                run["id"], run["timestamp"], run["name"][-24:], run["tag"] or "-",
+                (run["model_sha256"] or "-")[:12], run["summary"]["p50_ms"], run["summary"]["p99_ms"],
+            ))
+        return
+
+    baseline = select_run(runs, args.baseline)
+    candidate = select_run(runs, args.candidate)
+    result = compare_runs(baseline, candidate, args.method, args.alpha, args.min_slowdown)
+    print(json.dumps(result, indent=2))
+    differences = describe_differences(baseline, candidate)
+    if differences:
+        print(f"Build inputs that changed: {', '.join(differences)}")
+    if result["regression"]:
+        print(f"REGRESSION: p50 {result['change_pct']:+.2f}% ({args.name}, run {candidate['id']} vs {baseline['id']})")
+        sys.exit(1)
+    print("No significant regression.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+
+def _wait_for_port(host, port, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1.0):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Nothing listening on {host}:{port} after {timeout} s")
+
+
+class RPCFarm:
+    """
+    A local RPC tracker plus N RPC servers, each pinned to its own cores.
+
+    All servers register under one key, so AutoTVM and auto-scheduler
+    RPCRunners can measure on them in parallel, the same way they would
+    use a farm of Android devices behind a tracker.
+
+    Parameters:
+        num_servers (int): Number of RPC servers (measurement slots).
+        key (str): Device key the servers register under.
+        host (str): Address the tracker and servers bind to.
+        tracker_port (int): Port of the tracker.
+        server_port (int): First port tried for the servers.
+        cpus (list): Cores to split across the servers, defaults to all available cores.
+    """
+
+    def __init__(self, num_servers, key="local", host="127.0.0.1", tracker_port=9190,
+                 server_port=9090, cpus=None):
+        from executor_pool import partition_cores
+
+        self.num_servers = num_servers
+        self.key = key
+        self.host = host
+        self.tracker_port = tracker_port
+        self.server_port = server_port
+        self.core_sets = partition_cores(num_servers, cpus)
+        self.processes = []
+
+    def start(self):
+        """
+        Launch the tracker and the servers and wait until all servers are registered.
+
+        If startup fails, the processes already launched are stopped again.
+
+        Returns:
+            RPCFarm: self.
+        """
+        try:
+            self._launch()
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    def _launch(self):
+        self.processes.append(subprocess.Popen([
+            sys.executable, "-m", "tvm.exec.rpc_tracker",
+            "--host", self.host, "--port", str(self.tracker_port),
+        ]))
+        _wait_for_port(self.host, self.tracker_port)
+
+        for i, cpus in enumerate(self.core_sets):
+            env = dict(os.environ, TVM_NUM_THREADS=str(len(cpus)))
+            self.processes.append(subprocess.Popen(
+                [
+                    sys.executable, "-m", "tvm.exec.rpc_server",
+                    "--host", self.host,
+                    # Every server searches its own port range so they never collide
+                    "--port", str(self.server_port + i * 100),
+                    "--port-end", str(self.server_port + i * 100 + 99),
+                    "--tracker", f"{self.host}:{self.tracker_port}",
+                    "--key", self.key,
+                ],
+                env=env,
+                preexec_fn=lambda cpus=cpus: os.sched_setaffinity(0, cpus),
+            ))
+        self.wait_registered()
+
+    def wait_registered(self, timeout=60.0):
+        """
+        Block until all servers are idle and registered with the tracker.
+
+        Parameters:
+            timeout (float): Seconds to wait.
+        """
+        from tvm import rpc
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                summary = rpc.connect_tracker(self.host, self.tracker_port).summary()
+                free = summary["queue_info"].get(self.key, {}).get("free", 0)
+                if free >= self.num_servers:
+                    return
+            except (ConnectionError, OSError, RuntimeError):
+                pass
+            time.sleep(0.5)
+        raise TimeoutError(f"Only some of the {self.num_servers} RPC servers registered in {timeout} s")
+
+    def stop(self):
+        """
+        Terminate the servers and the tracker.
+        """
+        for process in reversed(self.processes):
+            process.terminate()
+        for process in self.processes:
+            process.wait()
+        self.processes = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def builder_parallelism(self):
+        """
+        Number of parallel compile jobs that keep the servers busy.
+
+        Builds run on the cores the servers are not pinned to, so measurements
+        are not disturbed; when every core is pinned, one job per server.
+
+        Returns:
+            int: n_parallel for the builders.
+        """
+        pinned = {cpu for cpus in self.core_sets for cpu in cpus}
+        return len(set(os.sched_getaffinity(0)) - pinned) or self.num_servers
+
+    def autotvm_measure_option(self, build_func="default", number=10, repeat=1, timeout=10, min_repeat_ms=150):
+        """
+        AutoTVM measure options that build and measure on all servers at once.
+
+        Parameters:
+            build_func (str or callable): Build function, e.g. ndk.create_shared for Android.
+            number (int): Runs per measurement.
+            repeat (int): Measurements per config.
+            timeout (float): Run timeout in seconds.
+            min_repeat_ms (int): Minimum duration of one measurement.
+
+        Returns:
+            dict: Result of autotvm.measure_option.
+        """
+        from tvm import autotvm
+
+        return autotvm.measure_option(
+            builder=autotvm.LocalBuilder(build_func=build_func, timeout=15, n_parallel=self.builder_parallelism()),
+            runner=autotvm.RPCRunner(
+                self.key,
+                host=self.host,
+                port=self.tracker_port,
+                number=number,
+                repeat=repeat,
+                timeout=timeout,
+                min_repeat_ms=min_repeat_ms,
+                n_parallel=self.num_servers,
+            ),
+        )
+
+    def auto_scheduler_runner(self, repeat=5, min_repeat_ms=200, timeout=20):
+        """
+        Auto-scheduler runner that measures on all servers at once.
+
+        Parameters:
+            repeat (int): Measurements per program.
+            min_repeat_ms (int): Minimum duration of one measurement.
+            timeout (float): Run timeout in seconds.
+
+        Returns:
+            auto_scheduler.RPCRunner: The runner.
+        """
+        from tvm import auto_scheduler
+
+        return auto_scheduler.RPCRunner(
+            self.key,
+            host=self.host,
+            port=self.tracker_port,
+            repeat=repeat,
+            min_repeat_ms=min_repeat_ms,
+            timeout=timeout,
+            n_parallel=self.num_servers,
+        )
+
+    def auto_scheduler_builder(self, timeout=15):
+        """
+        Auto-scheduler builder that compiles enough programs per round for all servers.
+
+        The default LocalBuilder sizes its pool by the CPU count; this one
+        uses builder_parallelism, like the AutoTVM builder of the farm.
+
+        Parameters:
+            timeout (float): Build timeout in seconds.
+
+        Returns:
+            auto_scheduler.LocalBuilder: The builder.
+        """
+        from tvm import auto_scheduler
+
+        return auto_scheduler.LocalBuilder(timeout=timeout, n_parallel=self.builder_parallelism())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start a local RPC tracker and pinned RPC servers.")
+    parser.add_argument("--num-servers", type=int, default=4, help="Number of RPC servers")
+    parser.add_argument("--key", default="local", help="Device key")
+    parser.add_argument("--tracker-port", type=int, default=9190, help="Tracker port")
+    args = parser.parse_args()
+
+    farm = RPCFarm(args.num_servers, key=args.key, tracker_port=args.tracker_port)
+    with farm:
+        for i, cpus in enumerate(farm.core_sets):
+            print(f"server {i}: cores {min(cpus)}-{max(cpus)}")
+        print(f"Tracker at {farm.host}:{farm.tracker_port}, key '{farm.key}'. Press Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import collections
+
+# Relay operators that AutoTVM extracts tunable tasks from
+TUNABLE_OPS = (
+    "nn.conv2d",
+    "nn.conv2d_transpose",
+    "nn.dense",
+    "nn.batch_matmul",
+    "nn.conv3d",
+)
+
+
+def _tensor_shapes(args):
+    return tuple(
+        tuple(int(dim) for dim in arg[1])
+        for arg in args
+        if isinstance(arg, (list, tuple)) and len(arg) == 3 and arg[0] == "TENSOR"
+    )
+
+
+def count_task_occurrences(mod, tasks, target, target_host=None):
+    """
+    Count how often each task's workload appears in the model.
+
+    AutoTVM extracts each distinct workload once, so identical layers are
+    collapsed into one task. To match calls to tasks on the full workload
+    (shapes, dtypes, strides, padding, dilation, groups and layout), every
+    distinct tunable call is wrapped in a one-operator function and its
+    tasks are extracted the same way as for the whole model.
+
+    Parameters:
+        mod (tvm.IRModule): The Relay module the tasks were extracted from.
+        tasks (list): autotvm.task.Task list from extract_from_program.
+        target (tvm.target.Target): Target the tasks were extracted for.
+        target_host (tvm.target.Target): Host target, or None.
+
+    Returns:
+        list: Occurrence count per task, at least 1.
+    """
+    import tvm
+    from tvm import autotvm, relay
+
+    mod = relay.transform.InferType()(mod)
+    calls = collections.OrderedDict()
+
+    def visit(expr):
+        if isinstance(expr, relay.Call) and isinstance(expr.op, tvm.ir.Op) and expr.op.name in TUNABLE_OPS:
+            key = (expr.op.name, tuple(str(arg.checked_type) for arg in expr.args), str(expr.attrs))
+            if key in calls:
+                calls[key][1] += 1
+            else:
+                calls[key] = [expr, 1]
+
+    relay.analysis.post_order_visit(mod["main"], visit)
+
+    workload_counts = collections.Counter()
+    for call, count in calls.values():
+        new_args = [relay.var(f"arg{i}", type_annotation=arg.checked_type) for i, arg in enumerate(call.args)]
+        func = relay.Function(new_args, relay.Call(call.op, new_args, call.attrs, call.type_args))
+        for task in autotvm.task.extract_from_program(
+            tvm.IRModule.from_expr(func), params={}, target=target, target_host=target_host
+        ):
+            workload_counts[task.workload] += count
+
+    return [max(1, workload_counts[task.workload]) for task in tasks]
+
+
+def plan_budget(tasks, counts, total_trials, min_share=0.005, min_trials=32,
+                low_impact_share=0.02, early_stop_fraction=0.25):
+    """
+    Split a global trial budget across tasks in proportion to FLOPs times occurrences.
+
+    Tasks below min_share of the total weight get no trials, and when the
+    budget cannot give every remaining task min_trials the lightest tasks are
+    dropped. The plan never exceeds total_trials. Tasks below
+    low_impact_share get an early-stopping limit so that they stop as soon
+    as they stall. Trials a task cannot use (its config space is smaller)
+    are handed to the remaining tasks.
+
+    Parameters:
+        tasks (list): autotvm.task.Task list.
+        counts (list): Occurrence count per task, from count_task_occurrences.
+        total_trials (int): Global trial budget.
+        min_share (float): Weight share below which a task is skipped.
+        min_trials (int): Smallest budget given to a task that is tuned at all,
+            unless its whole config space is smaller.
+        low_impact_share (float): Weight share below which early stopping is enabled.
+        early_stop_fraction (float): Early-stopping limit as a fraction of the task budget.
+
+    Returns:
+        list: One dict per task with "index", "weight", "share", "trials" and "early_stopping".
+    """
+    weights = [float(getattr(task, "flop", 0) or 0) * count for task, count in zip(tasks, counts)]
+    total_weight = sum(weights) or 1.0
+    plan = []
+    for i, (task, weight) in enumerate(zip(tasks, weights)):
+        plan.append({
+            "index": i,
+            "task": task,
+            "count": counts[i],
+            "weight": weight,
+            "share": weight / total_weight,
+            "space": len(task.config_space),
+            "trials": 0,
+            "early_stopping": None,
+        })
+
+    active = [entry for entry in plan if entry["share"] >= min_share]
+    remaining = total_trials
+    while active and remaining > 0:
+        # When the budget cannot give every task its floor, drop the lightest tasks
+        active.sort(key=lambda e: -e["weight"])
+        while len(active) > 1 and len(active) * min_trials > remaining:
+            active.pop()
+        active_weight = sum(entry["weight"] for entry in active) or 1.0
+        capped = []
+        left = remaining
+        for entry in active:
+            want = max(min_trials, int(round(remaining * entry["weight"] / active_weight)))
+            room = entry["space"] - entry["trials"]
+            # Rounding and the floor may ask for more than is left
+            give = min(want, room, left)
+            entry["trials"] += give
+            left -= give
+            if entry["trials"] >= entry["space"]:
+                capped.append(entry)
+        remaining = left
+        # Only tasks that hit their config-space size free up budget for another round
+        if not capped:
+            break
+        active = [entry for entry in active if entry not in capped]
+
+    # Rounding may leave a task with only the last few trials; top it up from the
+    # largest allocation, or drop it and hand its trials back when that is not possible
+    for entry in sorted(plan, key=lambda e: -e["weight"]):
+        floor = min(min_trials, entry["space"])
+        if not 0 < entry["trials"] < floor:
+            continue
+        need = floor - entry["trials"]
+        donor = max(plan, key=lambda e: e["trials"])
+        if donor is not entry and donor["trials"] - need >= min(min_trials, donor["space"]):
+            donor["trials"] -= need
+            entry["trials"] += need
+        else:
+            if donor is not entry:
+                donor["trials"] += min(entry["trials"], donor["space"] - donor["trials"])
+            entry["trials"] = 0
+
+    planned = sum(entry["trials"] for entry in plan)
+    if planned > total_trials:
+        raise RuntimeError(f"Planned {planned} trials, more than the budget of {total_trials}")
+    for entry in plan:
+        if 0 < entry["trials"] and entry["share"] < low_impact_share:
+            entry["early_stopping"] = max(min_trials, int(entry["trials"] * early_stop_fraction))
+    return plan
+
+
+def print_plan(plan):
+    """
+    Print the planned allocation, largest weight first.
+
+    Parameters:
+        plan (list): Output of plan_budget.
+    """
+    print("|  ID  | %-40s | Count |   GFLOP | Share (%%) | Space | Trials | Early stop |" % "Task")
+    for entry in sorted(plan, key=lambda e: -e["weight"]):
+        name = "%s%s" % (entry["task"].name, _tensor_shapes(entry["task"].args)[:1])
+        print("| %4d | %-40s | %5d | %7.3f | %9.2f | %5d | %6d | %10s |" % (
+            entry["index"],
+            name[:40],
+            entry["count"],
+            entry["weight"] / entry["count"] / 1e9,
+            entry["share"] * 100,
+            entry["space"],
+            entry["trials"],
+            entry["early_stopping"] if entry["early_stopping"] is not None else "-",
+        ))
+    tuned = [entry for entry in plan if entry["trials"] > 0]
+    print(
+        f"{len(tuned)}/{len(plan)} tasks tuned, {sum(e['trials'] for e in plan)} trials, "
+        f"covering {sum(e['share'] for e in tuned) * 100:.1f}% of the weighted FLOPs"
+    )
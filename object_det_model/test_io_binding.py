@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+tvm = pytest.importorskip("tvm")
+from tvm import relay
+from tvm.contrib import graph_executor
+
+from io_binding import BoundExecutor
+
+
+def _add_one_module(shape, dtype, dev):
+    x = relay.var("input", shape=shape, dtype=dtype)
+    mod = tvm.IRModule.from_expr(relay.Function([x], x + relay.const(1, dtype)))
+    with tvm.transform.PassContext(opt_level=3):
+        lib = relay.build(mod, target="llvm")
+    return graph_executor.GraphModule(lib["default"](dev))
+
+
+@pytest.mark.parametrize("zero_copy", [True, False])
+def test_every_run_sees_its_input(zero_copy):
+    shape, dtype, dev = (2, 3), "float32", tvm.cpu(0)
+    executor = BoundExecutor(_add_one_module(shape, dtype, dev), "input", shape, dtype, dev, zero_copy=zero_copy)
+    first = np.full(shape, 1, dtype=dtype)
+    second = np.full(shape, 5, dtype=dtype)
+
+    # Outputs are reused across runs, so keep a copy of the first one
+    out_first = executor.run(first)[0].copy()
+    out_second = executor.run(second)[0].copy()
+
+    assert not np.array_equal(out_first, out_second)
+    np.testing.assert_array_equal(out_first, first + 1)
+    np.testing.assert_array_equal(out_second, second + 1)
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from task_budget import plan_budget
+
+
+def _task(flop, space):
+    return SimpleNamespace(name="conv2d_nchw.x86", args=(), flop=flop, config_space=range(space))
+
+
+def test_many_equal_tasks_stay_within_budget():
+    # 150 * 32 trials of floor alone would exceed the budget
+    tasks = [_task(1e9, 10000) for _ in range(150)]
+    plan = plan_budget(tasks, [1] * len(tasks), 3072, min_share=0.0)
+    trials = [entry["trials"] for entry in plan]
+    assert sum(trials) <= 3072
+    assert all(t == 0 or t >= 32 for t in trials)
+
+
+def test_capped_space_is_handed_to_other_tasks():
+    tasks = [_task(1e9, 100)] + [_task(1e9, 10000) for _ in range(3)]
+    plan = plan_budget(tasks, [1] * len(tasks), 4000)
+    trials = [entry["trials"] for entry in plan]
+    assert trials[0] == 100
+    assert sum(trials) <= 4000
+    assert sum(trials) >= 4000 - len(tasks)
+
+
+def test_rounding_never_exceeds_budget():
+    tasks = [_task(flop, 10000) for flop in (3e9, 3e9, 3e9, 1e9)]
+    for total_trials in range(100, 400, 7):
+        plan = plan_budget(tasks, [1] * len(tasks), total_trials)
+        assert sum(entry["trials"] for entry in plan) <= total_trials
+
+
+def test_every_tuned_task_gets_min_trials():
+    tasks = [_task(flop, 10000) for flop in (9e9, 1e9, 1e8, 1e8, 1e8)]
+    for total_trials in (64, 65, 100, 127):
+        plan = plan_budget(tasks, [1] * len(tasks), total_trials, min_share=0.0)
+        trials = [entry["trials"] for entry in plan]
+        assert sum(trials) <= total_trials
+        assert all(t == 0 or t >= 32 for t in trials), (total_trials, trials)
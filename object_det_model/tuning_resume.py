@@ -0,0 +1,156 @@
+import os
+
+import numpy as np
+from tvm import auto_scheduler
+
+
+def summarize_log(log_file):
+    """
+    Collect per-workload statistics from an auto-scheduler tuning log.
+
+    Parameters:
+        log_file (str): Path to the auto-scheduler record log.
+
+    Returns:
+        dict: workload_key -> {"trials": int, "valid": int, "best_ms": float or None}.
+    """
+    stats = {}
+    if not os.path.exists(log_file):
+        return stats
+
+    for inp, res in auto_scheduler.RecordReader(log_file):
+        entry = stats.setdefault(inp.task.workload_key, {"trials": 0, "valid": 0, "best_ms": None})
+        entry["trials"] += 1
+        if res.error_no != 0:
+            continue
+        entry["valid"] += 1
+        cost_ms = float(np.mean([c.value for c in res.costs])) * 1000
+        if entry["best_ms"] is None or cost_ms < entry["best_ms"]:
+            entry["best_ms"] = cost_ms
+    return stats
+
+
+def plan_resume(tasks, task_weights, log_file, total_trials, target_latency_ms=None):
+    """
+    Decide which tasks still need tuning and how many trials are left.
+
+    A task is skipped when its best recorded latency is already at or below
+    target_latency_ms. The remaining budget is total_trials minus the trials
+    already recorded for the tasks that are kept.
+
+    Parameters:
+        tasks (list): auto_scheduler.SearchTask list from extract_tasks.
+        task_weights (list): Occurrence count of each task.
+        log_file (str): Existing tuning log, may not exist yet.
+        total_trials (int): Overall trial budget of the tuning session.
+        target_latency_ms (float): Per-task latency that counts as good enough, or None.
+
+    Returns:
+        tuple: (kept tasks, kept weights, remaining trials, per-task plan as a list of dicts).
+    """
+    stats = summarize_log(log_file)
+    kept_tasks, kept_weights, plan = [], [], []
+    used_trials = 0
+
+    for task, weight in zip(tasks, task_weights):
+        entry = stats.get(task.workload_key, {"trials": 0, "valid": 0, "best_ms": None})
+        done = (
+            target_latency_ms is not None
+            and entry["best_ms"] is not None
+            and entry["best_ms"] <= target_latency_ms
+        )
+        plan.append({
+            "task": task.desc,
+            "weight": int(weight),
+            "trials": entry["trials"],
+            "best_ms": entry["best_ms"],
+            "skip": done,
+        })
+        if done:
+            continue
+        kept_tasks.append(task)
+        kept_weights.append(weight)
+        used_trials += entry["trials"]
+
+    remaining = max(0, total_trials - used_trials)
+    return kept_tasks, kept_weights, remaining, plan
+
+
+def print_resume_plan(plan, remaining_trials):
+    """
+    Print the per-task resume plan.
+
+    Parameters:
+        plan (list): Per-task plan from plan_resume.
+        remaining_trials (int): Trial budget left for this session.
+    """
+    print("|  ID  | %-50s | Weight | Trials | Best (ms) | Action |" % "Task")
+    for i, entry in enumerate(plan):
+        best = "-" if entry["best_ms"] is None else "%.4f" % entry["best_ms"]
+        action = "skip" if entry["skip"] else "tune"
+        print("| %4d | %-50s | %6d | %6d | %9s | %6s |" % (
+            i, entry["task"][-50:], entry["weight"], entry["trials"], best, action
+        ))
+    print(f"Remaining trial budget: {remaining_trials}")
+
+
+def resume_tune(tasks, task_weights, log_file, total_trials, runner,
+                target_latency_ms=None, early_stopping=None, verbose=1, measure_callbacks=None,
+                cost_model=None, builder="local"):
+    """
+    Tune auto-scheduler tasks, continuing from the records already in log_file.
+
+    The task scheduler restores per-task trial counts and best costs from the
+    log, the XGBoost cost model is trained on the existing records before the
+    first round, and the search policies are seeded with the measured states
+    so they are not measured again. New records are appended to the same log.
+
+    Parameters:
+        tasks (list): auto_scheduler.SearchTask list from extract_tasks.
+        task_weights (list): Occurrence count of each task.
+        log_file (str): Tuning log to resume from and append to.
+        total_trials (int): Overall trial budget, including trials already in the log.
+        runner (auto_scheduler.ProgramRunner): Runner used for measurements.
+        target_latency_ms (float): Per-task latency that counts as good enough, or None.
+        early_stopping (int): Stop a task after this many trials without improvement, or None.
+        verbose (int): Verbosity of the tuner.
+        measure_callbacks (list): Extra measure callbacks; callbacks with a bind()
+            method get the TaskScheduler before tuning starts.
+        cost_model (auto_scheduler.XGBModel): Pre-trained model shared by all tasks,
+            see cost_model.make_warm_xgb_model; None trains a fresh model on log_file.
+        builder (auto_scheduler.ProgramBuilder): Builder used for measurements, e.g.
+            RPCFarm.auto_scheduler_builder, or "local" for the default LocalBuilder.
+
+    Returns:
+        list: Per-task plan from plan_resume.
+    """
+    kept_tasks, kept_weights, remaining, plan = plan_resume(
+        tasks, task_weights, log_file, total_trials, target_latency_ms
+    )
+    print_resume_plan(plan, remaining)
+    if not kept_tasks or remaining == 0:
+        print("Nothing left to tune.")
+        return plan
+
+    tuning_option = auto_scheduler.TuningOptions(
+        num_measure_trials=remaining,
+        early_stopping=early_stopping,
+        builder=builder,
+        runner=runner,
+        measure_callbacks=[auto_scheduler.RecordToFile(log_file)] + list(measure_callbacks or []),
+        verbose=verbose,
+    )
+    load_log_file = log_file if os.path.exists(log_file) else None
+    task_scheduler = auto_scheduler.TaskScheduler(
+        kept_tasks, kept_weights, load_log_file=load_log_file
+    )
+    for callback in measure_callbacks or []:
+        if hasattr(callback, "bind"):
+            callback.bind(task_scheduler)
+    search_policy = "default"
+    if cost_model is not None:
+        from cost_model import make_warm_search_policies
+
+        search_policy = make_warm_search_policies(kept_tasks, cost_model, load_log_file, verbose)
+    task_scheduler.tune(tuning_option, search_policy=search_policy)
+    return plan
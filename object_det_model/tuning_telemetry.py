@@ -0,0 +1,340 @@
+import argparse
+import csv
+import json
+import os
+import time
+
+from log_tools import is_valid, parse_record
+
+
+class LogFollower:
+    """
+    Read a tuning log incrementally while a tuner is still appending to it.
+
+    Parameters:
+        path (str): AutoTVM or auto-scheduler record log.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+
+    def poll(self):
+        """
+        Read the records appended since the last call.
+
+        A trailing line without a newline is left for the next call, since the
+        tuner may still be writing it.
+
+        Returns:
+            list: Parsed records, see log_tools.parse_record.
+        """
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self.offset += len(line)
+                record = parse_record(line.decode("utf-8"))
+                if record is not None:
+                    records.append(record)
+        return records
+
+
+class TuningCurves:
+    """
+    Best-latency-versus-trials curve of every task in a tuning session.
+
+    Parameters:
+        weights (dict): Workload key -> occurrence count, used for the estimated
+            end-to-end latency; workloads without a weight count once.
+        names (dict): Workload key -> readable task name.
+    """
+
+    def __init__(self, weights=None, names=None):
+        self.weights = weights or {}
+        self.names = names or {}
+        self.trials = {}
+        self.best_ms = {}
+        self.curves = {}
+
+    def add(self, workload, cost_s, valid=True):
+        """
+        Add one measurement.
+
+        Parameters:
+            workload (str): Workload key of the measured task.
+            cost_s (float): Measured cost in seconds.
+            valid (bool): False for failed measurements, which only count as a trial.
+        """
+        self.trials[workload] = self.trials.get(workload, 0) + 1
+        curve = self.curves.setdefault(workload, [])
+        if valid and (workload not in self.best_ms or cost_s * 1000 < self.best_ms[workload]):
+            self.best_ms[workload] = cost_s * 1000
+        if workload in self.best_ms:
+            curve.append((self.trials[workload], self.best_ms[workload]))
+
+    def add_records(self, records):
+        """
+        Add parsed log records.
+
+        Parameters:
+            records (list): Records from LogFollower.poll or log_tools.iter_records.
+        """
+        for record in records:
+            self.add(record["workload"], record["cost"], is_valid(record))
+
+    def name(self, workload):
+        """
+        Readable name of a workload.
+
+        Parameters:
+            workload (str): Workload key.
+
+        Returns:
+            str: The registered name, or the workload key itself.
+        """
+        return self.names.get(workload, workload)
+
+    def gain(self, workload, window):
+        """
+        Relative improvement of the best latency over the last window trials.
+
+        Parameters:
+            workload (str): Workload key.
+            window (int): Number of trials to look back.
+
+        Returns:
+            float: (best window trials ago - best now) / best now, or None if
+                the task has fewer than window trials with a valid result.
+        """
+        curve = self.curves.get(workload, [])
+        if not curve or curve[-1][0] - curve[0][0] < window:
+            return None
+        now = curve[-1][1]
+        before = now
+        for trial, best in reversed(curve):
+            if trial <= curve[-1][0] - window:
+                before = best
+                break
+        return (before - now) / now
+
+    def estimated_latency_ms(self):
+        """
+        Estimate end-to-end latency as the weighted sum of per-task best latencies.
+
+        Returns:
+            float: Estimated latency in milliseconds.
+        """
+        return sum(best * self.weights.get(workload, 1) for workload, best in self.best_ms.items())
+
+    def print_table(self, window=None):
+        """
+        Print the per-task state in the style of the task scheduler table.
+
+        Parameters:
+            window (int): If given, also print the gain over the last window trials.
+        """
+        print("|  ID  | %-50s | Latency (ms) | Trials | Gain |" % "Task")
+        for i, workload in enumerate(sorted(self.trials, key=lambda w: -self.best_ms.get(w, 0))):
+            gain = self.gain(workload, window) if window else None
+            print("| %4d | %-50s | %12s | %6d | %4s |" % (
+                i,
+                self.name(workload)[-50:],
+                "%.4f" % self.best_ms[workload] if workload in self.best_ms else "-",
+                self.trials[workload],
+                "%.0f%%" % (gain * 100) if gain is not None else "-",
+            ))
+        print(f"Estimated total latency: {self.estimated_latency_ms():.3f} ms, trials: {sum(self.trials.values())}")
+
+    def to_json(self, path):
+        """
+        Write all curves and the estimated latency to a JSON file.
+
+        Parameters:
+            path (str): Output file path.
+        """
+        report = {
+            "estimated_latency_ms": self.estimated_latency_ms(),
+            "tasks": [
+                {
+                    "workload": workload,
+                    "name": self.name(workload),
+                    "weight": self.weights.get(workload, 1),
+                    "trials": self.trials[workload],
+                    "best_ms": self.best_ms.get(workload),
+                    "curve": self.curves[workload],
+                }
+                for workload in self.trials
+            ],
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    def to_csv(self, path):
+        """
+        Write one row per (task, trial with a valid result) to a CSV file.
+
+        Parameters:
+            path (str): Output file path.
+        """
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["task", "trial", "best_ms"])
+            for workload, curve in self.curves.items():
+                for trial, best in curve:
+                    writer.writerow([self.name(workload), trial, best])
+
+    def plot(self, path, top=12):
+        """
+        Plot the curves of the slowest tasks; skipped when matplotlib is missing.
+
+        Parameters:
+            path (str): Output image path.
+            top (int): Number of tasks to plot, by best latency times weight.
+
+        Returns:
+            bool: True if the plot was written.
+        """
+        try:
+            import matplotlib
+
+            matplotlib.use("Agg")
+            import matplotlib.pyplot as plt
+        except ImportError:
+            print("matplotlib is not installed, skipping the plot")
+            return False
+
+        ranked = sorted(self.best_ms, key=lambda w: -self.best_ms[w] * self.weights.get(w, 1))[:top]
+        fig, ax = plt.subplots(figsize=(10, 6))
+        for workload in ranked:
+            trials, best = zip(*self.curves[workload])
+            ax.plot(trials, best, label=self.name(workload)[-40:])
+        ax.set_xlabel("Trials")
+        ax.set_ylabel("Best latency (ms)")
+        ax.set_yscale("log")
+        ax.legend(fontsize="small")
+        fig.tight_layout()
+        fig.savefig(path)
+        plt.close(fig)
+        return True
+
+
+def autotvm_early_stop(window=200, min_gain=0.01):
+    """
+    AutoTVM tuner callback that stops a task once it stops improving.
+
+    The task stops when its best latency improved by less than min_gain
+    (relative) over the last window trials.
+
+    Parameters:
+        window (int): Number of trials to look back.
+        min_gain (float): Minimum relative improvement to keep tuning.
+
+    Returns:
+        callable: Callback for Tuner.tune(callbacks=[...]).
+    """
+    curves = TuningCurves()
+
+    def _callback(tuner, inputs, results):
+        workload = tuner.task.name + str(tuner.task.args)
+        for result in results:
+            costs = result.costs if result.error_no == 0 else []
+            valid = bool(costs) and all(isinstance(c, float) for c in costs)
+            curves.add(workload, sum(costs) / len(costs) if valid else 1e9, valid)
+        gain = curves.gain(workload, window)
+        if gain is not None and gain < min_gain:
+            print(f"\nStopping {tuner.task.name}: {gain * 100:.2f}% gain over the last {window} trials")
+            # Tuner.tune checks has_next() before every batch
+            tuner.has_next = lambda: False
+
+    return _callback
+
+
+def make_auto_scheduler_early_stop(window=256, min_gain=0.01):
+    """
+    Create an auto-scheduler measure callback that retires tasks once they stop improving.
+
+    The callback must be bound to the TaskScheduler with bind() before tuning.
+    A retired task is added to the scheduler's dead tasks, so its remaining
+    budget goes to the other tasks.
+
+    Parameters:
+        window (int): Number of trials to look back.
+        min_gain (float): Minimum relative improvement to keep tuning.
+
+    Returns:
+        auto_scheduler.measure.PythonBasedMeasureCallback: The callback.
+    """
+    from tvm.auto_scheduler.measure import PythonBasedMeasureCallback
+
+    class AutoSchedulerEarlyStop(PythonBasedMeasureCallback):
+        def __init__(self):
+            super().__init__()
+            self.task_scheduler = None
+            self.curves = TuningCurves()
+
+        def bind(self, task_scheduler):
+            self.task_scheduler = task_scheduler
+            self.curves.weights = {
+                task.workload_key: weight
+                for task, weight in zip(task_scheduler.tasks, task_scheduler.task_weights)
+            }
+            self.curves.names = {task.workload_key: task.desc for task in task_scheduler.tasks}
+
+        def callback(self, policy, inputs, results):
+            workload = policy.search_task.workload_key
+            for result in results:
+                valid = result.error_no == 0
+                cost = sum(c.value for c in result.costs) / len(result.costs) if valid else 1e9
+                self.curves.add(workload, cost, valid)
+            if self.task_scheduler is None:
+                return
+            gain = self.curves.gain(workload, window)
+            if gain is not None and gain < min_gain:
+                for i, task in enumerate(self.task_scheduler.tasks):
+                    if task.workload_key == workload and i not in self.task_scheduler.dead_tasks:
+                        print(f"Retiring task {i}: {gain * 100:.2f}% gain over the last {window} trials")
+                        self.task_scheduler.dead_tasks.add(i)
+
+    return AutoSchedulerEarlyStop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convergence telemetry of AutoTVM and auto-scheduler logs.")
+    parser.add_argument("log", help="Tuning log")
+    parser.add_argument("--watch", type=float, default=0, help="Poll the log every N seconds while tuning runs")
+    parser.add_argument("--window", type=int, default=256, help="Trials to look back for the gain column")
+    parser.add_argument("--weights", default=None, help="JSON file mapping workload keys to occurrence counts")
+    parser.add_argument("--prefix", default=None, help="Prefix of the CSV/JSON/PNG outputs")
+    args = parser.parse_args()
+
+    weights = None
+    if args.weights:
+        with open(args.weights, "r") as f:
+            weights = json.load(f)
+    prefix = args.prefix or os.path.splitext(args.log)[0] + ".telemetry"
+
+    follower = LogFollower(args.log)
+    curves = TuningCurves(weights=weights)
+    try:
+        while True:
+            curves.add_records(follower.poll())
+            curves.print_table(window=args.window)
+            curves.to_json(prefix + ".json")
+            curves.to_csv(prefix + ".csv")
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        pass
+    if curves.plot(prefix + ".png"):
+        print(f"Plot written to {prefix}.png")
+    print(f"Curves written to {prefix}.json and {prefix}.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,24 @@
 # coding=utf-8
+import argparse
+import itertools
+import json
+
 import tvm
 from tvm import relay
+from tvm.topi.testing import conv2d_nchw_python
 import numpy as np
 from tvm.contrib import graph_executor
 
+# Passes disabled per fusion variant. relay.build needs SimplifyInference to
+# lower batch_norm at all, so "no_simplify" records a build error on most TVM
+# versions and only runs when asked for with --variants
+PASS_VARIANTS = {
+    "all": [],
+    "no_fold": ["FoldScaleAxis", "FoldConstant"],
+    "no_simplify": ["SimplifyInference", "FoldScaleAxis", "FoldConstant"],
+}
+DEFAULT_VARIANTS = ["all", "no_fold"]
+
 # Construct Batch Normalization (BN)
 def batch_norm(data, gamma=None, beta=None, moving_mean=None, moving_var=None, **kwargs):
     name = kwargs.get("name")
@@ -33,61 +48,157 @@ def conv2d(data, weight=None, **kwargs):
 
 # Construct Conv + BN + ReLU as simpleNet
 def simplenet(data, name, channels, kernel_size=(3, 3), strides=(1, 1),
-              padding=(1, 1), epsilon=1e-5):
+              padding=(1, 1), epsilon=1e-5, data_layout='NCHW'):
     conv = conv2d(
         data=data,
         channels=channels,
         kernel_size=kernel_size,
         strides=strides,
         padding=padding,
-        data_layout='NCHW',
+        data_layout=data_layout,
+        kernel_layout='OIHW' if data_layout == 'NCHW' else 'HWIO',
         name=name + '_conv'
     )
-    bn = batch_norm(data=conv, epsilon=epsilon, name=name + '_bn')
+    bn = batch_norm(data=conv, epsilon=epsilon, axis=data_layout.index('C'), name=name + '_bn')
     act = relay.nn.relu(data=bn)
     return act
 
-# Define input data shape and kernel shape
-data_shape = (1, 3, 224, 224)
-kernel_shape = (32, 3, 3, 3)
-dtype = "float32"
-data = relay.var("data", shape=data_shape, dtype=dtype)
-
-# Build the simpleNet
-act = simplenet(data, "graph", 32, strides=(2, 2))
-func = relay.Function(relay.analysis.free_vars(act), act)
-
-# Print the function
-print("SimpleNet function:")
-print(func)
-
-# Randomize input data
-np_data = np.random.uniform(-1, 1, (1, 3, 224, 224))
-
-# Define parameters
-params = {
-    "graph_conv_weight": tvm.nd.array(np.random.uniform(-1, 1, (32, 3, 3, 3)).astype(dtype)),
-    "graph_bn_gamma": tvm.nd.array(np.random.uniform(-1, 1, (32)).astype(dtype)),
-    "graph_bn_beta": tvm.nd.array(np.random.uniform(-1, 1, (32)).astype(dtype)),
-    "graph_bn_moving_mean": tvm.nd.array(np.random.uniform(-1, 1, (32)).astype(dtype)),
-    "graph_bn_moving_var": tvm.nd.array(np.random.uniform(-1, 1, (32)).astype(dtype)),
-}
+# Generate the inputs and parameters of one case, always in NCHW/OIHW
+def make_case_data(batch, in_channels, size, channels, kernel, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "data": rng.uniform(-1, 1, (batch, in_channels, size, size)).astype("float32"),
+        "graph_conv_weight": rng.uniform(-1, 1, (channels, in_channels, kernel, kernel)).astype("float32"),
+        "graph_bn_gamma": rng.uniform(-1, 1, channels).astype("float32"),
+        "graph_bn_beta": rng.uniform(-1, 1, channels).astype("float32"),
+        "graph_bn_moving_mean": rng.uniform(-1, 1, channels).astype("float32"),
+        # The variance must be positive, or the reference is NaN
+        "graph_bn_moving_var": rng.uniform(0.5, 1.5, channels).astype("float32"),
+    }
+
+# Conv + BN + ReLU in NumPy (float64) on NCHW data
+def numpy_reference(case_data, stride, padding, epsilon=1e-5):
+    conv = conv2d_nchw_python(
+        case_data["data"].astype("float64"),
+        case_data["graph_conv_weight"].astype("float64"),
+        stride,
+        padding,
+    )
+    shape = (1, -1, 1, 1)
+    scale = case_data["graph_bn_gamma"] / np.sqrt(case_data["graph_bn_moving_var"] + epsilon)
+    bn = (conv - case_data["graph_bn_moving_mean"].reshape(shape)) * scale.reshape(shape)
+    bn = bn + case_data["graph_bn_beta"].reshape(shape)
+    return np.maximum(bn, 0)
+
+# Count the calls of every operator in a Relay module
+def count_ops(mod):
+    counts = {}
+
+    def visit(node):
+        if isinstance(node, relay.Call) and isinstance(node.op, tvm.ir.Op):
+            counts[node.op.name] = counts.get(node.op.name, 0) + 1
+
+    relay.analysis.post_order_visit(mod["main"], visit)
+    return counts
+
+# Build, check and time one case under one fusion variant
+def run_case(case, variant, target, dev, repeat):
+    batch, in_channels, size, channels, kernel, stride, layout, dtype = (
+        case["batch"], case["in_channels"], case["size"], case["channels"],
+        case["kernel"], case["stride"], case["layout"], case["dtype"],
+    )
+    padding = kernel // 2
+    case_data = make_case_data(batch, in_channels, size, channels, kernel)
+    reference = numpy_reference(case_data, stride, padding)
+
+    # Convert the NCHW/OIHW data to the case layout and dtype
+    if layout == "NHWC":
+        case_data["data"] = case_data["data"].transpose(0, 2, 3, 1)
+        case_data["graph_conv_weight"] = case_data["graph_conv_weight"].transpose(2, 3, 1, 0)
+        reference = reference.transpose(0, 2, 3, 1)
+    case_data = {name: value.astype(dtype) for name, value in case_data.items()}
+
+    data = relay.var("data", shape=case_data["data"].shape, dtype=dtype)
+    act = simplenet(data, "graph", channels, kernel_size=(kernel, kernel), strides=(stride, stride),
+                    padding=(padding, padding), data_layout=layout)
+    func = relay.Function(relay.analysis.free_vars(act), act)
+    params = {name: tvm.nd.array(value) for name, value in case_data.items() if name != "data"}
+    mod = tvm.IRModule.from_expr(func)
+
+    result = dict(case, variant=variant)
+    try:
+        with tvm.transform.PassContext(opt_level=3, disabled_pass=PASS_VARIANTS[variant]):
+            optimized, _ = relay.optimize(mod, target, params)
+            lib = relay.build(mod, target, params=params)
+    except tvm.TVMError as err:
+        result["error"] = str(err).strip().splitlines()[-1]
+        return result
+
+    # BN is lowered when batch_norm is gone, and folded when its scale
+    # multiply did not survive optimization either
+    ops = count_ops(optimized)
+    result["ops"] = ops
+    result["bn_lowered"] = "nn.batch_norm" not in ops
+    result["bn_folded"] = "nn.batch_norm" not in ops and "multiply" not in ops and "divide" not in ops
+    result["kernels"] = sum(1 for node in json.loads(lib.get_graph_json())["nodes"] if node["op"] == "tvm_op")
+
+    m = graph_executor.GraphModule(lib["default"](dev))
+    m.set_input("data", tvm.nd.array(case_data["data"], dev))
+    m.run()
+    output = m.get_output(0).numpy().astype("float64")
+    tolerance = 1e-2 if dtype == "float16" else 1e-4
+    result["max_abs_err"] = float(np.max(np.abs(output - reference)))
+    result["numerics_ok"] = bool(np.allclose(output, reference, rtol=tolerance, atol=tolerance * kernel * kernel * in_channels))
 
-# Build with optimization level 3
-with tvm.transform.PassContext(opt_level=3):
-    lib = relay.build(func, "llvm", params=params)
+    timing = m.benchmark(dev, repeat=repeat, number=10)
+    result["median_ms"] = float(timing.median * 1000)
+    result["std_ms"] = float(timing.std * 1000)
+    return result
 
-# Set up the device and module for execution
-dev = tvm.cpu(0)
-dtype = "float32"
-m = graph_executor.GraphModule(lib["default"](dev))
+def main():
+    parser = argparse.ArgumentParser(description="Conv + BN + ReLU micro-benchmark suite.")
+    parser.add_argument("--batch", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--in-channels", nargs="+", type=int, default=[3, 32])
+    parser.add_argument("--channels", nargs="+", type=int, default=[32, 64])
+    parser.add_argument("--size", nargs="+", type=int, default=[56])
+    parser.add_argument("--kernel", nargs="+", type=int, default=[1, 3])
+    parser.add_argument("--stride", nargs="+", type=int, default=[1, 2])
+    parser.add_argument("--layout", nargs="+", choices=["NCHW", "NHWC"], default=["NCHW", "NHWC"])
+    parser.add_argument("--dtype", nargs="+", choices=["float32", "float16"], default=["float32"])
+    parser.add_argument("--variants", nargs="+", choices=list(PASS_VARIANTS), default=DEFAULT_VARIANTS)
+    parser.add_argument("--target", default="llvm", help="Compilation target")
+    parser.add_argument("--repeat", type=int, default=20, help="Timing repeats per case")
+    parser.add_argument("--json", default="conv_bn_relu_results.json", help="Path of the JSON results")
+    args = parser.parse_args()
 
-# Set inputs
-m.set_input("data", tvm.nd.array(np_data.astype(dtype)))
+    target = tvm.target.Target(args.target)
+    dev = tvm.device(target.kind.name, 0)
+    keys = ["batch", "in_channels", "size", "channels", "kernel", "stride", "layout", "dtype"]
+    grid = itertools.product(args.batch, args.in_channels, args.size, args.channels,
+                             args.kernel, args.stride, args.layout, args.dtype)
 
-# Execute the model
-m.run()
+    results = []
+    failures = 0
+    print("| Batch | Cin | Size | Cout | K | S | Layout | Dtype   | Variant     | Folded | Kernels | Median (ms) | OK |")
+    for values in grid:
+        case = dict(zip(keys, values))
+        for variant in args.variants:
+            result = run_case(case, variant, target, dev, args.repeat)
+            results.append(result)
+            if "error" in result:
+                print("| %5d | %3d | %4d | %4d | %d | %d | %-6s | %-7s | %-11s | build error: %s" % (
+                    *values, variant, result["error"][:60]))
+                continue
+            failures += not (result["numerics_ok"] and result["bn_lowered"])
+            print("| %5d | %3d | %4d | %4d | %d | %d | %-6s | %-7s | %-11s | %6s | %7d | %11.4f | %2s |" % (
+                *values, variant, result["bn_folded"], result["kernels"], result["median_ms"],
+                "ok" if result["numerics_ok"] and result["bn_lowered"] else "NO"))
 
-# Get outputs
-tvm_output = m.get_output(0)
+    with open(args.json, "w") as f:
+        json.dump({"target": str(target), "tvm_version": tvm.__version__, "results": results}, f, indent=2)
+    print(f"JSON results written to {args.json}")
+    if failures:
+        raise SystemExit(f"{failures} case(s) keep nn.batch_norm or do not match the NumPy reference")
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import sys
+
+import onnx
+import numpy as np
+import tvm
+import tvm.relay as relay
+from tvm.contrib import graph_executor
+from tvm.runtime import vm as runtime_vm
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "object_det_model"))
+from benchmark import measure_latencies, summarize_latencies
+
+# simple_model.onnx information:
+# input name: "input"
+# input shape: float32[batch_size, 4]
+# output name: "output"
+# output shape: float32[batch_size, 2]
+input_name = "input"
+num_features = 4
+dtype = "float32"
+
+
+def compile_dynamic(onnx_path, target, code_path, lib_path):
+    """
+    Compile the model once with a dynamic batch axis for the Relay VM.
+
+    Parameters:
+        onnx_path (str): Path to the ONNX model.
+        target (tvm.target.Target): Compilation target.
+        code_path (str): Where to save the VM bytecode.
+        lib_path (str): Where to export the kernel library.
+
+    Returns:
+        tvm.runtime.vm.Executable: The compiled executable.
+    """
+    shape_dict = {input_name: (relay.Any(), num_features)}
+    mod, params = relay.frontend.from_onnx(onnx.load(onnx_path), shape_dict, freeze_params=True)
+    with tvm.transform.PassContext(opt_level=3):
+        exe = relay.vm.compile(mod, target=target, params=params)
+
+    code, lib = exe.save()
+    lib.export_library(lib_path)
+    with open(code_path, "wb") as f:
+        f.write(code)
+    return exe
+
+
+def load_dynamic(code_path, lib_path, dev):
+    """
+    Load a saved VM executable.
+
+    Parameters:
+        code_path (str): Path of the VM bytecode.
+        lib_path (str): Path of the kernel library.
+        dev (tvm.device): Device to run on.
+
+    Returns:
+        tvm.runtime.vm.VirtualMachine: A VM that accepts any batch size.
+    """
+    with open(code_path, "rb") as f:
+        code = bytearray(f.read())
+    exe = runtime_vm.Executable.load_exec(code, tvm.runtime.load_module(lib_path))
+    return runtime_vm.VirtualMachine(exe, dev)
+
+
+def compile_static(onnx_path, target, batch_size, dev):
+    """
+    Compile a graph executor module for one fixed batch size.
+
+    Parameters:
+        onnx_path (str): Path to the ONNX model.
+        target (tvm.target.Target): Compilation target.
+        batch_size (int): Batch size the module is specialized for.
+        dev (tvm.device): Device to run on.
+
+    Returns:
+        graph_executor.GraphModule: The compiled module.
+    """
+    shape_dict = {input_name: (batch_size, num_features)}
+    mod, params = relay.frontend.from_onnx(onnx.load(onnx_path), shape_dict)
+    with tvm.transform.PassContext(opt_level=3):
+        lib = relay.build(mod, target=target, params=params)
+    return graph_executor.GraphModule(lib["default"](dev))
+
+
+def time_ms(run_fn, num_runs, batch_size, num_warmup=10):
+    """
+    Time a callable with the shared benchmark helpers.
+
+    Parameters:
+        run_fn (callable): One inference, including input and output copies.
+        num_runs (int): Number of timed calls.
+        batch_size (int): Samples per call, for the throughput.
+        num_warmup (int): Number of untimed calls first.
+
+    Returns:
+        dict: Latency summary from benchmark.summarize_latencies.
+    """
+    warmup_ms, latencies_ms = measure_latencies(run_fn, num_runs, num_warmup)
+    return summarize_latencies(latencies_ms, warmup_ms, batch_size=batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve simple_model.onnx with a dynamic batch through the Relay VM.")
+    parser.add_argument("--onnx", default="simple_model.onnx", help="ONNX model")
+    parser.add_argument("--target", default="llvm", help="Compilation target")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32, 64, 128, 256])
+    parser.add_argument("--num-runs", type=int, default=1000, help="Number of timed runs per batch size")
+    parser.add_argument("--json", default="simple_model_dynamic.json", help="Path of the JSON report")
+    args = parser.parse_args()
+
+    target = tvm.target.Target(args.target, host="llvm")
+    dev = tvm.device(target.kind.name, 0)
+
+    # One artifact for every batch size
+    compile_dynamic(args.onnx, target, "simple_model_vm.ro", "simple_model_vm.so")
+    vm = load_dynamic("simple_model_vm.ro", "simple_model_vm.so", dev)
+
+    report = {}
+    print("| Batch | VM p50 (ms) | VM p99 (ms) | Static p50 (ms) | Static p99 (ms) | VM overhead |")
+    for batch_size in args.batch_sizes:
+        np_data = np.random.uniform(-1, 1, (batch_size, num_features)).astype(dtype)
+
+        def run_vm():
+            return vm.invoke("main", tvm.nd.array(np_data, dev)).numpy()
+
+        static_module = compile_static(args.onnx, target, batch_size, dev)
+
+        def run_static():
+            static_module.set_input(input_name, tvm.nd.array(np_data, dev))
+            static_module.run()
+            return static_module.get_output(0).numpy()
+
+        # Both paths must agree before their timings mean anything
+        np.testing.assert_allclose(run_vm(), run_static(), rtol=1e-5, atol=1e-5)
+
+        entry = {
+            "vm": time_ms(run_vm, args.num_runs, batch_size),
+            "static": time_ms(run_static, args.num_runs, batch_size),
+        }
+        entry["vm_overhead_pct"] = (entry["vm"]["p50_ms"] / entry["static"]["p50_ms"] - 1) * 100
+        report[batch_size] = entry
+        print("| %5d | %11.4f | %11.4f | %15.4f | %15.4f | %10.1f%% |" % (
+            batch_size, entry["vm"]["p50_ms"], entry["vm"]["p99_ms"],
+            entry["static"]["p50_ms"], entry["static"]["p99_ms"], entry["vm_overhead_pct"]
+        ))
+
+    with open(args.json, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"JSON report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()